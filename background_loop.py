@@ -0,0 +1,55 @@
+"""
+Background Event Loop
+
+Runs one asyncio event loop in a daemon thread for the web interface. Export
+jobs started from the web are submitted to it as coroutines, so any number of
+concurrent exports share a single thread instead of needing one thread each.
+"""
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop():
+    """
+    Get the shared background event loop, starting its thread on first use.
+
+    Returns:
+        asyncio.AbstractEventLoop: Running event loop
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='background-loop', daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_in_background(coroutine, name=None):
+    """
+    Schedule a coroutine on the shared background event loop.
+
+    Args:
+        coroutine: Coroutine to run, e.g. exporter.process_all_pages_async(...)
+        name (str): Optional label used when logging a failure
+
+    Returns:
+        concurrent.futures.Future: Future resolving to the coroutine's result
+    """
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_background_loop())
+
+    def log_failure(done):
+        if not done.cancelled() and done.exception() is not None:
+            # Jobs record their own error status; this only keeps the traceback around
+            logger.debug(f"Background job {name or ''} failed: {done.exception()!r}")
+
+    future.add_done_callback(log_failure)
+    return future
@@ -0,0 +1,285 @@
+"""
+Timestamp to Block Index
+
+Translates timestamps into block numbers so date-filtered exports can ask the
+explorer for an exact startblock/endblock window instead of downloading the
+whole history and filtering it locally. Lookups use the explorer's
+getblocknobytime endpoint and fall back to a binary search over block
+timestamps. Every block timestamp seen during a search is kept as a sample, so
+later searches start from a narrow bracket. Samples and settled lookups are
+persisted per explorer in a JSON file.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_BLOCK_INDEX_FILE = f"{DEFAULT_CACHE_DIR}/block_index.json"
+SETTLED_SECONDS = 60 * 60  # Lookups older than this can no longer change and are kept
+
+
+def fetch_latest_block(client):
+    """
+    Get the current head block number of the chain.
+
+    Args:
+        client (ExplorerClient): Explorer client
+
+    Returns:
+        int: Latest block number
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails
+        ValueError: If the response does not contain a block number
+    """
+    data = client.get({'module': 'block', 'action': 'eth_block_number'}, use_cache=False)
+    result = data.get('result') if isinstance(data, dict) else None
+    if not result:
+        raise ValueError(f"Unexpected eth_block_number response: {data}")
+    return int(str(result), 16) if str(result).startswith('0x') else int(result)
+
+
+def fetch_block_timestamp(client, block):
+    """
+    Get the timestamp of a block from the explorer's getblockreward endpoint.
+
+    Args:
+        client (ExplorerClient): Explorer client
+        block (int): Block number
+
+    Returns:
+        int: Unix timestamp of the block
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails
+        ValueError: If the response does not contain a timestamp
+    """
+    data = client.get({'module': 'block', 'action': 'getblockreward', 'blockno': block})
+    result = data.get('result') if isinstance(data, dict) else None
+    if data.get('status') != '1' or not isinstance(result, dict) or not result.get('timeStamp'):
+        raise ValueError(f"No timestamp for block {block}: {data.get('message')}")
+    return int(result['timeStamp'])
+
+
+def fetch_block_by_time(client, timestamp, closest='before'):
+    """
+    Ask the explorer for the block closest to a timestamp.
+
+    Args:
+        client (ExplorerClient): Explorer client
+        timestamp (int): Unix timestamp
+        closest (str): 'before' for the last block at or before the timestamp,
+                       'after' for the first block at or after it
+
+    Returns:
+        int: Block number, or None if the explorer does not support the lookup
+    """
+    params = {'module': 'block', 'action': 'getblocknobytime', 'timestamp': int(timestamp), 'closest': closest}
+    try:
+        data = client.get(params, use_cache=False)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"getblocknobytime request failed: {e}")
+        return None
+
+    result = data.get('result') if isinstance(data, dict) else None
+    if isinstance(result, dict):
+        result = result.get('blockNumber')
+    if data.get('status') != '1' or result in (None, ''):
+        logger.debug(f"getblocknobytime unavailable for {timestamp}: {data.get('message')}")
+        return None
+    try:
+        return int(result)
+    except (ValueError, TypeError):
+        return None
+
+
+class BlockTimeIndex:
+    """Persisted timestamp -> block lookups and block timestamp samples, per explorer."""
+
+    def __init__(self, index_file=None):
+        """
+        Initialize the index.
+
+        Args:
+            index_file (str): Optional JSON file used to persist the index between runs
+        """
+        self.index_file = index_file
+        self.hits = 0
+        self.misses = 0
+        self._explorers = {}
+        self._key_locks = {}  # (explorer, lookup) -> lock held by the thread resolving it
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        """Load the persisted index, if any."""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                stored = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error loading block index: {e}")
+            return
+
+        for base_url, entry in stored.items():
+            self._explorers[base_url] = {
+                'samples': {int(block): ts for block, ts in entry.get('samples', {}).items()},
+                'resolved': dict(entry.get('resolved', {}))
+            }
+
+    def _save(self):
+        """Write the index to disk. Caller must hold the lock."""
+        if not self.index_file:
+            return
+        try:
+            index_dir = os.path.dirname(self.index_file)
+            if index_dir:
+                os.makedirs(index_dir, exist_ok=True)
+            stored = {
+                base_url: {
+                    'samples': {str(block): ts for block, ts in sorted(entry['samples'].items())},
+                    'resolved': entry['resolved']
+                }
+                for base_url, entry in self._explorers.items()
+            }
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(stored, f)
+            os.replace(tmp_file, self.index_file)
+        except (IOError, OSError) as e:
+            logger.warning(f"Error saving block index: {e}")
+
+    def _explorer(self, base_url):
+        return self._explorers.setdefault(base_url, {'samples': {}, 'resolved': {}})
+
+    def resolve(self, client, timestamp, closest='before'):
+        """
+        Find the block for a timestamp.
+
+        Args:
+            client (ExplorerClient): Explorer client used for lookups
+            timestamp (int): Unix timestamp
+            closest (str): 'before' for the last block at or before the timestamp,
+                           'after' for the first block at or after it
+
+        Returns:
+            int: Block number
+
+        Raises:
+            requests.exceptions.RequestException: If the explorer cannot be reached
+            ValueError: If the explorer returns unusable block data
+        """
+        timestamp = int(timestamp)
+        key = f"{timestamp}:{closest}"
+
+        with self._lock:
+            explorer = self._explorer(client.base_url)
+            if key in explorer['resolved']:
+                self.hits += 1
+                return explorer['resolved'][key]
+            key_lock = self._key_locks.setdefault((client.base_url, key), threading.Lock())
+
+        # Only callers resolving the same timestamp wait for each other; the
+        # requests run outside the index lock so other lookups are not held up
+        with key_lock:
+            with self._lock:
+                if key in explorer['resolved']:
+                    return explorer['resolved'][key]
+                self.misses += 1
+
+            block = fetch_block_by_time(client, timestamp, closest)
+            if block is None:
+                block = self._search(client, explorer['samples'], timestamp, closest)
+            logger.debug(f"Resolved timestamp {timestamp} ({closest}) to block {block}")
+
+            # Lookups near the chain head may still move as new blocks arrive
+            if timestamp < time.time() - SETTLED_SECONDS:
+                with self._lock:
+                    explorer['resolved'][key] = block
+                    self._save()
+            return block
+
+    def _search(self, client, samples, timestamp, closest):
+        """
+        Binary search the block for a timestamp using block timestamps.
+
+        Finds the last block satisfying the predicate (timestamp <= target for
+        'before', timestamp < target for 'after'), starting from the tightest
+        bracket the recorded samples allow. Block timestamps are fetched
+        without holding the lock; only reading and recording samples takes it.
+
+        Args:
+            client (ExplorerClient): Explorer client
+            samples (dict): Block number -> timestamp samples, updated in place
+            timestamp (int): Target Unix timestamp
+            closest (str): 'before' or 'after'
+
+        Returns:
+            int: Block number
+        """
+        def matches(block_ts):
+            return block_ts <= timestamp if closest == 'before' else block_ts < timestamp
+
+        requests_made = 0
+
+        def sample(block):
+            nonlocal requests_made
+            with self._lock:
+                block_ts = samples.get(block)
+            if block_ts is None:
+                block_ts = fetch_block_timestamp(client, block)
+                requests_made += 1
+                with self._lock:
+                    samples[block] = block_ts
+            return block_ts
+
+        latest = fetch_latest_block(client)
+        sample(latest)
+
+        # Bracket: low satisfies the predicate (-1 if no block does), high does not
+        with self._lock:
+            blocks = sorted(block for block in samples if block <= latest)
+            timestamps = [samples[block] for block in blocks]
+        split = bisect.bisect_left([not matches(ts) for ts in timestamps], True)
+        low = blocks[split - 1] if split > 0 else -1
+        high = blocks[split] if split < len(blocks) else latest + 1
+
+        while high - low > 1:
+            middle = (low + high) // 2
+            if matches(sample(middle)):
+                low = middle
+            else:
+                high = middle
+
+        logger.debug(f"Binary search for timestamp {timestamp} took {requests_made} block lookups")
+        if closest == 'before':
+            return max(low, 0)
+        return low + 1
+
+
+# Shared index used by the exporter and the yield analyzer
+block_time_index = BlockTimeIndex(index_file=DEFAULT_BLOCK_INDEX_FILE)
+
+
+def resolve_block(client, timestamp, closest='before'):
+    """
+    Find the block for a timestamp using the shared index.
+
+    Args:
+        client (ExplorerClient): Explorer client used for lookups
+        timestamp (int): Unix timestamp
+        closest (str): 'before' or 'after'
+
+    Returns:
+        int: Block number
+    """
+    return block_time_index.resolve(client, timestamp, closest)
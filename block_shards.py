@@ -0,0 +1,153 @@
+"""
+Block Range Sharding
+
+Splits the block range of one address into shards that are fetched
+concurrently as tasks on the event loop, each with its own block-cursor
+pagination. When a worker runs out of work while another shard still has a
+long stretch of blocks ahead of it, the unfetched remainder of that shard is
+split in two so the idle worker can take half of it. Finished shards are
+released strictly in sort order, so the merged output is identical to a
+serial export. All methods must be called from the event loop thread.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIN_SHARD_BLOCKS = 1000  # Never split a remainder into pieces smaller than this
+
+
+class BlockShard:
+    """Contiguous, inclusive block range of one address fetched by a single worker."""
+
+    def __init__(self, start, end):
+        """
+        Initialize the shard.
+
+        Args:
+            start (int): First block of the range
+            end (int): Last block of the range
+        """
+        self.start = start
+        self.end = end
+        self.rows = []
+        self.pages = 0
+        self.status = 'pending'
+
+    def bounds(self):
+        """Current (start, end) of the range; it shrinks when the shard is split."""
+        return self.start, self.end
+
+    def __repr__(self):
+        return f"BlockShard({self.start}-{self.end}, {self.status})"
+
+
+class BlockShardSet:
+    """Adaptive set of shards covering a block range, released in sort order."""
+
+    def __init__(self, start, end, workers, descending=False, min_span=None):
+        """
+        Split a block range into one shard per worker.
+
+        Args:
+            start (int): First block of the range
+            end (int): Last block of the range
+            workers (int): Number of shards fetched at the same time
+            descending (bool): Whether shards are released newest first
+            min_span (int): Smallest number of blocks a split may produce
+        """
+        self.workers = workers
+        self.descending = descending
+        self.min_span = MIN_SHARD_BLOCKS if min_span is None else min_span
+        self.cancelled = False
+        self._changed = asyncio.Event()
+
+        span = end - start + 1
+        count = max(1, min(workers, span))
+        bounds = [start + span * i // count for i in range(count + 1)]
+        self.shards = [BlockShard(bounds[i], bounds[i + 1] - 1) for i in range(count)]
+        if descending:
+            self.shards.reverse()
+
+    def mark_running(self, shard):
+        """Record that a worker picked up a shard."""
+        shard.status = 'running'
+
+    def finish(self, shard, status):
+        """
+        Record that a shard finished.
+
+        Args:
+            shard (BlockShard): The shard
+            status (str): 'completed' or 'error'
+        """
+        shard.status = status
+        if status != 'completed':
+            self.cancelled = True
+        self._changed.set()
+
+    def cancel(self):
+        """Stop splitting and let running shards wind down."""
+        self.cancelled = True
+        self._changed.set()
+
+    def rebalance(self, shard, position):
+        """
+        Split off half of a shard's unfetched blocks if a worker is idle.
+
+        Args:
+            shard (BlockShard): Shard that just fetched a page
+            position (int): Last block the shard has fetched so far
+
+        Returns:
+            BlockShard: New shard to schedule, or None if no split was made
+        """
+        if self.cancelled:
+            return None
+        busy = sum(1 for item in self.shards if item.status in ('pending', 'running'))
+        if busy >= self.workers:
+            return None
+
+        if self.descending:
+            remaining = position - shard.start
+            if remaining < 2 * self.min_span:
+                return None
+            middle = shard.start + remaining // 2
+            new_shard = BlockShard(shard.start, middle)
+            shard.start = middle + 1
+        else:
+            remaining = shard.end - position
+            if remaining < 2 * self.min_span:
+                return None
+            middle = position + remaining // 2
+            new_shard = BlockShard(middle + 1, shard.end)
+            shard.end = middle
+
+        # The split-off blocks come right after the shard in release order
+        self.shards.insert(self.shards.index(shard) + 1, new_shard)
+        logger.debug(f"Split {shard} to rebalance onto an idle worker: {new_shard}")
+        return new_shard
+
+    async def completed_in_order(self):
+        """
+        Yield shards in sort order as soon as every shard before them is done.
+
+        Stops at the first shard that failed; that shard is yielded so the
+        caller can see its status.
+
+        Yields:
+            BlockShard: Next finished shard
+        """
+        released = 0
+        while True:
+            while released < len(self.shards) and self.shards[released].status in ('pending', 'running'):
+                self._changed.clear()
+                await self._changed.wait()
+            if released >= len(self.shards):
+                return
+            shard = self.shards[released]
+            released += 1
+            yield shard
+            if shard.status != 'completed':
+                return
@@ -8,6 +8,11 @@ import json
 import io
 import base64
 
+from explorer_client import ExplorerClient, parse_explorer_urls
+from token_metadata import get_token_metadata
+from block_index import resolve_block
+from job_registry import JobRegistry
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(levelname)s - %(message)s',
@@ -18,19 +23,31 @@ CLNY_CONTRACT = "0x23cfb27031FfB204a9161cf6D5994dA6df5c4ae7"
 BASE_URL = "https://zero-network.calderaexplorer.xyz/api"
 WINDOW_DAYS = 7  # Set the moving average window
 LIMIT = 1000  # Max per page (API default)
+DEFAULT_TOKEN_DECIMALS = 18  # Used when the explorer cannot resolve the token metadata
 DEFAULT_YIELD_DIR = "yield_data"
 
 # Ensure the yield data directory exists
 os.makedirs(DEFAULT_YIELD_DIR, exist_ok=True)
 
+# Status of the latest analysis, shared by all processes (see job_registry.py)
+yield_jobs = JobRegistry('yield')
+YIELD_STATUS_ID = 'latest'
+
 class ColonyYieldAnalyzer:
     """Class to analyze Colony coin yield rates."""
     
-    def __init__(self, base_url=BASE_URL, window_days=WINDOW_DAYS):
-        """Initialize the yield analyzer."""
-        self.base_url = base_url
+    def __init__(self, base_url=BASE_URL, window_days=WINDOW_DAYS, cache=None, store=None):
+        """
+        Initialize the yield analyzer. Pass a ResponseCache to reuse downloaded pages, a
+        TransactionStore to keep every fetched transfer, and a list (or comma-separated
+        string) of mirror URLs to balance requests across them.
+        """
+        self.client = ExplorerClient(parse_explorer_urls(base_url), cache=cache)
+        self.store = store
+        self.base_url = self.client.base_url
         self.window_days = window_days
         self.output_path = f"{DEFAULT_YIELD_DIR}/clny_daily_yield.csv"
+        self.token_decimals = DEFAULT_TOKEN_DECIMALS
         self.status = {
             'job_id': None,
             'status': 'idle',
@@ -41,17 +58,50 @@ class ColonyYieldAnalyzer:
             'output_file': None
         }
 
+    def resolve_token_decimals(self):
+        """Look up the CLNY token decimals through the shared token metadata cache."""
+        token_info = get_token_metadata(self.client, CLNY_CONTRACT)
+        if token_info and token_info.get('decimals') is not None:
+            self.token_decimals = token_info['decimals']
+        else:
+            logging.warning(f"Could not resolve CLNY token decimals, assuming {DEFAULT_TOKEN_DECIMALS}")
+            self.token_decimals = DEFAULT_TOKEN_DECIMALS
+        return self.token_decimals
+
+    def resolve_date_blocks(self, start_date=None, end_date=None):
+        """Resolve the analysis window to (start block, end block) through the shared block index."""
+        start_block = None
+        end_block = None
+        try:
+            if start_date:
+                start_timestamp = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
+                start_block = resolve_block(self.client, start_timestamp, closest='after')
+            if end_date:
+                # Up to (but excluding) midnight after the end date
+                end_timestamp = int(datetime.strptime(end_date, '%Y-%m-%d').timestamp()) + 86400 - 1
+                end_block = resolve_block(self.client, end_timestamp, closest='before')
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.warning(f"Could not resolve the date range to blocks, fetching by timestamp only: {e}")
+            return None, None
+        return start_block, end_block
+
     def fetch_all_transfers(self, start_date=None, end_date=None, job_id=None):
         """Fetch all token transfers for the CLNY token."""
+        self.resolve_token_decimals()
+        # Exact block bounds keep the explorer from returning history outside the window
+        start_block, end_block = self.resolve_date_blocks(start_date, end_date)
+        
         # The API requires module and action parameters - let's use a compatible endpoint
         url = f"{self.base_url}"
         offset = 0
         all_data = []
         page = 1
         has_more = True
+        reached_end = False  # Whether the last page of the transfer history was seen
         
         # Update status if job_id is provided
         if job_id:
+            self.client.reset_stats()
             self.status = {
                 'job_id': job_id,
                 'status': 'running',
@@ -59,7 +109,9 @@ class ColonyYieldAnalyzer:
                 'current_page': page,
                 'total_pages': None,
                 'error': None,
-                'output_file': None
+                'output_file': None,
+                'cache_hits': 0,
+                'cache_misses': 0
             }
             update_yield_analysis_status(self.status)
             
@@ -102,23 +154,22 @@ class ColonyYieldAnalyzer:
                         "sort": "desc"
                     }
                     try:
-                        test_url = f"{self.base_url}"
-                        test_response = requests.get(test_url, params=alt_params)
-                        if test_response.status_code == 200:
-                            test_data = test_response.json()
-                            if test_data.get("status") == "1":
-                                logging.info("API test query succeeded - API is operational")
-                            else:
-                                logging.warning(f"API test query failed: {test_data.get('message')}")
+                        # Goes through the shared client so it is paced like every other request
+                        test_data = self.client.get(alt_params, use_cache=False)
+                        if test_data.get("status") == "1":
+                            logging.info("API test query succeeded - API is operational")
                         else:
-                            logging.warning(f"API test query failed with status: {test_response.status_code}")
+                            logging.warning(f"API test query failed: {test_data.get('message')}")
                     except Exception as e:
                         logging.warning(f"API test query error: {str(e)}")
                         # Continue with original query regardless of test result
                 
-                # Add date filters if specified - these APIs usually use block numbers, not timestamps
-                # Since we don't have a direct timestamp to block number mapping, we'll fetch all and filter later
-                # For some APIs, we can use starttime and endtime parameters if they support it
+                # Add date filters if specified - these APIs use block numbers, which come from the
+                # block index; starttime/endtime are still sent for APIs that support them
+                if start_block is not None:
+                    params["startblock"] = start_block
+                if end_block is not None:
+                    params["endblock"] = end_block
                 if start_date:
                     try:
                         # Add a fallback using timestamp for APIs that support it
@@ -141,12 +192,11 @@ class ColonyYieldAnalyzer:
                 full_url = f"{url}?" + "&".join([f"{k}={v}" for k, v in params.items()])
                 logging.info(f"Making API request to: {full_url}")
                 
-                # Make API request
-                response = requests.get(url, params=params)
-                
-                # Check for successful response
-                if response.status_code != 200:
-                    error_msg = f"API error: {response.status_code} - {response.text}"
+                # Make API request (served from the response cache when enabled)
+                try:
+                    data = self.client.get(params)
+                except requests.exceptions.HTTPError as e:
+                    error_msg = f"API error: {e.response.status_code} - {e.response.text}"
                     logging.error(error_msg)
                     if job_id:
                         self.status['status'] = 'error'
@@ -155,16 +205,21 @@ class ColonyYieldAnalyzer:
                     return []
                 
                 # Log the response for debugging
-                logging.info(f"API response status: {response.status_code}")
                 try:
                     # Truncate the response text to not overflow logs
-                    response_snippet = response.text[:500] + '...' if len(response.text) > 500 else response.text
+                    response_text = json.dumps(data)
+                    response_snippet = response_text[:500] + '...' if len(response_text) > 500 else response_text
                     logging.info(f"API response: {response_snippet}")
                 except Exception as e:
                     logging.warning(f"Error logging API response: {str(e)}")
                 
+                # Record cache effectiveness for the status page
+                if job_id:
+                    client_stats = self.client.get_stats()
+                    self.status['cache_hits'] = client_stats['cache_hits']
+                    self.status['cache_misses'] = client_stats['cache_misses']
+                
                 # Process data - format differs for this API
-                data = response.json()
                 
                 # Check if the response is successful
                 if data.get("status") == "1":
@@ -173,8 +228,11 @@ class ColonyYieldAnalyzer:
                     # If no items returned, we've reached the end
                     if not items:
                         has_more = False
+                        reached_end = True
                     else:
                         all_data.extend(items)
+                        if self.store is not None:
+                            self.store.add_transactions(CLNY_CONTRACT, params["action"], items)
                         page += 1
                         
                         # Simple estimate - we don't know the total count
@@ -192,6 +250,12 @@ class ColonyYieldAnalyzer:
                         update_yield_analysis_status(self.status)
                     # For minor errors, continue with empty result rather than completely fail
                     has_more = False
+                    # Explorers answer a page past the end with status 0 and this message
+                    reached_end = str(data.get('message', '')).startswith('No transactions found')
+            
+            # Only a run without a date window stored the whole transfer history
+            if self.store is not None and reached_end:
+                self.store.record_listing(CLNY_CONTRACT, "tokentx", complete=not (start_date or end_date))
             
             # Update status if completed successfully
             if job_id:
@@ -223,7 +287,7 @@ class ColonyYieldAnalyzer:
             if "block_timestamp" in df.columns:
                 # Original format
                 df["timestamp"] = pd.to_datetime(df["block_timestamp"])
-                df["amount"] = pd.to_numeric(df["value"], errors='coerce') / 1e18  # Adjust for token decimals (18 decimals)
+                df["amount"] = pd.to_numeric(df["value"], errors='coerce') / (10 ** self.token_decimals)  # Adjust for token decimals
             else:
                 # API format - different field names
                 # Convert timestamp from Unix timestamp to datetime
@@ -245,7 +309,7 @@ class ColonyYieldAnalyzer:
                     value_col = numeric_cols[0] if len(numeric_cols) > 0 else None
                     
                 if value_col:
-                    df["amount"] = pd.to_numeric(df[value_col], errors='coerce') / 1e18  # Adjust for token decimals (18 decimals)
+                    df["amount"] = pd.to_numeric(df[value_col], errors='coerce') / (10 ** self.token_decimals)  # Adjust for token decimals
                 else:
                     # If no suitable value column found, create an empty one
                     df["amount"] = 1.0  # Default to 1.0 for counting transactions
@@ -395,14 +459,12 @@ class ColonyYieldAnalyzer:
 
 def get_yield_analysis_status():
     """Get the current yield analysis status."""
-    status_file = f"{DEFAULT_YIELD_DIR}/yield_status.json"
-    
-    if os.path.exists(status_file):
-        try:
-            with open(status_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            pass
+    try:
+        status = yield_jobs.get(YIELD_STATUS_ID)
+        if status is not None:
+            return status
+    except Exception as e:
+        logging.error(f"Error reading yield analysis status: {str(e)}")
             
     return {
         'job_id': None,
@@ -416,11 +478,8 @@ def get_yield_analysis_status():
 
 def update_yield_analysis_status(status):
     """Update the yield analysis status."""
-    status_file = f"{DEFAULT_YIELD_DIR}/yield_status.json"
-    
     try:
-        with open(status_file, 'w') as f:
-            json.dump(status, f)
+        yield_jobs.put(YIELD_STATUS_ID, status)
     except Exception as e:
         logging.error(f"Error updating yield analysis status: {str(e)}")
 
@@ -0,0 +1,177 @@
+"""
+Explorer Endpoint Pool
+
+Spreads explorer API calls across several mirrors of the same explorer. Each
+request goes to the healthy mirror with the lowest expected wait: the mirror's
+smoothed response latency times the number of requests it already has in
+flight. Every mirror keeps its own request scheduler, so adding a mirror adds
+its rate limit to the total throughput.
+
+A circuit breaker per mirror takes it out of rotation after consecutive
+failures (5xx responses, timeouts, connection errors). Once its cooldown has
+passed, a single probe request is let through; if it succeeds the mirror is
+back in rotation, otherwise the cooldown doubles. Throttling (429) is handled
+by the mirror's scheduler and does not count as a failure.
+"""
+
+import logging
+import threading
+import time
+
+from request_scheduler import get_request_scheduler
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 3  # Consecutive failures that open the circuit
+OPEN_SECONDS = 30.0  # First cooldown before a failed mirror is probed again
+MAX_OPEN_SECONDS = 600.0  # Longest cooldown after repeated failed probes
+LATENCY_SMOOTHING = 0.2  # Weight of the newest sample in the latency average
+
+
+class Endpoint:
+    """One explorer mirror with its scheduler, latency estimate and circuit breaker state."""
+
+    def __init__(self, url):
+        """
+        Initialize the endpoint.
+
+        Args:
+            url (str): Explorer API base URL of the mirror
+        """
+        self.url = url
+        self.scheduler = get_request_scheduler(url)
+        self.state = 'closed'
+        self.latency = None
+        self.active = 0
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+        self.probing = False
+        self.requests = 0
+        self.errors = 0
+
+    def load(self):
+        """Expected wait of a new request: smoothed latency times the requests ahead of it."""
+        return ((self.latency or 0.0) + 0.001) * (self.active + 1)
+
+    def __repr__(self):
+        return f"Endpoint({self.url}, {self.state})"
+
+
+class EndpointPool:
+    """Latency-balanced pool of explorer mirrors with a circuit breaker per mirror."""
+
+    def __init__(self, urls):
+        """
+        Initialize the pool.
+
+        Args:
+            urls (list): Explorer API base URLs; the first one is the primary
+        """
+        urls = [urls] if isinstance(urls, str) else list(dict.fromkeys(urls))
+        if not urls:
+            raise ValueError("At least one explorer URL is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """The first endpoint; its URL identifies the pool in caches and checkpoints."""
+        return self.endpoints[0]
+
+    def _available(self, endpoint, now):
+        """Whether an endpoint may take a request. Caller must hold the lock."""
+        if endpoint.state == 'open' and now >= endpoint.retry_at:
+            endpoint.state = 'half_open'
+        if endpoint.state == 'half_open':
+            return not endpoint.probing
+        return endpoint.state == 'closed'
+
+    def acquire(self, avoid=()):
+        """
+        Pick the endpoint for the next request and count it as in flight.
+
+        Args:
+            avoid (set): Endpoints to skip if any other one is available, e.g. the
+                         ones a failed request already tried or the one being hedged
+
+        Returns:
+            Endpoint: Selected endpoint; pass it to release() when the request is done
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints if self._available(endpoint, now)]
+            preferred = [endpoint for endpoint in candidates if endpoint not in avoid]
+            candidates = preferred or candidates
+            if not candidates:
+                # Every mirror is out of rotation; try the one that recovers first rather than fail outright
+                candidates = [min(self.endpoints, key=lambda endpoint: endpoint.retry_at)]
+
+            endpoint = min(candidates, key=Endpoint.load)
+            if endpoint.state == 'half_open':
+                endpoint.probing = True
+            endpoint.active += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint):
+        """Mark a request on an endpoint as finished."""
+        with self._lock:
+            endpoint.active -= 1
+            endpoint.probing = False
+
+    def has_alternative(self, tried):
+        """Whether a healthy endpoint outside the given set could take a request."""
+        with self._lock:
+            now = time.monotonic()
+            return any(endpoint not in tried and self._available(endpoint, now) for endpoint in self.endpoints)
+
+    def record_latency(self, endpoint, seconds):
+        """Fold a response time into the endpoint's smoothed latency."""
+        with self._lock:
+            if endpoint.latency is None:
+                endpoint.latency = seconds
+            else:
+                endpoint.latency += LATENCY_SMOOTHING * (seconds - endpoint.latency)
+
+    def record_success(self, endpoint):
+        """Reset the failure count and close the circuit after a successful probe."""
+        with self._lock:
+            endpoint.failures = 0
+            if endpoint.state != 'closed':
+                logger.info(f"Explorer {endpoint.url} recovered, back in rotation")
+                endpoint.state = 'closed'
+                endpoint.trips = 0
+
+    def record_failure(self, endpoint):
+        """Count a failed request and open the circuit once the endpoint keeps failing."""
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.errors += 1
+            if endpoint.state == 'half_open' or (endpoint.state == 'closed'
+                                                 and endpoint.failures >= FAILURE_THRESHOLD):
+                cooldown = min(MAX_OPEN_SECONDS, OPEN_SECONDS * (2 ** endpoint.trips))
+                endpoint.trips += 1
+                endpoint.state = 'open'
+                endpoint.retry_at = time.monotonic() + cooldown
+                if len(self.endpoints) > 1:
+                    logger.warning(f"Explorer {endpoint.url} is failing, out of rotation for {cooldown:.0f}s")
+
+    def status(self):
+        """
+        Get the health of every endpoint.
+
+        Returns:
+            list: One dict per endpoint with url, state, latency_ms, requests and errors
+        """
+        with self._lock:
+            return [
+                {
+                    'url': endpoint.url,
+                    'state': endpoint.state,
+                    'latency_ms': round(endpoint.latency * 1000) if endpoint.latency is not None else None,
+                    'requests': endpoint.requests,
+                    'errors': endpoint.errors
+                }
+                for endpoint in self.endpoints
+            ]
@@ -0,0 +1,524 @@
+"""
+Explorer API Client
+
+Shared HTTP layer used by the exporter and the Colony yield analyzer for every
+explorer API call. It owns the pooled requests.Session, serves responses from
+the optional persistent response cache and sends everything else through the
+explorer's shared request scheduler (rate limit, AIMD concurrency, retries).
+A client can be given several mirrors of the same explorer; requests are then
+balanced across them and failed attempts fail over to another mirror.
+Every request has connect/read timeouts, and slow requests can optionally be
+hedged with a duplicate once they run past the explorer's p95 latency.
+
+AsyncExplorerClient sends the same requests from an asyncio event loop over a
+pooled aiohttp session, so thousands of pages can be in flight without a
+thread each. It shares the mirrors, cache, limits and counters of the
+ExplorerClient it wraps and raises the same requests exceptions.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import aiohttp
+import requests
+
+from endpoint_pool import EndpointPool
+from request_scheduler import RETRY_STATUSES, is_rate_limit_response, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 5.0  # Seconds to establish a connection
+DEFAULT_READ_TIMEOUT = 30.0  # Seconds to wait for response data
+HEDGE_PERCENTILE = 0.95  # Send a duplicate once a request is slower than this percentile
+DEFAULT_ASYNC_CONNECTIONS = 100  # Open connections of an async client across all mirrors
+
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def get_hedge_executor():
+    """Thread pool running hedged request pairs, shared by all clients."""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix='hedge')
+        return _hedge_executor
+
+
+def parse_explorer_urls(value):
+    """
+    Split an explorer URL setting into its mirror URLs.
+
+    Args:
+        value (str or list): One URL, a comma-separated list of URLs, or a list of URLs
+
+    Returns:
+        list: Mirror URLs in the given order
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    return [url.strip() for url in value if url and url.strip()]
+
+
+class ExplorerClient:
+    """Issue explorer API requests over a shared session with optional response caching."""
+
+    def __init__(self, base_url, session=None, cache=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT), hedge=False):
+        """
+        Initialize the client.
+
+        Args:
+            base_url (str or list): Explorer API base URL, or several mirror URLs of the
+                                    same explorer (the first one is the primary)
+            session (requests.Session): Session to reuse; a new one is created if omitted
+            cache (ResponseCache): Optional persistent response cache
+            timeout (tuple): (connect, read) timeouts in seconds
+            hedge (bool): Send a duplicate of requests that run past the p95 latency
+                          and use whichever response arrives first
+        """
+        self.pool = EndpointPool(base_url)
+        # Mirrors serve the same chain, so caches and indexes are keyed by the primary URL
+        self.base_url = self.pool.primary.url
+        self.base_urls = [endpoint.url for endpoint in self.pool.endpoints]
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.timeout = timeout
+        self.hedge = hedge
+        self._stats_lock = threading.Lock()
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the request and cache counters, e.g. at the start of a new job."""
+        with self._stats_lock:
+            self.stats = {'requests': 0, 'cache_hits': 0, 'cache_misses': 0, 'retries': 0, 'throttled': 0,
+                          'hedged': 0, 'failovers': 0}
+
+    def get_stats(self):
+        """Get a copy of the request and cache counters, with the health of every mirror."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['endpoints'] = self.pool.status()
+        return stats
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get(self, params, use_cache=True):
+        """
+        Perform a GET request against the explorer API.
+
+        Args:
+            params (dict): Query parameters
+            use_cache (bool): Whether the response may be served from / stored in the cache
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries
+        """
+        use_cache = use_cache and self.cache is not None
+
+        if use_cache:
+            cached = self._cached(params)
+            if cached is not None:
+                return cached
+
+        data = self._request(params)
+        if use_cache:
+            self._store(params, data)
+        return data
+
+    def _cached(self, params):
+        """Look a request up in the response cache, counting the hit or miss."""
+        cached = self.cache.get(self.base_url, params)
+        self._count('cache_hits' if cached is not None else 'cache_misses')
+        return cached
+
+    def _store(self, params, data):
+        """Cache a response. Explorer errors come back as HTTP 200 with status '0'; only real results are kept."""
+        if isinstance(data, dict) and data.get('status') == '1':
+            self.cache.put(self.base_url, params, data)
+
+    def _get(self, endpoint, params):
+        """Send one GET request to an endpoint and record its response time."""
+        started = time.monotonic()
+        response = self.session.get(endpoint.url, params=params, timeout=self.timeout)
+        elapsed = time.monotonic() - started
+        endpoint.scheduler.record_latency(elapsed)
+        self.pool.record_latency(endpoint, elapsed)
+        return response
+
+    def _send(self, endpoint, params):
+        """
+        Send one GET request, hedging it when it runs past the observed p95 latency.
+
+        The hedged duplicate goes to another healthy mirror when there is one.
+
+        Args:
+            endpoint (Endpoint): Endpoint selected for the request
+            params (dict): Query parameters
+
+        Returns:
+            tuple: (requests.Response, Endpoint) of the first response that arrived
+
+        Raises:
+            requests.exceptions.RequestException: If every copy of the request failed
+        """
+        hedge_after = endpoint.scheduler.latency_percentile(HEDGE_PERCENTILE) if self.hedge else None
+
+        if hedge_after is None:
+            return self._get(endpoint, params), endpoint
+
+        executor = get_hedge_executor()
+        pending = {executor.submit(self._get, endpoint, params): endpoint}
+        done, _ = wait(pending, timeout=hedge_after)
+        if not done:
+            hedge_endpoint = self.pool.acquire(avoid={endpoint})
+            # The duplicate still needs a rate token, but shares the original's concurrency slot
+            hedge_endpoint.scheduler.bucket.acquire()
+            self._count('hedged')
+            logger.debug(f"Request slower than p95 ({hedge_after:.2f}s), sending a hedged duplicate "
+                         f"to {hedge_endpoint.url}")
+            future = executor.submit(self._get, hedge_endpoint, params)
+            future.add_done_callback(lambda _: self.pool.release(hedge_endpoint))
+            pending[future] = hedge_endpoint
+
+        error = None
+        remaining = set(pending)
+        while remaining:
+            done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = error or e
+                    continue
+                return response, pending[future]
+        raise error
+
+    def _request(self, params):
+        """
+        Send a GET request, pacing it and retrying throttled or failed attempts.
+
+        Args:
+            params (dict): Query parameters
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt fails
+        """
+        attempt = 0
+        tried = set()
+
+        while True:
+            retry_after = None
+            endpoint = self.pool.acquire(avoid=tried)
+            responder = endpoint
+            try:
+                with endpoint.scheduler.slot():
+                    self._count('requests')
+                    try:
+                        response, responder = self._send(endpoint, params)
+                        if response.status_code in RETRY_STATUSES:
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        response.raise_for_status()  # Raise an exception for HTTP errors
+                        data = response.json()
+                        if is_rate_limit_response(data):
+                            # Some explorers report rate limiting as an HTTP 200 error body
+                            raise requests.exceptions.HTTPError(f"Rate limited: {data.get('result')}",
+                                                                response=response)
+                    except requests.exceptions.HTTPError as e:
+                        status = e.response.status_code if e.response is not None else None
+                        throttled = status == 429 or 'Rate limited' in str(e)
+                        if status not in RETRY_STATUSES and not throttled:
+                            raise
+                        error = e
+                    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                            requests.exceptions.ChunkedEncodingError) as e:
+                        throttled = False
+                        error = e
+                    else:
+                        responder.scheduler.on_success()
+                        self.pool.record_success(responder)
+                        return data
+            finally:
+                self.pool.release(endpoint)
+
+            time.sleep(self._retry_delay(responder, error, throttled, retry_after, attempt, tried))
+            attempt += 1
+
+    def _retry_delay(self, responder, error, throttled, retry_after, attempt, tried):
+        """
+        Record a failed attempt and decide how long to wait before the next one.
+
+        Args:
+            responder (Endpoint): Endpoint whose response (or lack of one) failed
+            error (Exception): Error of the attempt
+            throttled (bool): Whether the explorer throttled the request
+            retry_after (float): Delay requested by the explorer, if any
+            attempt (int): Number of the attempt that failed (0 for the first)
+            tried (set): Endpoints the request has failed on so far, updated in place
+
+        Returns:
+            float: Seconds to wait before retrying
+
+        Raises:
+            requests.exceptions.RequestException: The error, once retries are exhausted
+        """
+        policy = responder.scheduler.retry_policy
+        if throttled:
+            # A throttling mirror is healthy, its scheduler just slows down
+            self._count('throttled')
+            responder.scheduler.on_throttle(retry_after)
+        else:
+            self.pool.record_failure(responder)
+
+        if attempt >= policy.max_retries:
+            logger.error(f"Giving up on explorer request after {attempt + 1} attempts: {error}")
+            raise error
+
+        tried.add(responder)
+        if self.pool.has_alternative(tried):
+            # A mirror this request has not tried yet can take the retry right away
+            delay = 0.0
+            self._count('failovers')
+        else:
+            delay = policy.backoff(attempt, retry_after)
+        logger.warning(f"Explorer request to {responder.url} failed ({error}), retrying in {delay:.1f}s "
+                       f"(attempt {attempt + 2}/{policy.max_retries + 1})")
+        self._count('retries')
+        return delay
+
+
+def _query(params):
+    """Query parameters as aiohttp expects them: strings only, None values dropped like requests does."""
+    return {key: str(value) for key, value in params.items() if value is not None}
+
+
+class AsyncExplorerClient:
+    """asyncio counterpart of ExplorerClient, sharing its mirrors, cache, limits and counters."""
+
+    def __init__(self, client, connections=DEFAULT_ASYNC_CONNECTIONS):
+        """
+        Initialize the client.
+
+        The aiohttp session is opened lazily on the running event loop and
+        closed when the last ``async with`` block using the client exits.
+
+        Args:
+            client (ExplorerClient): Synchronous client whose configuration is shared
+            connections (int): Maximum number of open connections across all mirrors
+        """
+        self.client = client
+        self.base_url = client.base_url
+        self.pool = client.pool
+        self.connections = connections
+        self._session = None
+        self._session_loop = None  # Event loop the session was opened on
+        self._users = 0
+
+    async def __aenter__(self):
+        self._users += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._users -= 1
+        if self._users == 0:
+            await self.close()
+
+    async def close(self):
+        """Close the pooled session and its connections."""
+        if self._session is not None:
+            session, self._session = self._session, None
+            self._session_loop = None
+            await session.close()
+
+    def _get_session(self):
+        """Pooled session bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connect_timeout, read_timeout = self.client.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+            self._session_loop = loop
+        return self._session
+
+    def get_stats(self):
+        """Get the request counters shared with the synchronous client."""
+        return self.client.get_stats()
+
+    async def get(self, params, use_cache=True):
+        """
+        Perform a GET request against the explorer API without blocking the event loop.
+
+        Args:
+            params (dict): Query parameters
+            use_cache (bool): Whether the response may be served from / stored in the cache
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the request still fails after all retries
+        """
+        client = self.client
+        use_cache = use_cache and client.cache is not None
+
+        if use_cache:
+            # The response cache reads and writes files, so it runs in a worker thread
+            cached = await asyncio.to_thread(client._cached, params)
+            if cached is not None:
+                return cached
+
+        data = await self._request(params)
+        if use_cache:
+            await asyncio.to_thread(client._store, params, data)
+        return data
+
+    async def _get(self, endpoint, params):
+        """
+        Send one GET request to an endpoint and record its response time.
+
+        Returns:
+            tuple: (HTTP status, Retry-After header, decoded JSON body or None for HTTP errors)
+
+        Raises:
+            requests.exceptions.InvalidJSONError: If a successful response is not JSON, e.g. a
+                                                  proxy's HTML error page
+        """
+        started = time.monotonic()
+        async with self._get_session().get(endpoint.url, params=_query(params)) as response:
+            try:
+                data = await response.json(content_type=None) if response.status < 400 else None
+            except ValueError as e:
+                raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {endpoint.url}: {e}")
+            retry_after = response.headers.get('Retry-After')
+        elapsed = time.monotonic() - started
+        endpoint.scheduler.record_latency(elapsed)
+        self.pool.record_latency(endpoint, elapsed)
+        return response.status, retry_after, data
+
+    async def _send(self, endpoint, params):
+        """
+        Send one GET request, hedging it on another mirror when it runs past the observed p95 latency.
+
+        The losing copy of a hedged request is cancelled.
+
+        Args:
+            endpoint (Endpoint): Endpoint selected for the request
+            params (dict): Query parameters
+
+        Returns:
+            tuple: (HTTP status, Retry-After header, JSON body, Endpoint that answered)
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError, requests.exceptions.InvalidJSONError: If every
+                copy of the request failed
+        """
+        hedge_after = endpoint.scheduler.latency_percentile(HEDGE_PERCENTILE) if self.client.hedge else None
+        if hedge_after is None:
+            return (*await self._get(endpoint, params), endpoint)
+
+        first = asyncio.ensure_future(self._get(endpoint, params))
+        tasks = {first: endpoint}
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if not done:
+            hedge_endpoint = self.pool.acquire(avoid={endpoint})
+            try:
+                # The duplicate still needs a rate token, but shares the original's concurrency slot
+                await hedge_endpoint.scheduler.bucket.acquire_async()
+            except BaseException:
+                self.pool.release(hedge_endpoint)
+                first.cancel()
+                raise
+            self.client._count('hedged')
+            logger.debug(f"Request slower than p95 ({hedge_after:.2f}s), sending a hedged duplicate "
+                         f"to {hedge_endpoint.url}")
+            second = asyncio.ensure_future(self._get(hedge_endpoint, params))
+            second.add_done_callback(lambda _: self.pool.release(hedge_endpoint))
+            tasks[second] = hedge_endpoint
+
+        error = None
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = task.result()
+                    except (aiohttp.ClientError, asyncio.TimeoutError, requests.exceptions.InvalidJSONError) as e:
+                        error = error or e
+                        continue
+                    return (*result, tasks[task])
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, params):
+        """
+        Send a GET request, pacing it and retrying throttled or failed attempts.
+
+        Args:
+            params (dict): Query parameters
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt fails
+        """
+        client = self.client
+        attempt = 0
+        tried = set()
+
+        while True:
+            retry_after = None
+            endpoint = self.pool.acquire(avoid=tried)
+            responder = endpoint
+            try:
+                async with endpoint.scheduler.slot_async():
+                    client._count('requests')
+                    try:
+                        status, retry_header, data, responder = await self._send(endpoint, params)
+                    except asyncio.TimeoutError as e:
+                        throttled = False
+                        error = requests.exceptions.Timeout(f"Request to {responder.url} timed out: {e}")
+                    except aiohttp.ClientError as e:
+                        throttled = False
+                        error = requests.exceptions.ConnectionError(str(e))
+                    except requests.exceptions.InvalidJSONError as e:
+                        # Retried like a failed connection, so the request moves to another mirror
+                        throttled = False
+                        error = e
+                    else:
+                        if status in RETRY_STATUSES:
+                            retry_after = parse_retry_after(retry_header)
+                            throttled = status == 429
+                            error = requests.exceptions.HTTPError(f"{status} Error for url: {responder.url}")
+                        elif status >= 400:
+                            raise requests.exceptions.HTTPError(f"{status} Error for url: {responder.url}")
+                        elif is_rate_limit_response(data):
+                            # Some explorers report rate limiting as an HTTP 200 error body
+                            throttled = True
+                            error = requests.exceptions.HTTPError(f"Rate limited: {data.get('result')}")
+                        else:
+                            responder.scheduler.on_success()
+                            self.pool.record_success(responder)
+                            return data
+            finally:
+                self.pool.release(endpoint)
+
+            await asyncio.sleep(client._retry_delay(responder, error, throttled, retry_after, attempt, tried))
+            attempt += 1
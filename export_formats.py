@@ -0,0 +1,441 @@
+"""
+Export File Formats
+
+Besides CSV, exports can be written as Parquet or Feather (Arrow IPC) files
+with typed columns: integer block numbers and counters, exact decimal token
+values, timestamps, and dictionary-encoded addresses and token names. Rows are
+buffered into row groups of ROW_GROUP_SIZE rows and each group is written as
+soon as it is full, so memory use stays bounded however large the export is.
+
+CSV exports can be compressed on the fly with gzip or zstd (`.csv.gz`,
+`.csv.zst`): rows pass through a streaming compressor, so the uncompressed file
+never exists on disk. Parquet and Feather files use the same codecs internally
+and keep their extension.
+
+The module also reads export files of every format for the web interface:
+a preview of the first rows and the row count, which Parquet and Feather
+files answer from their metadata without parsing the whole file. Compressed
+CSV files are decompressed while they are read.
+"""
+
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import zstandard
+
+from transaction_columns import TIMESTAMP_FORMAT
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'parquet', 'feather')
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+ROW_GROUP_SIZE = 65536
+
+COMPRESSIONS = ('gzip', 'zstd')
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+# (lowest, highest, default) level of every codec
+COMPRESSION_LEVELS = {'gzip': (1, 9, 6), 'zstd': (1, 22, 3)}
+EXPORT_EXTENSIONS = ('.csv', '.csv.gz', '.csv.zst', '.parquet', '.feather')
+
+INTEGER_FIELDS = {
+    'blockNumber', 'nonce', 'transactionIndex', 'gas', 'gasPrice', 'gasUsed', 'cumulativeGasUsed',
+    'confirmations', 'logIndex', 'tokenDecimal'
+}
+DICTIONARY_FIELDS = {'from', 'to', 'contractAddress', 'tokenName', 'tokenSymbol'}
+# Room for 38 integer and 38 fractional digits, enough for any token amount scaled by its decimals
+VALUE_TYPE = pa.decimal256(76, 38)
+
+
+def compression_for(path):
+    """
+    Get the compression of a CSV export file from its extension.
+
+    Args:
+        path (str): Export file path
+
+    Returns:
+        str: 'gzip' or 'zstd', or None for an uncompressed file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for compression, compression_extension in COMPRESSION_EXTENSIONS.items():
+        if extension == compression_extension:
+            return compression
+    return None
+
+
+def export_format_for(path):
+    """
+    Get the export format of a file from its extension.
+
+    Args:
+        path (str): Export file path; a compression extension (.csv.gz) is skipped
+
+    Returns:
+        str: 'csv', 'parquet' or 'feather', or None for an unknown extension
+    """
+    if compression_for(path):
+        path = os.path.splitext(path)[0]
+    extension = os.path.splitext(path)[1].lower()
+    for export_format, format_extension in FORMAT_EXTENSIONS.items():
+        if extension == format_extension:
+            return export_format
+    return None
+
+
+def export_extension(export_format='csv', compression=None):
+    """
+    Get the file extension of an export.
+
+    Args:
+        export_format (str): 'csv', 'parquet' or 'feather'
+        compression (str): 'gzip', 'zstd' or None; only CSV files get a compression extension
+
+    Returns:
+        str: File extension, e.g. '.csv.gz'
+    """
+    if export_format == 'csv' and compression:
+        return FORMAT_EXTENSIONS['csv'] + COMPRESSION_EXTENSIONS[compression]
+    return FORMAT_EXTENSIONS[export_format]
+
+
+def with_export_extension(path, export_format='csv', compression=None):
+    """
+    Give an export file path the extension of the format it is written in.
+
+    A known export extension is replaced (out.csv -> out.parquet); any other
+    name gets the extension appended.
+
+    Args:
+        path (str): Export file path
+        export_format (str): 'csv', 'parquet' or 'feather'
+        compression (str): 'gzip', 'zstd' or None
+
+    Returns:
+        str: The path, ending in export_extension(export_format, compression)
+    """
+    extension = export_extension(export_format, compression)
+    if path.lower().endswith(extension):
+        return path
+    for known_extension in sorted(EXPORT_EXTENSIONS, key=len, reverse=True):
+        if path.lower().endswith(known_extension):
+            return path[:-len(known_extension)] + extension
+    return path + extension
+
+
+def check_compression(export_format, compression, level=None):
+    """
+    Validate a compression setting and fill in the codec's default level.
+
+    Args:
+        export_format (str): 'csv', 'parquet' or 'feather'
+        compression (str): 'gzip', 'zstd' or None
+        level (int): Requested level, or None for the codec's default
+
+    Returns:
+        int: Compression level, or None without compression
+
+    Raises:
+        ValueError: For an unknown codec, a level out of range, or gzip with Feather
+    """
+    if not compression:
+        return None
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'; choose one of {', '.join(COMPRESSIONS)}")
+    if export_format == 'feather' and compression != 'zstd':
+        raise ValueError("Feather files only support zstd compression")
+    lowest, highest, default = COMPRESSION_LEVELS[compression]
+    if level is None:
+        return default
+    if not lowest <= int(level) <= highest:
+        raise ValueError(f"{compression} compression level must be between {lowest} and {highest}")
+    return int(level)
+
+
+def open_export(path, mode='r', compression=None, level=None):
+    """
+    Open a CSV export file as text, compressing or decompressing it on the fly.
+
+    Args:
+        path (str): File path
+        mode (str): 'r', 'w' or 'a'
+        compression (str): 'gzip' or 'zstd'; when reading, defaults to the file's extension
+        level (int): Compression level when writing, or None for the codec's default
+
+    Returns:
+        file object: Text stream for the csv module (newline='', UTF-8)
+    """
+    if compression is None and mode == 'r':
+        compression = compression_for(path)
+    if not compression:
+        return open(path, mode=mode, newline='', encoding='utf-8')
+    level = check_compression('csv', compression, level)
+    if compression == 'gzip':
+        return gzip.open(path, mode=f"{mode}t", compresslevel=level, newline='', encoding='utf-8')
+    # A frame checksum lets readers tell a truncated or corrupted file from a complete one
+    return zstandard.open(path, mode=f"{mode}t", cctx=zstandard.ZstdCompressor(level=level, write_checksum=True),
+                          newline='', encoding='utf-8')
+
+
+def column_type(field):
+    """Arrow type of an export field in Parquet and Feather files."""
+    if field == 'timeStamp':
+        return pa.timestamp('s')
+    if field == 'value':
+        return VALUE_TYPE
+    if field in INTEGER_FIELDS:
+        return pa.int64()
+    if field in DICTIONARY_FIELDS:
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def _cast_values(values, field_type, header):
+    """Cast string values one by one, turning the ones that do not fit the column into nulls."""
+    cast = []
+    for value in values:
+        try:
+            cast.append(pc.cast(pa.array([value], pa.string()), field_type)[0].as_py())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            cast.append(None)
+    invalid = sum(1 for value, result in zip(values, cast) if value is not None and result is None)
+    logger.warning(f"{invalid} values of column {header} are not valid {field_type} and were left empty")
+    return pa.array(cast, field_type)
+
+
+class ColumnarExportWriter:
+    """
+    Write export rows to a Parquet or Feather file one row group at a time and publish it atomically.
+
+    Offers the same interface as StreamingCSVWriter, so an export can switch
+    formats without changing how rows reach the file. The file is written under
+    a temporary name and only renamed into place by commit().
+    """
+
+    def __init__(self, output_file, fields, headers, export_format='parquet', row_group_size=ROW_GROUP_SIZE,
+                 compression=None, compression_level=None):
+        """
+        Initialize the writer.
+
+        Args:
+            output_file (str): Final path of the export file
+            fields (list): Transaction fields of the columns, used to pick the column types
+            headers (list): Column names
+            export_format (str): 'parquet' or 'feather'
+            row_group_size (int): Rows buffered before a row group is written
+            compression (str): Codec of the column data ('gzip' or 'zstd'); defaults to
+                               snappy for Parquet and lz4 for Feather
+            compression_level (int): Codec level, or None for the codec's default
+        """
+        if export_format not in ('parquet', 'feather'):
+            raise ValueError(f"Unsupported columnar export format: {export_format}")
+        self.compression_level = check_compression(export_format, compression, compression_level)
+        self.compression = compression
+        self.output_file = output_file
+        self.temp_file = f"{output_file}.tmp"
+        self.fields = fields
+        self.headers = headers
+        self.export_format = export_format
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([pa.field(header, column_type(field)) for field, header in zip(fields, headers)])
+        self.rows_written = 0
+        self._pending = []
+        self._dictionaries = {}  # Column index -> value -> dictionary index, for Feather batches
+        self._sink = None
+        self._writer = None
+
+    def open(self):
+        """Open the temporary file for writing."""
+        os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+        if self.export_format == 'parquet':
+            self._writer = pq.ParquetWriter(self.temp_file, self.schema, compression=self.compression or 'snappy',
+                                            compression_level=self.compression_level)
+        else:
+            self._sink = pa.OSFile(self.temp_file, 'wb')
+            codec = pa.Codec('zstd', self.compression_level) if self.compression else 'lz4'
+            # Dictionaries only grow between batches, so later batches carry just the new entries
+            options = pa.ipc.IpcWriteOptions(compression=codec, emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+        return self
+
+    @property
+    def bytes_written(self):
+        """Size of the temporary file including every row group written so far."""
+        return os.path.getsize(self.temp_file) if os.path.exists(self.temp_file) else 0
+
+    def write_rows(self, rows):
+        """
+        Add a page of rows, writing a row group whenever enough rows are buffered.
+
+        Args:
+            rows (list): Rows with values in the order of the columns
+        """
+        self._pending.extend(rows)
+        self.rows_written += len(rows)
+        while len(self._pending) >= self.row_group_size:
+            group, self._pending = self._pending[:self.row_group_size], self._pending[self.row_group_size:]
+            self._write_group(group)
+
+    def append_part(self, part, row_filter=None):
+        """
+        Append the rows of a (headerless) CSV part file and delete it.
+
+        Args:
+            part (StreamingCSVWriter): Closed writer whose rows should be appended
+            row_filter (callable): Optional function selecting (and rewriting) which rows of a chunk to append
+        """
+        if os.path.exists(part.temp_file):
+            with open(part.temp_file, mode='r', newline='', encoding='utf-8') as part_file:
+                reader = csv.reader(part_file)
+                while True:
+                    rows = [row for _, row in zip(range(self.row_group_size), reader)]
+                    if not rows:
+                        break
+                    self.write_rows(row_filter(rows) if row_filter else rows)
+            os.remove(part.temp_file)
+
+    def _column(self, index, values):
+        """Convert one column of a row group to its Arrow type."""
+        field_type = self.schema.field(index).type
+        values = [None if value == '' or value is None else str(value) for value in values]
+
+        if pa.types.is_dictionary(field_type) and self.export_format == 'parquet':
+            # Every row group stores its own dictionary, so it only holds the values of the group
+            return pc.dictionary_encode(pa.array(values, pa.string())).cast(field_type)
+        if pa.types.is_dictionary(field_type):
+            # Feather batches share one growing dictionary; each batch carries only the new entries
+            lookup = self._dictionaries.setdefault(index, {})
+            indices = [None if value is None else lookup.setdefault(value, len(lookup)) for value in values]
+            return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(list(lookup), pa.string()))
+
+        strings = pa.array(values, pa.string())
+        if pa.types.is_timestamp(field_type):
+            return pc.strptime(strings, format=TIMESTAMP_FORMAT, unit='s', error_is_null=True)
+        if pa.types.is_string(field_type):
+            return strings
+        try:
+            return pc.cast(strings, field_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return _cast_values(values, field_type, self.schema.field(index).name)
+
+    def _write_group(self, rows):
+        """Write buffered rows as one row group (Parquet) or record batch (Feather)."""
+        columns = list(zip(*rows))
+        batch = pa.record_batch([self._column(index, values) for index, values in enumerate(columns)],
+                                schema=self.schema)
+        if self.export_format == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        """Write the remaining rows and the file footer without publishing the file."""
+        if self._writer is None:
+            return
+        try:
+            if self._pending:
+                self._write_group(self._pending)
+                self._pending = []
+            self._writer.close()
+        finally:
+            if self._sink is not None:
+                self._sink.close()
+            self._writer = None
+            self._sink = None
+
+    def commit(self):
+        """Close the temporary file and atomically rename it to the final path."""
+        self.close()
+        os.replace(self.temp_file, self.output_file)
+        logger.info(f"Successfully exported {self.rows_written} transactions to {self.output_file}")
+
+    def discard(self):
+        """Close and delete the temporary file."""
+        self._pending = []
+        try:
+            self.close()
+        finally:
+            if os.path.exists(self.temp_file):
+                os.remove(self.temp_file)
+
+
+def _display_value(value):
+    """Render a typed Parquet/Feather value the way it appears in a CSV export."""
+    if value is None:
+        return ''
+    if isinstance(value, Decimal):
+        text = format(value, 'f')
+        return text.rstrip('0').rstrip('.') if '.' in text else text
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return str(value)
+
+
+def read_export_preview(path, limit=100):
+    """
+    Read the column names and the first rows of an export file.
+
+    Args:
+        path (str): Export file path (.csv, .csv.gz, .csv.zst, .parquet or .feather)
+        limit (int): Maximum number of rows to return
+
+    Returns:
+        tuple: (list of column names, list of rows as lists of strings)
+    """
+    export_format = export_format_for(path)
+    if export_format == 'parquet':
+        parquet_file = pq.ParquetFile(path)
+        # Batches end at row group boundaries, so collect them until the limit is reached
+        batches, rows = [], 0
+        for batch in parquet_file.iter_batches(batch_size=limit):
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= limit:
+                break
+        table = pa.Table.from_batches(batches, schema=parquet_file.schema_arrow).slice(0, limit)
+    elif export_format == 'feather':
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            batches, rows = [], 0
+            for index in range(reader.num_record_batches):
+                if rows >= limit:
+                    break
+                batch = reader.get_batch(index)
+                batches.append(batch)
+                rows += batch.num_rows
+            table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, limit)
+    else:
+        with open_export(path) as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            return headers, [row for _, row in zip(range(limit), reader)]
+
+    rows = [[_display_value(value) for value in row.values()] for row in table.to_pylist()]
+    return table.column_names, rows
+
+
+def count_export_rows(path):
+    """
+    Count the data rows of an export file.
+
+    Args:
+        path (str): Export file path (.csv, .csv.gz, .csv.zst, .parquet or .feather)
+
+    Returns:
+        int: Number of rows, not counting a CSV header
+    """
+    export_format = export_format_for(path)
+    if export_format == 'parquet':
+        return pq.ParquetFile(path).metadata.num_rows
+    if export_format == 'feather':
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(index).num_rows for index in range(reader.num_record_batches))
+    with open_export(path) as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
@@ -0,0 +1,265 @@
+"""
+Export Pipeline
+
+Overlaps the three kinds of work in an export: fetching pages (network),
+turning transactions into CSV rows (CPU) and writing the rows (disk). Fetch
+tasks hand every page to a bounded transform queue. The transform stage formats
+the rows on a worker thread and passes them on to a bounded write queue. The
+write stage appends them to their destination on another worker thread and then
+runs the page's completion callback, e.g. to record a checkpoint. When a queue
+is full the stage feeding it waits, so memory stays bounded and a slow disk
+slows down fetching instead of piling up pages.
+
+Pages of one job keep their order through both stages: a pipeline hands its
+stage one page at a time, so even though the stage threads are a small pool
+shared by all jobs, a job never has two pages in the same stage at once. A
+long transform or write of one job does not hold up the others. Every stage
+counts the pages and rows it handled, its busy time and its queue depth.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 8  # Pages waiting in front of each stage
+DEFAULT_STAGE_WORKERS = 4  # Threads per stage shared by all pipelines; pipelines beyond this take turns
+
+_stage_executors = {}
+_stage_executors_lock = threading.Lock()
+_DONE = object()
+
+
+def get_stage_executor(name):
+    """Small pool of threads running one stage for every pipeline, so jobs do not each need their own."""
+    with _stage_executors_lock:
+        if name not in _stage_executors:
+            _stage_executors[name] = ThreadPoolExecutor(max_workers=DEFAULT_STAGE_WORKERS,
+                                                        thread_name_prefix=f"pipeline-{name}")
+        return _stage_executors[name]
+
+
+class RowBuffer:
+    """In-memory destination for rows of exports that are written in one go at the end."""
+
+    def __init__(self):
+        self.rows = []
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        """Keep a page of rows."""
+        self.rows.extend(rows)
+        self.rows_written += len(rows)
+
+
+class StageStats:
+    """Counters of one pipeline stage."""
+
+    def __init__(self, name, queue=None):
+        """
+        Initialize the counters.
+
+        Args:
+            name (str): Stage name
+            queue (asyncio.Queue): Queue in front of the stage, if it has one
+        """
+        self.name = name
+        self.queue = queue
+        self.pages = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.max_queue_depth = 0
+        self.started = time.monotonic()
+
+    def record(self, rows, seconds=0.0):
+        """Count a page handled by the stage."""
+        self.pages += 1
+        self.rows += rows
+        self.busy += seconds
+
+    def queued(self):
+        """Note the queue depth after a page was added to the stage's queue."""
+        if self.queue is not None:
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def snapshot(self):
+        """
+        Get the stage's counters.
+
+        Returns:
+            dict: pages, rows, rows_per_second, busy_percent, queue_depth and max_queue_depth
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            'pages': self.pages,
+            'rows': self.rows,
+            'rows_per_second': round(self.rows / elapsed, 1),
+            'busy_percent': round(min(100.0, 100.0 * self.busy / elapsed), 1),
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+class ExportPipeline:
+    """Bounded fetch -> transform -> write pipeline of one export job."""
+
+    def __init__(self, transform, queue_size=DEFAULT_QUEUE_SIZE, on_progress=None):
+        """
+        Initialize the pipeline. Use it as an ``async with`` block on the event loop.
+
+        Args:
+            transform (callable): Turns a list of transactions into a list of rows; runs on a worker thread
+            queue_size (int): Pages that may wait in front of each stage
+            on_progress (callable): Called with stats() on the event loop after every written page
+        """
+        self.transform = transform
+        self.on_progress = on_progress
+        self.error = None
+        self._transform_queue = asyncio.Queue(maxsize=queue_size)
+        self._write_queue = asyncio.Queue(maxsize=queue_size)
+        self._stats = {
+            'fetch': StageStats('fetch'),
+            'transform': StageStats('transform', self._transform_queue),
+            'write': StageStats('write', self._write_queue)
+        }
+        self._tasks = []
+        self._last = None
+
+    async def __aenter__(self):
+        self._tasks = [
+            asyncio.ensure_future(self._transform_stage()),
+            asyncio.ensure_future(self._write_stage())
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            await self.close()
+        else:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, sink, transactions, on_written=None):
+        """
+        Queue a fetched page, waiting while the transform queue is full.
+
+        Args:
+            sink: Destination with a write_rows(rows) method (StreamingCSVWriter or RowBuffer)
+            transactions (list): Raw transactions of the page
+            on_written (callable): Called on the write thread once the rows are written
+
+        Returns:
+            asyncio.Future: Resolves to the number of rows written, or to the error that stopped the pipeline
+
+        Raises:
+            Exception: The error that stopped the pipeline, so fetching stops as well
+        """
+        if self.error is not None:
+            raise self.error
+        done = asyncio.get_running_loop().create_future()
+        self._stats['fetch'].record(len(transactions))
+        await self._transform_queue.put((sink, transactions, on_written, done))
+        self._stats['transform'].queued()
+        self._last = done
+        return done
+
+    async def join(self):
+        """
+        Wait until every page submitted so far has been written.
+
+        Raises:
+            Exception: The error that stopped the pipeline, if any
+        """
+        if self._last is not None:
+            await asyncio.wait({self._last})
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        """Wait until every queued page has been written, then stop the stages."""
+        await self._transform_queue.put(_DONE)
+        await asyncio.gather(*self._tasks)
+        logger.info("Export pipeline: " + ", ".join(
+            f"{name} {stats['rows']} rows ({stats['rows_per_second']:.0f}/s, busy {stats['busy_percent']:.0f}%, "
+            f"queue peak {stats['max_queue_depth']})"
+            for name, stats in self.stats().items()
+        ))
+
+    def stats(self):
+        """
+        Get the counters of every stage.
+
+        Returns:
+            dict: Stage name ('fetch', 'transform', 'write') -> StageStats.snapshot()
+        """
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+    def _fail(self, done, error):
+        """Stop the pipeline with an error; later pages are skipped."""
+        if self.error is None:
+            logger.error(f"Export pipeline stopped: {error}")
+            self.error = error
+        if not done.done():
+            done.set_exception(error)
+            # The submitter may already have stopped waiting; do not warn about an unretrieved error
+            done.exception()
+
+    def _timed_transform(self, transactions):
+        started = time.monotonic()
+        rows = self.transform(transactions)
+        return rows, time.monotonic() - started
+
+    @staticmethod
+    def _timed_write(sink, rows, on_written):
+        started = time.monotonic()
+        sink.write_rows(rows)
+        if on_written:
+            on_written()
+        return time.monotonic() - started
+
+    async def _transform_stage(self):
+        loop = asyncio.get_running_loop()
+        executor = get_stage_executor('transform')
+        while True:
+            item = await self._transform_queue.get()
+            if item is _DONE:
+                await self._write_queue.put(_DONE)
+                return
+            sink, transactions, on_written, done = item
+            if self.error is not None:
+                self._fail(done, self.error)
+                continue
+            try:
+                rows, seconds = await loop.run_in_executor(executor, self._timed_transform, transactions)
+            except Exception as e:
+                self._fail(done, e)
+                continue
+            self._stats['transform'].record(len(rows), seconds)
+            await self._write_queue.put((sink, rows, on_written, done))
+            self._stats['write'].queued()
+
+    async def _write_stage(self):
+        loop = asyncio.get_running_loop()
+        executor = get_stage_executor('write')
+        while True:
+            item = await self._write_queue.get()
+            if item is _DONE:
+                return
+            sink, rows, on_written, done = item
+            if self.error is not None:
+                self._fail(done, self.error)
+                continue
+            try:
+                seconds = await loop.run_in_executor(executor, self._timed_write, sink, rows, on_written)
+            except Exception as e:
+                self._fail(done, e)
+                continue
+            self._stats['write'].record(len(rows), seconds)
+            if not done.done():
+                done.set_result(len(rows))
+            if self.on_progress:
+                self.on_progress(self.stats())
@@ -0,0 +1,460 @@
+"""
+Job Registry
+
+Process-safe status registry for background jobs, keyed by job ID, so any
+number of jobs can run side by side and a status request served by any worker
+process reads the job it asks for. Statuses live in a small SQLite database
+in WAL mode: reading one job is a primary-key lookup that never waits for
+writers, and every change is a read-modify-write transaction that other
+processes see as soon as it commits.
+
+Finished jobs stay readable for a while so status pages can show the result;
+the oldest are dropped once more than max_finished jobs have finished or they
+are older than finished_ttl seconds. Running jobs are never dropped.
+
+Requests to pause, resume or cancel a job can be left in the registry by any
+process (request()); the process running the job picks them up with
+take_requests().
+
+Every write bumps the job's version, so watchers can wait for a change
+(wait_for_change()) by comparing one integer instead of copying the status.
+Writers in the same process wake them at once; changes made by other
+processes are noticed within CHANGE_POLL_INTERVAL.
+
+Reads use a connection of their own per thread and never wait for a writer,
+even one of this process that is waiting for another process's write lock.
+Jobs running on an event loop report progress through CoalescedUpdates, which
+folds their many small updates into at most one write per interval and makes
+it on a worker thread.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = "jobs"
+DEFAULT_JOBS_FILE = f"{DEFAULT_JOBS_DIR}/jobs.sqlite"
+DEFAULT_MAX_FINISHED_JOBS = 200
+DEFAULT_FINISHED_TTL = 24 * 60 * 60  # Seconds a finished job stays readable
+FINISHED_STATES = ('completed', 'error', 'cancelled')
+CHANGE_POLL_INTERVAL = 0.5  # Seconds between version checks for changes made by other processes
+DEFAULT_FLUSH_INTERVAL = 0.5  # Seconds between coalesced progress writes of one job
+
+
+class JobRegistry:
+    """Status of many concurrent jobs, shared by every process, with bounded retention of finished ones."""
+
+    def __init__(self, kind='export', path=DEFAULT_JOBS_FILE, max_finished=DEFAULT_MAX_FINISHED_JOBS,
+                 finished_ttl=DEFAULT_FINISHED_TTL):
+        """
+        Initialize the registry.
+
+        Args:
+            kind (str): Kind of job ('export', 'yield', ...); registries of different kinds share the
+                        database but not their jobs
+            path (str): SQLite database file shared by all processes
+            max_finished (int): Finished jobs kept before the oldest are dropped
+            finished_ttl (float): Seconds a finished job is kept
+        """
+        self.kind = kind
+        self.path = path
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._conn = None
+        self._pid = None
+        self._readers = threading.local()  # Read connection of every thread
+        self._lock = threading.RLock()
+        self._changed = threading.Condition()  # Notified after every write of this process
+
+    def _connection(self):
+        """
+        Connection of this process, opened on first use. Caller must hold the lock.
+
+        A process forked after the registry was used (e.g. a preloading web server)
+        opens a connection of its own instead of sharing the parent's.
+        """
+        if self._conn is None or self._pid != os.getpid():
+            jobs_dir = os.path.dirname(self.path)
+            if jobs_dir:
+                os.makedirs(jobs_dir, exist_ok=True)
+            # Autocommit mode; writes open their own IMMEDIATE transactions
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    kind TEXT NOT NULL,
+                    job_id TEXT NOT NULL,
+                    state TEXT,
+                    start_time TEXT,
+                    finished_at REAL,
+                    request TEXT,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    body TEXT NOT NULL,
+                    PRIMARY KEY (kind, job_id)
+                )
+            """)
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            except sqlite3.OperationalError:
+                pass  # Created with the version column
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (kind, finished_at)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _reader(self):
+        """
+        Read connection of the calling thread, opened on first use.
+
+        WAL readers see the last committed state without waiting for writers,
+        so reads do not take the registry lock that writes hold while waiting
+        for the database's write lock.
+        """
+        readers = self._readers
+        if getattr(readers, 'conn', None) is None or readers.pid != os.getpid():
+            with self._lock:
+                self._connection()  # Creates the database and table
+            readers.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            readers.pid = os.getpid()
+        return readers.conn
+
+    def create(self, job_id, status):
+        """
+        Register a job, replacing an earlier job with the same ID (e.g. a resumed one).
+
+        Args:
+            job_id (str): Unique identifier of the job
+            status (dict): Initial status; 'start_time' is filled in when missing
+
+        Returns:
+            dict: Copy of the registered status
+        """
+        status = dict(status, job_id=job_id)
+        status.setdefault('start_time', datetime.now().isoformat())
+
+        def register(conn):
+            self._store(conn, job_id, status, finished_at=None)
+            self._prune(conn)
+
+        with self._lock:
+            self._write(register)
+        return self._snapshot(status)
+
+    def put(self, job_id, status):
+        """
+        Store a job's whole status as given, replacing what was stored before.
+
+        Args:
+            job_id (str): Identifier of the job
+            status (dict): Complete status of the job
+
+        Returns:
+            dict: Copy of the stored status
+        """
+        with self._lock:
+            self._write(lambda conn: self._store(conn, job_id, status, finished_at=None))
+        return self._snapshot(status)
+
+    def update(self, job_id, mutate):
+        """
+        Change a job's status in one transaction, so concurrent updates from any process are not lost.
+
+        Args:
+            job_id (str): Identifier of the job
+            mutate (callable): Called with the job's status dict to change it in place
+
+        Returns:
+            dict: Copy of the updated status, or None if the job is not registered
+        """
+        def apply(conn):
+            row = conn.execute("SELECT body, finished_at, version FROM jobs WHERE kind = ? AND job_id = ?",
+                               (self.kind, job_id)).fetchone()
+            if row is None:
+                return None
+            status = json.loads(row[0])
+            mutate(status)
+            status['updated_time'] = datetime.now().isoformat()
+            if self._store(conn, job_id, status, finished_at=row[1]) and row[1] is None:
+                # The job just finished, which may push an older one out
+                self._prune(conn)
+            return dict(status, version=row[2] + 1)
+
+        with self._lock:
+            status = self._write(apply)
+        return self._snapshot(status) if status is not None else None
+
+    def get(self, job_id):
+        """
+        Look up a job.
+
+        Returns:
+            dict: Copy of the job's status, or None if it is unknown or has expired
+        """
+        row = self._reader().execute(
+            "SELECT body, finished_at, request, version FROM jobs WHERE kind = ? AND job_id = ?",
+            (self.kind, job_id)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time() - self.finished_ttl):
+            return None
+        return self._snapshot(self._decode(row[0], row[2], row[3]))
+
+    def version(self, job_id):
+        """
+        Current version of a job, bumped by every change to it.
+
+        Returns:
+            int: Version, or None if the job is unknown
+        """
+        row = self._reader().execute("SELECT version FROM jobs WHERE kind = ? AND job_id = ?",
+                                     (self.kind, job_id)).fetchone()
+        return row[0] if row else None
+
+    def wait_for_change(self, job_id, since, timeout):
+        """
+        Block until a job's version is newer than since, or until timeout.
+
+        Args:
+            job_id (str): Identifier of the job
+            since (int): Version the caller already has
+            timeout (float): Seconds to wait at most
+
+        Returns:
+            int: Current version (equal to since if nothing changed in time), or None if the job is unknown
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            version = self.version(job_id)
+            remaining = deadline - time.monotonic()
+            if version is None or version > since or remaining <= 0:
+                return version
+            with self._changed:
+                self._changed.wait(min(remaining, CHANGE_POLL_INTERVAL))
+
+    def jobs(self, states=None):
+        """
+        List registered jobs, most recently started first.
+
+        Args:
+            states (tuple): Only list jobs in these states (default: all)
+
+        Returns:
+            list: Copies of the job statuses
+        """
+        query = "SELECT body, request, version FROM jobs WHERE kind = ?"
+        params = [self.kind]
+        if states:
+            query += f" AND state IN ({','.join('?' * len(states))})"
+            params.extend(states)
+        query += " ORDER BY start_time DESC"
+        with self._lock:
+            self._write(self._prune)
+        rows = self._reader().execute(query, params).fetchall()
+        return [self._snapshot(self._decode(*row)) for row in rows]
+
+    def remove(self, job_id):
+        """Forget a job."""
+        with self._lock:
+            self._write(lambda conn: conn.execute("DELETE FROM jobs WHERE kind = ? AND job_id = ?",
+                                                  (self.kind, job_id)))
+
+    def request(self, job_id, action):
+        """
+        Leave a request ('pause', 'resume' or 'cancel') for the process running a job.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        with self._lock:
+            cursor = self._write(lambda conn: conn.execute(
+                "UPDATE jobs SET request = ? WHERE kind = ? AND job_id = ? AND finished_at IS NULL",
+                (action, self.kind, job_id)
+            ))
+        return cursor.rowcount > 0
+
+    def take_requests(self, job_ids):
+        """
+        Collect and clear the pending requests of some jobs.
+
+        Args:
+            job_ids (list): Jobs run by the calling process
+
+        Returns:
+            dict: Requested action by job ID, for the jobs that have one
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        placeholders = ','.join('?' * len(job_ids))
+
+        def take(conn):
+            rows = conn.execute(
+                f"SELECT job_id, request FROM jobs WHERE kind = ? AND job_id IN ({placeholders}) "
+                f"AND request IS NOT NULL", (self.kind, *job_ids)
+            ).fetchall()
+            if rows:
+                conn.execute(f"UPDATE jobs SET request = NULL WHERE kind = ? AND job_id IN ({placeholders})",
+                             (self.kind, *job_ids))
+            return dict(rows)
+
+        with self._lock:
+            return self._write(take)
+
+    def _write(self, apply):
+        """Run apply(conn) in a write transaction. Caller must hold the lock."""
+        conn = self._connection()
+        # Take the write lock up front so the read in a read-modify-write cannot go stale
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = apply(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        with self._changed:
+            self._changed.notify_all()
+        return result
+
+    def _store(self, conn, job_id, status, finished_at):
+        """
+        Write a job's status. Caller must be inside a write transaction.
+
+        Returns:
+            bool: Whether the job is in a final state
+        """
+        finished = status.get('status') in FINISHED_STATES
+        if finished and finished_at is None:
+            finished_at = time.time()
+        conn.execute("""
+            INSERT INTO jobs (kind, job_id, state, start_time, finished_at, body) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (kind, job_id) DO UPDATE SET
+                state = excluded.state, start_time = excluded.start_time,
+                finished_at = excluded.finished_at, body = excluded.body, version = jobs.version + 1,
+                -- A request the job did not get to before it finished must not hit a later run of it
+                request = CASE WHEN excluded.finished_at IS NULL THEN request END
+        """, (self.kind, job_id, status.get('status'), status.get('start_time'),
+              finished_at if finished else None, json.dumps(status, separators=(',', ':'))))
+        return finished
+
+    def _prune(self, conn):
+        """Drop expired finished jobs and the oldest beyond max_finished. Caller must be inside a write transaction."""
+        expired = conn.execute(
+            "DELETE FROM jobs WHERE kind = ? AND finished_at < ?", (self.kind, time.time() - self.finished_ttl)
+        ).rowcount
+        excess = conn.execute("""
+            DELETE FROM jobs WHERE kind = ? AND job_id IN (
+                SELECT job_id FROM jobs WHERE kind = ? AND finished_at IS NOT NULL
+                ORDER BY finished_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.kind, self.kind, self.max_finished)).rowcount
+        if expired or excess:
+            logger.debug(f"Dropped {expired + excess} finished {self.kind} jobs from the registry")
+
+    @staticmethod
+    def _decode(body, request, version):
+        """Status dict of a stored job with its version, and its pending request if it has one."""
+        status = json.loads(body)
+        status['version'] = version
+        if request:
+            status['requested_action'] = request
+        return status
+
+    @staticmethod
+    def _snapshot(status):
+        """Copy a status with its nested counters, with the seconds the job has run so far."""
+        snapshot = copy.deepcopy(status)
+        try:
+            start = datetime.fromisoformat(status['start_time'])
+            end = datetime.fromisoformat(status['end_time']) if status.get('end_time') else datetime.now()
+            snapshot['elapsed_seconds'] = round((end - start).total_seconds(), 1)
+        except (KeyError, TypeError, ValueError):
+            pass
+        return snapshot
+
+
+class CoalescedUpdates:
+    """
+    Progress updates of jobs running on an event loop, written to a registry in batches off the loop.
+
+    Updates of a job are queued and applied in order. A job's queued updates are
+    written together at most once per interval, or as soon as possible when an
+    update is urgent (e.g. a state change). The write runs in a worker thread, so
+    a registry waiting for another process's write lock never stalls the loop.
+    """
+
+    def __init__(self, registry, interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize the buffer.
+
+        Args:
+            registry (JobRegistry): Registry the updates are written to
+            interval (float): Seconds between writes of one job's non-urgent updates
+        """
+        self.registry = registry
+        self.interval = interval
+        self._pending = {}  # Job ID -> mutate functions not written yet
+        self._urgent = set()
+        self._last_write = {}  # Job ID -> monotonic time of the last write
+        self._writers = {}  # Job ID -> (task writing the job's updates, event waking it)
+
+    def submit(self, job_id, mutate, urgent=False):
+        """
+        Queue an update of a job. Must be called on the event loop.
+
+        Args:
+            job_id (str): Identifier of the job
+            mutate (callable): Called with the job's status dict to change it in place
+            urgent (bool): Write without waiting for the rest of the interval
+        """
+        self._pending.setdefault(job_id, []).append(mutate)
+        if urgent:
+            self._urgent.add(job_id)
+        if job_id not in self._writers:
+            wake = asyncio.Event()
+            self._writers[job_id] = (asyncio.get_running_loop().create_task(self._write(job_id, wake)), wake)
+        elif urgent:
+            self._writers[job_id][1].set()
+
+    async def flush(self, job_id):
+        """Wait until every update queued for a job has been written, e.g. when the job ends."""
+        self._urgent.add(job_id)
+        writer = self._writers.get(job_id)
+        if writer:
+            writer[1].set()
+            await asyncio.shield(writer[0])
+        self._urgent.discard(job_id)
+        self._last_write.pop(job_id, None)
+
+    async def _write(self, job_id, wake):
+        """Write a job's queued updates until none are left."""
+        try:
+            while self._pending.get(job_id):
+                delay = self._last_write.get(job_id, 0) + self.interval - time.monotonic()
+                if job_id not in self._urgent and delay > 0:
+                    wake.clear()
+                    try:
+                        await asyncio.wait_for(wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self._urgent.discard(job_id)
+                updates = self._pending.pop(job_id)
+                self._last_write[job_id] = time.monotonic()
+
+                def apply(status, updates=updates):
+                    for mutate in updates:
+                        mutate(status)
+
+                try:
+                    await asyncio.to_thread(self.registry.update, job_id, apply)
+                except Exception as e:
+                    logger.warning(f"Could not record progress of job {job_id}: {e}")
+        finally:
+            del self._writers[job_id]
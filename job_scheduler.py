@@ -0,0 +1,421 @@
+"""
+Background Job Scheduler
+
+Bounds how many export jobs the web interface runs at once. Jobs are queued
+by priority (interactive requests before scheduled ones, then first come
+first served) and started on the shared background event loop whenever one of
+the worker slots is free, so a burst of requests queues up instead of
+starting that many crawlers against the explorer.
+
+Queued jobs can be cancelled or held back; running jobs can be cancelled
+(their task is cancelled) or paused. A paused job keeps its worker slot and
+stops before its next explorer request until it is resumed. Queue depth and
+waiting times are reported by stats() and job().
+
+A scheduler only knows the jobs of its own process. With several web worker
+processes, a request to pause, resume or cancel a job can land on a worker
+that does not run it; such requests are left in the shared job registry and
+the scheduler running the job polls for them (see the requests hook).
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from background_loop import get_background_loop
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0  # Started from a form by a user waiting for the result
+PRIORITY_SCHEDULED = 10  # Unattended runs, e.g. presets triggered by cron
+PRIORITIES = {'interactive': PRIORITY_INTERACTIVE, 'scheduled': PRIORITY_SCHEDULED}
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUED = 100
+FINISHED_JOBS_KEPT = 200  # Finished jobs whose scheduling details stay readable
+REQUEST_POLL_INTERVAL = 1.0  # Seconds between checks for requests left by other processes
+
+
+class SchedulerFull(Exception):
+    """Raised when a job is submitted while the queue is at its limit."""
+
+
+class JobControl:
+    """Pause switch handed to a running job; the job waits at wait_if_paused() while it is off."""
+
+    def __init__(self):
+        self._running = None  # asyncio.Event, created on the job's event loop
+        self._paused = False
+
+    @property
+    def paused(self):
+        """Whether the job has been asked to pause."""
+        return self._paused
+
+    def _event(self):
+        if self._running is None:
+            self._running = asyncio.Event()
+            if not self._paused:
+                self._running.set()
+        return self._running
+
+    def pause(self):
+        """Ask the job to stop at its next wait_if_paused(). Must be called on the job's event loop."""
+        self._paused = True
+        self._event().clear()
+
+    def resume(self):
+        """Let a paused job continue. Must be called on the job's event loop."""
+        self._paused = False
+        self._event().set()
+
+    async def wait_if_paused(self):
+        """Return at once while the job runs; block while it is paused."""
+        if self._paused:
+            logger.info("Job paused")
+            await self._event().wait()
+            logger.info("Job resumed")
+
+
+class ScheduledJob:
+    """A job waiting for, holding or done with a worker slot."""
+
+    def __init__(self, job_id, factory, priority, sequence, label=None):
+        self.job_id = job_id
+        self.factory = factory
+        self.priority = priority
+        self.sequence = sequence
+        self.label = label
+        self.state = 'queued'  # 'queued', 'running', 'paused', 'completed', 'error', 'cancelled'
+        self.held = False  # Queued job that must not start until resumed
+        self.control = JobControl()
+        self.task = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def wait_seconds(self, now=None):
+        """Seconds the job waited (or has been waiting) for a worker slot."""
+        return round((self.started or self.finished or now or time.time()) - self.submitted, 1)
+
+    def info(self, queue_position=None):
+        """Scheduling details of the job."""
+        return {
+            'job_id': self.job_id,
+            'label': self.label,
+            'state': self.state,
+            'held': self.held,
+            'priority': self.priority,
+            'queue_position': queue_position,
+            'wait_seconds': self.wait_seconds(),
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error
+        }
+
+
+class JobScheduler:
+    """Fixed pool of worker slots on the background event loop with a priority queue in front."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED, loop=None, requests=None,
+                 on_cancel=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            workers (int): Jobs running at the same time
+            max_queued (int): Jobs allowed to wait for a slot before submit() refuses more
+            loop (asyncio.AbstractEventLoop): Loop the jobs run on (default: the shared background loop)
+            requests (callable): Called with the IDs of this scheduler's unfinished jobs; returns
+                                 {job_id: 'pause' | 'resume' | 'cancel'} for requests made elsewhere
+            on_cancel (callable): Called with the job ID when a job is cancelled before it started;
+                                  jobs that already run record their own end
+        """
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.requests = requests
+        self.on_cancel = on_cancel
+        self._loop = loop
+        self._watcher = None
+        self._queue = []  # Heap of (priority, sequence, job)
+        self._jobs = {}
+        self._running = 0
+        self._sequence = itertools.count()
+        self._waits = []  # Wait times of recently started jobs
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = get_background_loop()
+        return self._loop
+
+    def submit(self, job_id, factory, priority=PRIORITY_INTERACTIVE, label=None):
+        """
+        Queue a job.
+
+        Args:
+            job_id (str): Unique identifier of the job
+            factory (callable): Called with the job's JobControl once a slot is free; returns the coroutine to run
+            priority (int): Lower runs first (PRIORITY_INTERACTIVE or PRIORITY_SCHEDULED)
+            label (str): Short description for listings
+
+        Returns:
+            dict: Scheduling details of the job
+
+        Raises:
+            SchedulerFull: If max_queued jobs are already waiting
+        """
+        with self._lock:
+            if self._queued_count() >= self.max_queued:
+                raise SchedulerFull(f"{self.max_queued} jobs are already waiting; try again later")
+            job = ScheduledJob(job_id, factory, priority, next(self._sequence), label)
+            self._jobs[job_id] = job
+            heapq.heappush(self._queue, (priority, job.sequence, job))
+            self._forget_finished()
+            info = job.info(self._position(job))
+        logger.info(f"Queued job {job_id} with priority {priority} ({info['queue_position']} waiting)")
+        self.loop.call_soon_threadsafe(self._dispatch)
+        return info
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in ('completed', 'error', 'cancelled'):
+                return False
+            queued = job.state == 'queued'
+            if queued:
+                # Left in the heap and skipped when it comes up
+                self._finish(job, 'cancelled')
+        if queued:
+            if self.on_cancel:
+                self.on_cancel(job_id)
+            return True
+        # A paused job is resumed first so it can unwind
+        self.loop.call_soon_threadsafe(self._cancel_task, job)
+        return True
+
+    def pause(self, job_id):
+        """
+        Hold a queued job back, or pause a running one before its next request.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in ('completed', 'error', 'cancelled'):
+                return False
+            if job.state == 'queued':
+                job.held = True
+                return True
+            job.state = 'paused'
+        self.loop.call_soon_threadsafe(job.control.pause)
+        return True
+
+    def resume(self, job_id):
+        """
+        Release a held or paused job.
+
+        Returns:
+            bool: False if the job is unknown or already finished
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in ('completed', 'error', 'cancelled'):
+                return False
+            queued = job.state == 'queued'
+            if queued:
+                job.held = False
+            else:
+                job.state = 'running'
+        self.loop.call_soon_threadsafe(self._dispatch if queued else job.control.resume)
+        return True
+
+    def job(self, job_id):
+        """
+        Scheduling details of a job.
+
+        Returns:
+            dict: State, priority, queue position (1 = next to start) and wait time, or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return job.info(self._position(job) if job.state == 'queued' else None)
+
+    def stats(self):
+        """
+        Current load of the scheduler.
+
+        Returns:
+            dict: Worker slots, running and paused jobs, queue depth and waiting times
+        """
+        now = time.time()
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job.state == 'queued']
+            waits = self._waits
+            return {
+                'workers': self.workers,
+                'running': sum(1 for job in self._jobs.values() if job.state == 'running'),
+                'paused': sum(1 for job in self._jobs.values() if job.state == 'paused'),
+                'queue_depth': len(queued),
+                'held': sum(1 for job in queued if job.held),
+                'max_queued': self.max_queued,
+                'oldest_wait_seconds': max((job.wait_seconds(now) for job in queued), default=0),
+                'average_wait_seconds': round(sum(waits) / len(waits), 1) if waits else 0
+            }
+
+    def _queued_count(self):
+        return sum(1 for job in self._jobs.values() if job.state == 'queued')
+
+    def _position(self, job):
+        """1-based position of a queued job among the jobs that will start before it. Caller must hold the lock."""
+        return 1 + sum(
+            1 for other in self._jobs.values()
+            if other.state == 'queued' and not other.held and (other.priority, other.sequence) < (job.priority, job.sequence)
+        )
+
+    def _dispatch(self):
+        """Start queued jobs while worker slots are free. Runs on the event loop."""
+        with self._lock:
+            held = []
+            while self._running < self.workers and self._queue:
+                item = heapq.heappop(self._queue)
+                job = item[2]
+                if job.state != 'queued':
+                    continue  # Cancelled while waiting
+                if job.held:
+                    held.append(item)
+                    continue
+                self._running += 1
+                job.state = 'running'
+                job.started = time.time()
+                self._waits = (self._waits + [job.wait_seconds()])[-100:]
+                job.task = self.loop.create_task(self._run(job))
+            for item in held:
+                heapq.heappush(self._queue, item)
+            if self.requests and self._watcher is None and (self._running or self._queue):
+                self._watcher = self.loop.create_task(self._watch_requests())
+
+    async def _watch_requests(self):
+        """Apply requests made in other processes while this scheduler has unfinished jobs. Runs on the event loop."""
+        actions = {'pause': self.pause, 'resume': self.resume, 'cancel': self.cancel}
+        try:
+            while True:
+                await asyncio.sleep(REQUEST_POLL_INTERVAL)
+                with self._lock:
+                    job_ids = [job.job_id for job in self._jobs.values() if job.finished is None]
+                if not job_ids:
+                    break
+                try:
+                    requests = await asyncio.to_thread(self.requests, job_ids)
+                except Exception as e:
+                    logger.warning(f"Could not read job requests: {e}")
+                    continue
+                for job_id, action in requests.items():
+                    if action in actions:
+                        logger.info(f"Applying '{action}' requested for job {job_id} by another process")
+                        actions[action](job_id)
+        finally:
+            self._watcher = None
+
+    async def _run(self, job):
+        """Run one job in its worker slot."""
+        logger.info(f"Starting job {job.job_id} after waiting {job.wait_seconds()}s")
+        state, error = 'completed', None
+        try:
+            await job.factory(job.control)
+        except asyncio.CancelledError:
+            state = 'cancelled'
+            logger.info(f"Job {job.job_id} cancelled")
+        except Exception as e:
+            # Jobs record their own error status; this keeps the scheduler's view in line
+            state, error = 'error', str(e)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._finish(job, state, error)
+            self._dispatch()
+
+    def _cancel_task(self, job):
+        """Cancel a running job's task. Runs on the event loop."""
+        if job.control.paused:
+            job.control.resume()
+        if job.task is not None:
+            job.task.cancel()
+
+    def _finish(self, job, state, error=None):
+        """Record the end of a job. Caller must hold the lock."""
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        job.task = None
+        job.factory = None
+
+    def _forget_finished(self):
+        """Drop the oldest finished jobs beyond FINISHED_JOBS_KEPT. Caller must hold the lock."""
+        finished = [job for job in self._jobs.values() if job.finished is not None]
+        for job in sorted(finished, key=lambda job: job.finished)[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job.job_id]
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler():
+    """
+    Get the process-wide job scheduler, creating it on first use.
+
+    Returns:
+        JobScheduler: Shared scheduler
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = JobScheduler()
+        return _shared_scheduler
+
+
+def configure_job_scheduler(workers=None, max_queued=None, requests=None, on_cancel=None):
+    """
+    Adjust the shared job scheduler.
+
+    Args:
+        workers (int): Jobs running at the same time, or None to keep the current number
+        max_queued (int): Jobs allowed to wait, or None to keep the current limit
+        requests (callable): Source of pause/resume/cancel requests made in other processes
+                             (see JobScheduler), or None to keep the current one
+        on_cancel (callable): Called with the ID of a job cancelled before it started, or None
+                              to keep the current callback
+
+    Returns:
+        JobScheduler: The updated scheduler
+    """
+    scheduler = get_job_scheduler()
+    with scheduler._lock:
+        if workers:
+            scheduler.workers = max(1, workers)
+        if max_queued is not None:
+            scheduler.max_queued = max_queued
+        if requests is not None:
+            scheduler.requests = requests
+        if on_cancel is not None:
+            scheduler.on_cancel = on_cancel
+        started = scheduler._loop is not None
+    if started:
+        # Extra worker slots take waiting jobs at once
+        scheduler.loop.call_soon_threadsafe(scheduler._dispatch)
+    return scheduler
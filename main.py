@@ -7,7 +7,9 @@ import time
 import pandas as pd
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, flash, jsonify, send_file, stream_with_context
+)
 
 # Import Colony Yield Analyzer
 from colony_yield_analyzer import (
@@ -15,14 +17,49 @@ from colony_yield_analyzer import (
     update_yield_analysis_status, get_recent_yield_reports, DEFAULT_YIELD_DIR
 )
 
+# Import the shared explorer response cache
+from response_cache import get_response_cache
+from transaction_store import get_transaction_store
+
+# Export jobs queue for a bounded number of worker slots on the shared background event loop
+from job_scheduler import (
+    DEFAULT_MAX_QUEUED, DEFAULT_WORKERS, PRIORITIES, PRIORITY_INTERACTIVE, configure_job_scheduler, get_job_scheduler
+)
+
 # Import our exporter module
 from zero_network_exporter import (
-    ZeroNetworkExporter, load_presets, save_preset, delete_preset, 
-    get_recent_exports, get_export_status, DEFAULT_EXPORT_DIR
+    ZeroNetworkExporter, ExportCheckpoint, load_presets, save_preset, delete_preset, 
+    get_recent_exports, get_export_status, list_export_jobs, list_checkpoints, generate_sync_filename, DEFAULT_EXPORT_DIR,
+    start_export_job, update_export_progress, request_export_job_action, take_export_job_requests,
+    wait_for_export_status, check_incremental_output
 )
+from job_registry import FINISHED_STATES
+
+# Export files can be CSV (optionally gzip or zstd compressed), Parquet or Feather
+from export_formats import (
+    COMPRESSION_EXTENSIONS, EXPORT_FORMATS, check_compression, compression_for, count_export_rows, export_extension,
+    read_export_preview
+)
+
+# Use the new Caldera Explorer API. EXPLORER_API_URLS can list several comma-separated
+# mirrors (e.g. adding https://explorer.zero.network/api) to balance requests across them.
+API_BASE_URL = os.environ.get("EXPLORER_API_URLS", 'https://zero-network.calderaexplorer.xyz/api')
+
+# EXPORT_WORKERS bounds how many exports run at once in each web worker process; further jobs wait in a
+# queue of up to EXPORT_MAX_QUEUED. Job status and pause/resume/cancel requests are shared by all processes.
+configure_job_scheduler(workers=int(os.environ.get("EXPORT_WORKERS", DEFAULT_WORKERS)),
+                        max_queued=int(os.environ.get("EXPORT_MAX_QUEUED", DEFAULT_MAX_QUEUED)),
+                        requests=take_export_job_requests,
+                        on_cancel=lambda job_id: update_export_progress(job_id, status='cancelled'))
 
-# Use the new Caldera Explorer API
-API_BASE_URL = 'https://zero-network.calderaexplorer.xyz/api'
+# A status stream sends a keep-alive comment after this many seconds without a change
+STATUS_KEEPALIVE_SECONDS = 15
+# A status stream is closed after this long and the browser reconnects, so no worker thread is held forever
+STATUS_STREAM_SECONDS = 300
+# Shortest gap between two status updates of a stream or long poll; faster changes are merged into the next one
+STATUS_EVENT_INTERVAL = 0.5
+# Longest a long poll (?since=) may wait for a change
+STATUS_LONG_POLL_SECONDS = 30
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -46,10 +83,9 @@ def home():
         # Get the short name (without directory)
         file_name = os.path.basename(file_path)
         
-        # Count rows in CSV
+        # Count rows (Parquet and Feather files answer from their metadata)
         try:
-            with open(file_path, 'r') as f:
-                row_count = sum(1 for _ in csv.reader(f)) - 1  # Subtract header row
+            row_count = count_export_rows(file_path)
         except Exception:
             row_count = "Unknown"
         
@@ -64,7 +100,11 @@ def home():
     # Load presets for quick export
     presets = load_presets()
     
-    return render_template('home.html', export_files=export_files, presets=presets)
+    # Interrupted streaming exports that can be resumed
+    interrupted_jobs = list_checkpoints()
+    
+    return render_template('home.html', export_files=export_files, presets=presets,
+                           interrupted_jobs=interrupted_jobs)
 
 @app.route('/export', methods=['GET', 'POST'])
 def export():
@@ -129,6 +169,23 @@ def export():
         end_date = request.form.get('end_date')
         no_date_filter = request.form.get('no_date_filter') == 'on'
         token_contract = request.form.get('token_contract')
+        concurrency = request.form.get('concurrency', 1)
+        use_cache = request.form.get('use_cache') == 'on'
+        use_store = request.form.get('use_store') == 'on'
+        pagination = 'block' if request.form.get('pagination') == 'block' else 'page'
+        shards = request.form.get('shards', 1)
+        deadline_minutes = request.form.get('deadline_minutes')
+        hedge = request.form.get('hedge') == 'on'
+        output_format = request.form.get('output_format', 'csv')
+        if output_format not in EXPORT_FORMATS:
+            output_format = 'csv'
+        compression = request.form.get('compression') or None
+        try:
+            compression_level = check_compression(output_format, compression,
+                                                  request.form.get('compression_level') or None)
+        except ValueError as e:
+            flash(f"Invalid compression settings: {str(e)}", "danger")
+            return redirect(url_for('export'))
         
         # Convert max_pages to integer if provided
         if max_pages:
@@ -139,10 +196,26 @@ def export():
         else:
             max_pages = None
             
+        # Convert concurrency and shards to positive integers
+        try:
+            concurrency = max(1, int(concurrency))
+        except ValueError:
+            concurrency = 1
+        try:
+            shards = max(1, int(shards))
+        except ValueError:
+            shards = 1
+        
+        # Jobs that run past their deadline fail instead of leaving the status page polling forever
+        try:
+            deadline = float(deadline_minutes) * 60 if deadline_minutes else None
+        except ValueError:
+            deadline = None
+            
         # Generate output filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         tx_type = "internal" if internal else "token"
-        filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{address_label}_{timestamp}.csv"
+        filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{address_label}_{timestamp}{export_extension(output_format, compression)}"
         
         # Handle date parameters
         if no_date_filter:
@@ -155,29 +228,43 @@ def export():
         # Create exporter and process transactions
         try:
             # Start the export and redirect to status page
-            exporter = ZeroNetworkExporter(base_url=API_BASE_URL)
+            exporter = ZeroNetworkExporter(
+                base_url=API_BASE_URL,
+                cache=get_response_cache() if use_cache else None,
+                hedge=hedge,
+                store=get_transaction_store() if use_store else None
+            )
             
-            # Start the export in a separate thread to avoid blocking
-            from threading import Thread
-            export_thread = Thread(target=exporter.process_all_pages, kwargs={
-                'address': addresses,
-                'output_file': filename,
-                'max_pages': max_pages,
-                'records_per_page': int(records),
-                'sort': sort,
-                'internal': internal,
-                'start_date': start_date,
-                'end_date': end_date,
-                'token_contract': token_contract,
-                'job_id': job_id
-            })
-            export_thread.daemon = True
-            export_thread.start()
+            # Queue the export ahead of scheduled jobs; it starts once a worker slot is free.
+            # It is registered first so its status page works from any web worker while it waits.
+            start_export_job(job_id, addresses, max_pages, status='queued')
+            get_job_scheduler().submit(job_id, lambda control: exporter.process_all_pages_async(
+                address=addresses,
+                output_file=filename,
+                max_pages=max_pages,
+                records_per_page=int(records),
+                sort=sort,
+                internal=internal,
+                start_date=start_date,
+                end_date=end_date,
+                token_contract=token_contract,
+                job_id=job_id,
+                concurrency=concurrency,
+                stream=True,
+                pagination=pagination,
+                shards=shards,
+                deadline=deadline,
+                output_format=output_format,
+                compression=compression,
+                compression_level=compression_level,
+                control=control
+            ), priority=PRIORITY_INTERACTIVE, label=f"export {address_label}")
             
             # Redirect to the export status page
             return redirect(url_for('export_status', job_id=job_id))
             
         except Exception as e:
+            update_export_progress(job_id, status='error', error=str(e))
             flash(f"Error exporting data: {str(e)}", "danger")
             return redirect(url_for('export'))
     
@@ -210,6 +297,32 @@ def presets():
                 flash("Preset name and at least one address are required", "danger")
                 return redirect(url_for('presets'))
                 
+            output_format = request.form.get('output_format') if request.form.get('output_format') in EXPORT_FORMATS else 'csv'
+            compression = request.form.get('compression') or None
+            try:
+                compression_level = check_compression(output_format, compression,
+                                                      request.form.get('compression_level') or None)
+            except ValueError as e:
+                flash(f"Invalid compression settings: {str(e)}", "danger")
+                return redirect(url_for('presets'))
+            if request.form.get('incremental') == 'on':
+                # Reject what would fail on every run of the preset
+                try:
+                    check_incremental_output(output_format, compression)
+                except ValueError as e:
+                    flash(f"Invalid preset: {str(e)}", "danger")
+                    return redirect(url_for('presets'))
+
+            # Convert concurrency and shards to positive integers, as the export form does
+            try:
+                concurrency = max(1, int(request.form.get('concurrency', 1)))
+            except ValueError:
+                concurrency = 1
+            try:
+                shards = max(1, int(request.form.get('shards', 1)))
+            except ValueError:
+                shards = 1
+                
             # Build preset config
             config = {
                 'address': addresses,
@@ -218,7 +331,16 @@ def presets():
                 'sort': request.form.get('sort', 'asc'),
                 'internal': request.form.get('internal') == 'on',
                 'fields': None,  # Not implementing field selection in the web UI for now
-                'token_contract': request.form.get('token_contract')
+                'token_contract': request.form.get('token_contract'),
+                'concurrency': concurrency,
+                'cache': request.form.get('use_cache') == 'on',
+                'store': request.form.get('use_store') == 'on',
+                'incremental': request.form.get('incremental') == 'on',
+                'pagination': 'block' if request.form.get('pagination') == 'block' else 'page',
+                'shards': shards,
+                'format': output_format,
+                'compression': compression,
+                'compression_level': compression_level
             }
             
             # Handle date filters
@@ -255,28 +377,15 @@ def presets():
 def view_export(file_path):
     """View an export file."""
     try:
-        # Read the CSV file
-        rows = []
-        
-        with open(file_path, 'r') as f:
-            reader = csv.reader(f)
-            headers = next(reader)  # Read headers
-            
-            # Read rows (limit to 100 for performance)
-            count = 0
-            for row in reader:
-                rows.append(row)
-                count += 1
-                if count >= 100:
-                    break
+        # Read the headers and first rows (limit to 100 for performance)
+        headers, rows = read_export_preview(file_path, limit=100)
         
         # Get file metadata
         file_size = os.path.getsize(file_path) / 1024  # Size in KB
         mod_time = datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
         
-        # Count total rows in CSV
-        with open(file_path, 'r') as f:
-            total_rows = sum(1 for _ in csv.reader(f)) - 1  # Subtract header row
+        # Count total rows
+        total_rows = count_export_rows(file_path)
             
         file_info = {
             'path': file_path,
@@ -297,6 +406,14 @@ def view_export(file_path):
 def download_export(file_path):
     """Download an export file."""
     try:
+        compression = compression_for(file_path)
+        if compression and compression in request.accept_encodings:
+            # Browsers that accept the codec receive the compressed bytes and save the plain CSV
+            download_name = os.path.basename(file_path)[:-len(COMPRESSION_EXTENSIONS[compression])]
+            response = send_file(file_path, as_attachment=True, download_name=download_name, mimetype='text/csv')
+            response.headers['Content-Encoding'] = compression
+            response.vary.add('Accept-Encoding')
+            return response
         return send_file(file_path, as_attachment=True)
     except Exception as e:
         flash(f"Error downloading file: {str(e)}", "danger")
@@ -326,10 +443,15 @@ def run_preset(name):
         addresses = [preset['address']]
         address_label = preset['address'][:8] if len(preset['address']) > 8 else preset['address']
     
-    # Generate output filename
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    tx_type = "internal" if preset.get('internal', False) else "token"
-    filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{address_label}_{timestamp}.csv"
+    # Generate output filename; incremental presets keep appending to one dataset
+    output_format = preset.get('format', 'csv')
+    compression = preset.get('compression')
+    if preset.get('incremental', False):
+        filename = generate_sync_filename(f"preset_{name}", preset.get('internal', False))
+    else:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        tx_type = "internal" if preset.get('internal', False) else "token"
+        filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{address_label}_{timestamp}{export_extension(output_format, compression)}"
     
     # Handle date parameters
     start_date = preset.get('start_date')
@@ -346,63 +468,113 @@ def run_preset(name):
     # Create exporter and process transactions
     try:
         # Start the export and redirect to status page
-        exporter = ZeroNetworkExporter(base_url=API_BASE_URL)
+        exporter = ZeroNetworkExporter(
+            base_url=API_BASE_URL,
+            cache=get_response_cache() if preset.get('cache', False) else None,
+            store=get_transaction_store() if preset.get('store', False) else None
+        )
         
-        # Start the export in a separate thread to avoid blocking
-        from threading import Thread
-        export_thread = Thread(target=exporter.process_all_pages, kwargs={
-            'address': addresses,
-            'output_file': filename,
-            'start_page': preset.get('page', 1),
-            'max_pages': preset.get('max_pages'),
-            'records_per_page': preset.get('records', 100),
-            'sort': preset.get('sort', 'asc'),
-            'internal': preset.get('internal', False),
-            'additional_fields': preset.get('fields'),
-            'start_date': start_date,
-            'end_date': end_date,
-            'token_contract': preset.get('token_contract'),
-            'job_id': job_id
-        })
-        export_thread.daemon = True
-        export_thread.start()
+        # Presets run from cron pass ?priority=scheduled so they wait behind interactive exports
+        priority = PRIORITIES.get(request.args.get('priority'), PRIORITY_INTERACTIVE)
+        start_export_job(job_id, addresses, preset.get('max_pages'), status='queued')
+        get_job_scheduler().submit(job_id, lambda control: exporter.process_all_pages_async(
+            address=addresses,
+            output_file=filename,
+            start_page=preset.get('page', 1),
+            max_pages=preset.get('max_pages'),
+            records_per_page=preset.get('records', 100),
+            sort=preset.get('sort', 'asc'),
+            internal=preset.get('internal', False),
+            additional_fields=preset.get('fields'),
+            start_date=start_date,
+            end_date=end_date,
+            token_contract=preset.get('token_contract'),
+            job_id=job_id,
+            concurrency=preset.get('concurrency', 1),
+            stream=True,
+            incremental=preset.get('incremental', False),
+            pagination=preset.get('pagination', 'page'),
+            shards=preset.get('shards', 1),
+            output_format=output_format,
+            compression=compression,
+            compression_level=preset.get('compression_level'),
+            dedup=preset.get('dedup', True),
+            control=control
+        ), priority=priority, label=f"preset {name}")
         
         # Redirect to the export status page
         return redirect(url_for('export_status', job_id=job_id))
             
     except Exception as e:
+        update_export_progress(job_id, status='error', error=str(e))
         flash(f"Error running preset '{name}': {str(e)}", "danger")
         return redirect(url_for('home'))
 
+@app.route('/resume/<job_id>')
+def resume_export(job_id):
+    """Resume an interrupted export from its checkpoint."""
+    checkpoint = ExportCheckpoint.load(job_id)
+    
+    if checkpoint is None:
+        flash(f"No checkpoint found for export job {job_id}", "danger")
+        return redirect(url_for('home'))
+    
+    try:
+        # Rebuild the exporter with the cache and store the job was started with
+        exporter = ZeroNetworkExporter(
+            base_url=checkpoint.data.get('api_url') or API_BASE_URL,
+            cache=get_response_cache() if checkpoint.data.get('cache') else None,
+            store=get_transaction_store() if checkpoint.data.get('store') else None
+        )
+        
+        # Queue the resumed export like a new one
+        start_export_job(job_id, checkpoint.options['address'], checkpoint.options.get('max_pages'), status='queued')
+        get_job_scheduler().submit(job_id, lambda control: exporter.resume_export_async(job_id, control=control),
+                                   priority=PRIORITY_INTERACTIVE, label=f"resume {job_id[:8]}")
+        
+        # Redirect to the export status page
+        return redirect(url_for('export_status', job_id=job_id))
+        
+    except Exception as e:
+        update_export_progress(job_id, status='error', error=str(e), resumable=True)
+        flash(f"Error resuming export: {str(e)}", "danger")
+        return redirect(url_for('home'))
+
 @app.route('/export_status/<job_id>')
 def export_status(job_id):
     """Show export status page with progress bar."""
     return render_template('export_status.html', job_id=job_id)
 
+def export_job_status(job_id):
+    """Status of an export job with its scheduling details, or None if the job is unknown."""
+    status = get_export_status(job_id)
+    if status is not None:
+        # Queue position and wait are known to the web worker that runs the job
+        schedule = get_job_scheduler().job(job_id)
+        if schedule is not None:
+            status['schedule'] = schedule
+    return status
+
 @app.route('/api/export_status/<job_id>')
 def api_export_status(job_id):
-    """API endpoint to get the current export status."""
-    status = get_export_status()
+    """
+    API endpoint to get the current status of an export job.
     
-    # Check if the job ID matches
-    if status.get('job_id') != job_id:
-        # Check if a file has been created for this job
-        recent_files = get_recent_exports(max_files=10)
-        for file_path in recent_files:
-            # If this is a very recent file (created in the last 5 minutes)
-            if time.time() - os.path.getmtime(file_path) < 300:  # 5 minutes in seconds
-                # Return completed status with the file
-                return jsonify({
-                    'job_id': job_id,
-                    'status': 'completed',
-                    'progress': 100,
-                    'output_file': file_path,
-                    'total_transactions': 'Unknown',  # We don't know this anymore
-                    'processed_addresses': 1,
-                    'total_addresses': 1
-                })
-                
-        # If no recent file found, the job might be genuinely not found
+    With ?since=<version> the request is a long poll: it waits until the status is newer than that
+    version (or ?wait= seconds pass, 25 by default) before answering.
+    """
+    since = request.args.get('since', type=int)
+    if since is not None:
+        wait = min(request.args.get('wait', 25, type=float), STATUS_LONG_POLL_SECONDS)
+        if wait_for_export_status(job_id, since, 0) == since:
+            version = wait_for_export_status(job_id, since, max(wait, 0))
+            if version is not None and version > since:
+                # Let a burst of page updates settle so a busy job is not re-polled after every page
+                time.sleep(STATUS_EVENT_INTERVAL)
+    
+    status = export_job_status(job_id)
+    if status is None:
+        # Never started, or finished long enough ago to be dropped
         return jsonify({
             'error': 'Job not found or completed',
             'status': 'unknown'
@@ -410,6 +582,66 @@ def api_export_status(job_id):
     
     return jsonify(status)
 
+@app.route('/api/export_status/<job_id>/stream')
+def api_export_status_stream(job_id):
+    """
+    Server-Sent Events stream of an export job's status.
+    
+    Sends the current status at once and then a new event whenever the status changes, until the
+    job finishes. An 'unknown' event is sent if the job does not exist or was dropped.
+    """
+    def events():
+        # Browsers reconnect after this many milliseconds when the stream ends early
+        yield "retry: 2000\n\n"
+        version = 0
+        closes_at = time.monotonic() + STATUS_STREAM_SECONDS
+        while time.monotonic() < closes_at:
+            current = wait_for_export_status(job_id, version, STATUS_KEEPALIVE_SECONDS)
+            if current is None:
+                yield "event: unknown\ndata: {}\n\n"
+                return
+            if current == version:
+                # Comment line; keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            
+            status = export_job_status(job_id)
+            if status is None:
+                continue
+            version = status['version']
+            yield f"id: {version}\ndata: {json.dumps(status)}\n\n"
+            if status.get('status') in FINISHED_STATES:
+                return
+            time.sleep(STATUS_EVENT_INTERVAL)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/export_jobs')
+def api_export_jobs():
+    """API endpoint listing the running and recently finished export jobs."""
+    states = tuple(request.args.getlist('status')) or None
+    return jsonify(list_export_jobs(states))
+
+@app.route('/api/export_jobs/<job_id>/<action>', methods=['POST'])
+def api_control_export_job(job_id, action):
+    """API endpoint to cancel, pause or resume a queued or running export job."""
+    scheduler = get_job_scheduler()
+    actions = {'cancel': scheduler.cancel, 'pause': scheduler.pause, 'resume': scheduler.resume}
+    if action not in actions:
+        return jsonify({'error': f"Unknown action '{action}'"}), 400
+    if actions[action](job_id):
+        return jsonify({'job_id': job_id, 'action': action, 'schedule': scheduler.job(job_id)})
+    if scheduler.job(job_id) is None and request_export_job_action(job_id, action):
+        # Another web worker runs the job and applies the request within a second
+        return jsonify({'job_id': job_id, 'action': action, 'requested': True}), 202
+    return jsonify({'error': 'Job not found or already finished'}), 404
+
+@app.route('/api/scheduler')
+def api_scheduler():
+    """API endpoint with the worker slots, queue depth and waiting times of the job scheduler."""
+    return jsonify(get_job_scheduler().stats())
+
 @app.route('/yield', methods=['GET', 'POST'])
 def yield_analysis():
     """Colony coin yield analysis page."""
@@ -429,13 +661,20 @@ def yield_analysis():
         end_date = request.form.get('end_date')
         window_days = int(request.form.get('window_days', 7))
         chart_type = request.form.get('chart_type', 'line')
+        use_cache = request.form.get('use_cache') == 'on'
+        use_store = request.form.get('use_store') == 'on'
         
         # Create a unique job ID for tracking progress
         job_id = str(uuid.uuid4())
         
         try:
             # Initialize analyzer
-            analyzer = ColonyYieldAnalyzer(window_days=window_days)
+            analyzer = ColonyYieldAnalyzer(
+                base_url=API_BASE_URL,
+                window_days=window_days,
+                cache=get_response_cache() if use_cache else None,
+                store=get_transaction_store() if use_store else None
+            )
             
             # Generate the report
             report = analyzer.generate_yield_report(
@@ -0,0 +1,380 @@
+"""
+Explorer Request Scheduling
+
+Paces and retries explorer API calls for every client that talks to the same
+explorer. A token bucket caps the request rate, an AIMD limiter finds the
+number of concurrent requests the explorer sustains (additive increase on
+success, multiplicative decrease when throttled), 429 / Retry-After responses
+pause the whole explorer, and failed requests are retried with exponential
+backoff and full jitter. Explorer API calls are read-only GETs, so retrying
+(and hedging) them is always safe. The scheduler also keeps a rolling window
+of response latencies that clients use to decide when to hedge a slow request.
+Threads and asyncio tasks share the same limits: every blocking wait has an
+awaitable counterpart that never blocks the event loop.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT = 10.0  # Requests per second per explorer
+DEFAULT_BURST = 10
+DEFAULT_INITIAL_CONCURRENCY = 8
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5  # Seconds
+DEFAULT_BACKOFF_MAX = 30.0  # Seconds
+LATENCY_WINDOW = 500  # Recent responses used for latency percentiles
+MIN_LATENCY_SAMPLES = 20  # Percentiles are not trusted below this many samples
+
+# HTTP statuses worth retrying; 429 additionally means the explorer is throttling us
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate, with support for explorer-imposed pauses."""
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_BURST):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Maximum number of tokens that can accumulate
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate, burst=None):
+        """Change the refill rate (and optionally the burst size)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if burst is not None:
+                self.burst = burst
+                self._tokens = min(self._tokens, burst)
+
+    def _refill(self, now):
+        """Add the tokens earned since the last update. Caller must hold the lock."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds):
+        """Hand out no tokens for the given number of seconds (e.g. from Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _try_acquire(self):
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until the next one may be available
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while wait := self._try_acquire():
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait on the event loop until a token is available and take it."""
+        while wait := self._try_acquire():
+            await asyncio.sleep(wait)
+
+
+class AimdLimiter:
+    """Concurrency limit adjusted by additive increase / multiplicative decrease."""
+
+    def __init__(self, initial=DEFAULT_INITIAL_CONCURRENCY, minimum=1, maximum=DEFAULT_MAX_CONCURRENCY,
+                 decrease_factor=0.5):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial (int): Starting number of concurrent requests
+            minimum (int): Lowest limit the decrease can reach
+            maximum (int): Highest limit the increase can reach
+            decrease_factor (float): Factor applied to the limit when throttled
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()
+
+    def acquire(self):
+        """Block until the number of in-flight requests is below the limit."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """Wait on the event loop until the number of in-flight requests is below the limit."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    try:
+                        self._async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        # This task was already picked to wake up; pass the wake-up on
+                        self._wake()
+                raise
+
+    def _wake(self):
+        """Wake one waiting thread and one waiting task. Caller must hold the lock."""
+        self._cond.notify()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(_set_waiter_result, waiter)
+                return
+
+    def release(self):
+        """Mark a request as finished."""
+        with self._cond:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self):
+        """Grow the limit by one request per limit's worth of successes."""
+        with self._cond:
+            if self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._wake()
+
+    def on_throttle(self):
+        """Shrink the limit after the explorer pushed back."""
+        with self._cond:
+            # Requests already in flight when the first 429 arrived all fail together; count them once
+            now = time.monotonic()
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            logger.info(f"Explorer is throttling requests, concurrency limit lowered to {int(self.limit)}")
+
+
+def _set_waiter_result(waiter):
+    """Resolve a limiter waiter unless its task was cancelled meanwhile."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_BACKOFF_BASE,
+                 max_delay=DEFAULT_BACKOFF_MAX):
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries (int): Retries after the first attempt
+            base_delay (float): Backoff ceiling of the first retry in seconds
+            max_delay (float): Upper bound of any backoff in seconds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): Number of the attempt that just failed (0 for the first)
+            retry_after (float): Delay requested by the explorer, if any
+
+        Returns:
+            float: Delay in seconds
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): Header value, either seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_rate_limit_response(data):
+    """Whether an HTTP 200 explorer response is actually a rate limit error."""
+    if not isinstance(data, dict) or data.get('status') != '0':
+        return False
+    text = f"{data.get('message', '')} {data.get('result', '')}".lower()
+    return 'rate limit' in text
+
+
+class RequestScheduler:
+    """Rate limit, concurrency control and retry policy shared by all clients of one explorer."""
+
+    def __init__(self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_BURST, retry_policy=None, limiter=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate (float): Maximum requests per second
+            burst (int): Requests that may be sent back to back after an idle period
+            retry_policy (RetryPolicy): Backoff policy; defaults to RetryPolicy()
+            limiter (AimdLimiter): Concurrency limiter; defaults to AimdLimiter()
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = limiter or AimdLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._latency_lock = threading.Lock()
+
+    def record_latency(self, seconds):
+        """Record the latency of a successful response."""
+        with self._latency_lock:
+            self._latencies.append(seconds)
+
+    def latency_percentile(self, percentile):
+        """
+        Get a percentile of the recent response latencies.
+
+        Args:
+            percentile (float): Percentile between 0 and 1 (e.g. 0.95)
+
+        Returns:
+            float: Latency in seconds, or None while there are too few samples
+        """
+        with self._latency_lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    @contextmanager
+    def slot(self):
+        """Wait for a concurrency slot and a rate token, and hold the slot while the request runs."""
+        self.limiter.acquire()
+        try:
+            self.bucket.acquire()
+            yield
+        finally:
+            self.limiter.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Awaitable counterpart of slot() for requests sent from an event loop."""
+        await self.limiter.acquire_async()
+        try:
+            await self.bucket.acquire_async()
+            yield
+        finally:
+            self.limiter.release()
+
+    def on_success(self):
+        """Record a successful request."""
+        self.limiter.on_success()
+
+    def on_throttle(self, retry_after=None):
+        """
+        Record that the explorer throttled a request.
+
+        Args:
+            retry_after (float): Seconds the explorer asked us to wait, if given
+        """
+        self.limiter.on_throttle()
+        if retry_after:
+            logger.info(f"Explorer asked to retry after {retry_after:.1f}s, pausing requests")
+            self.bucket.pause(retry_after)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def configure_request_scheduler(base_url, rate_limit=None, max_retries=None):
+    """
+    Adjust the shared scheduler of an explorer.
+
+    Args:
+        base_url (str): Explorer API base URL
+        rate_limit (float): Maximum requests per second, or None to keep the current rate
+        max_retries (int): Retries per request, or None to keep the current policy
+
+    Returns:
+        RequestScheduler: The updated scheduler
+    """
+    scheduler = get_request_scheduler(base_url)
+    if rate_limit:
+        scheduler.bucket.set_rate(rate_limit, burst=max(1, int(rate_limit)))
+    if max_retries is not None:
+        scheduler.retry_policy.max_retries = max_retries
+    return scheduler
+
+
+def get_request_scheduler(base_url):
+    """
+    Get the scheduler shared by every client of an explorer, creating it on first use.
+
+    Args:
+        base_url (str): Explorer API base URL
+
+    Returns:
+        RequestScheduler: Shared scheduler
+    """
+    with _schedulers_lock:
+        if base_url not in _schedulers:
+            _schedulers[base_url] = RequestScheduler()
+        return _schedulers[base_url]
@@ -0,0 +1,228 @@
+"""
+Explorer Response Cache
+
+SQLite-backed cache for explorer API responses, keyed by the API base URL and
+the normalized query parameters. Full pages of confirmed history never change,
+so they are kept until evicted; pages near the chain head (partial pages,
+unconfirmed rows or newest-first listings) only live for a short TTL. When the
+cache grows past its size limit the least recently used entries are evicted.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_RESPONSE_CACHE_FILE = f"{DEFAULT_CACHE_DIR}/explorer_responses.sqlite"
+DEFAULT_MAX_CACHE_BYTES = 512 * 1024 * 1024
+DEFAULT_HEAD_TTL = 60  # Seconds to keep pages that may still change
+IMMUTABLE_CONFIRMATIONS = 1000  # Rows this deep are treated as final
+
+# Parameters that never influence the response body
+IGNORED_PARAMS = {'apikey'}
+
+
+def normalize_params(params):
+    """
+    Build a stable string representation of query parameters.
+
+    Args:
+        params (dict): Query parameters
+
+    Returns:
+        str: Parameters sorted by name with values converted to strings
+    """
+    return json.dumps(
+        sorted((str(key), str(value)) for key, value in params.items()
+               if key not in IGNORED_PARAMS and value is not None)
+    )
+
+
+def is_immutable_page(params, data):
+    """
+    Decide whether an API response describes history that can no longer change.
+
+    A transaction list page is immutable when it is full, sorted oldest first
+    (so new transactions can only land on later pages) and every row is
+    confirmed deeply enough to rule out reorgs.
+
+    Args:
+        params (dict): Query parameters of the request
+        data (dict): Decoded API response
+
+    Returns:
+        bool: True if the response can be cached without expiry
+    """
+    if params.get('module') != 'account' or str(params.get('sort', 'asc')) != 'asc':
+        return False
+
+    rows = data.get('result') if isinstance(data, dict) else None
+    if not isinstance(rows, list) or not rows:
+        return False
+
+    try:
+        if len(rows) < int(params.get('offset', 0)):
+            return False  # The last page still grows as new transactions arrive
+        return all(int(row.get('confirmations', 0)) >= IMMUTABLE_CONFIRMATIONS for row in rows)
+    except (ValueError, TypeError, AttributeError):
+        return False
+
+
+class ResponseCache:
+    """Persistent, size-bounded cache of explorer API responses."""
+
+    def __init__(self, path=DEFAULT_RESPONSE_CACHE_FILE, max_bytes=DEFAULT_MAX_CACHE_BYTES,
+                 head_ttl=DEFAULT_HEAD_TTL):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path (str): SQLite database file
+            max_bytes (int): Maximum total size of cached response bodies
+            head_ttl (int): Seconds to keep responses that may still change
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.head_ttl = head_ttl
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(base_url, params):
+        """Cache key for a request."""
+        return f"{base_url}?{normalize_params(params)}"
+
+    def get(self, base_url, params):
+        """
+        Look up a cached response.
+
+        Args:
+            base_url (str): Explorer API base URL
+            params (dict): Query parameters
+
+        Returns:
+            dict: Decoded response, or None on a miss or expired entry
+        """
+        key = self.make_key(base_url, params)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            body, expires = row
+            if expires is not None and expires < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        try:
+            return json.loads(zlib.decompress(body))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Discarding corrupt cache entry: {e}")
+            return None
+
+    def put(self, base_url, params, data, immutable=None):
+        """
+        Store a response.
+
+        Args:
+            base_url (str): Explorer API base URL
+            params (dict): Query parameters
+            data (dict): Decoded response
+            immutable (bool): Force the expiry policy; detected from the response when None
+        """
+        if immutable is None:
+            immutable = is_immutable_page(params, data)
+
+        key = self.make_key(base_url, params)
+        body = zlib.compress(json.dumps(data).encode('utf-8'))
+        now = time.time()
+        expires = None if immutable else now + self.head_ttl
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), expires, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit. Caller must hold the lock."""
+        self._conn.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limit so we don't evict on every insert
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total - freed <= target:
+                break
+            stale_keys.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+        logger.debug(f"Evicted {len(stale_keys)} cached responses ({freed} bytes)")
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Get the process-wide response cache, opening it on first use.
+
+    Returns:
+        ResponseCache: Shared cache instance
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
@@ -0,0 +1,196 @@
+"""
+Incremental Sync State
+
+Remembers, for every incrementally synced dataset, the highest block and
+timestamp already exported for each (address, contract, action) key together
+with the size of the dataset file after the last successful sync. Later runs
+query from that block onward and only append the new rows.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_STATE_FILE = "exports/sync_state.json"
+
+
+def sync_key(address, token_contract, action):
+    """
+    Build the cursor key for an address / contract / API action combination.
+
+    Args:
+        address (str): Blockchain address
+        token_contract (str): Token contract filter, or None
+        action (str): Explorer API action ('tokentx', 'tokennfttx', ...)
+
+    Returns:
+        str: Cursor key
+    """
+    return f"{address.lower()}|{(token_contract or '').lower()}|{action}"
+
+
+def transaction_key(tx):
+    """Identify a transfer by transaction hash and log index."""
+    return f"{tx.get('hash', '')}:{tx.get('logIndex', '')}"
+
+
+class SyncCursor:
+    """
+    Block position of an address within a transaction listing.
+
+    Incremental datasets keep one cursor per (address, contract, action) key,
+    and block-cursor pagination uses one to walk an address page by page. The
+    next request starts at last_block (inclusive) because more transfers may
+    share that block; the transfers already seen from it are remembered in
+    boundary_keys so they are not written twice. A descending cursor walks
+    from the newest block down instead.
+    """
+
+    def __init__(self, state=None, descending=False):
+        """
+        Initialize the cursor.
+
+        Args:
+            state (dict): Saved cursor state, or None for a key that was never synced
+            descending (bool): Whether transactions arrive newest first
+        """
+        state = state or {}
+        self.descending = descending
+        self.last_block = state.get('last_block')
+        self.last_timestamp = state.get('last_timestamp')
+        self.boundary_keys = set(state.get('boundary_keys', []))
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    @property
+    def start_block(self):
+        """First block to query, or None to fetch the whole history."""
+        return self.last_block
+
+    def filter_page(self, transactions):
+        """
+        Drop transfers that were already exported and advance the cursor.
+
+        Args:
+            transactions (list): Transactions of a page, in API order
+
+        Returns:
+            list: Transactions that are new to the dataset
+        """
+        new_transactions = []
+        with self._lock:
+            for tx in transactions:
+                try:
+                    block = int(tx.get('blockNumber', 0))
+                except (ValueError, TypeError):
+                    block = 0
+                key = transaction_key(tx)
+
+                if self.last_block is not None and self._before(block, self.last_block):
+                    self.duplicates += 1
+                    continue
+                if block == self.last_block and key in self.boundary_keys:
+                    self.duplicates += 1
+                    continue
+
+                new_transactions.append(tx)
+                if self.last_block is None or self._before(self.last_block, block):
+                    self.last_block = block
+                    self.boundary_keys = {key}
+                    try:
+                        self.last_timestamp = int(tx.get('timeStamp', 0))
+                    except (ValueError, TypeError):
+                        pass
+                else:
+                    self.boundary_keys.add(key)
+        return new_transactions
+
+    def _before(self, block, other):
+        """Whether block comes before other in the cursor's direction."""
+        return block > other if self.descending else block < other
+
+    def to_dict(self):
+        """Serialize the cursor for the state file."""
+        return {
+            'last_block': self.last_block,
+            'last_timestamp': self.last_timestamp,
+            'boundary_keys': sorted(self.boundary_keys)
+        }
+
+
+class SyncState:
+    """JSON-backed store of incremental sync cursors, grouped by dataset file."""
+
+    def __init__(self, path=DEFAULT_SYNC_STATE_FILE):
+        """
+        Load the sync state.
+
+        Args:
+            path (str): State file path
+        """
+        self.path = path
+        self.datasets = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.datasets = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.error(f"Error loading sync state: {e}")
+
+    def dataset(self, output_file):
+        """
+        Get the saved state of a dataset.
+
+        Args:
+            output_file (str): Dataset file path
+
+        Returns:
+            dict: Dataset state with 'bytes', 'rows' and 'cursors', or None if it was never synced
+        """
+        return self.datasets.get(os.path.normpath(output_file))
+
+    def cursor(self, output_file, key):
+        """
+        Get the cursor of a key within a dataset.
+
+        Args:
+            output_file (str): Dataset file path
+            key (str): Cursor key from sync_key()
+
+        Returns:
+            SyncCursor: Cursor positioned after the last synced transfer
+        """
+        dataset = self.dataset(output_file) or {}
+        return SyncCursor(dataset.get('cursors', {}).get(key))
+
+    def update(self, output_file, bytes_written, rows, cursors):
+        """
+        Record a successful sync of a dataset and save the state file.
+
+        Args:
+            output_file (str): Dataset file path
+            bytes_written (int): Size of the dataset file after the sync
+            rows (int): Number of data rows in the dataset
+            cursors (dict): Cursor key -> SyncCursor for the keys that were synced
+        """
+        dataset = self.datasets.setdefault(os.path.normpath(output_file), {'cursors': {}})
+        dataset['bytes'] = bytes_written
+        dataset['rows'] = rows
+        dataset['updated'] = datetime.now().isoformat()
+        for key, cursor in cursors.items():
+            dataset['cursors'][key] = cursor.to_dict()
+        self.save()
+
+    def save(self):
+        """Atomically write the state file."""
+        state_dir = os.path.dirname(self.path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.datasets, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,231 @@
+"""
+Token Metadata Cache
+
+Resolves token type (ERC-20 / ERC-721), name, symbol and decimals for a token
+contract once and shares the result between pages, addresses, export jobs and
+the Colony yield analyzer. Entries live in an in-memory LRU with a TTL and can
+optionally be persisted to a JSON file so they survive restarts.
+
+Lookups go through an ExplorerClient, so they get its timeouts, retries, rate
+limits and mirrors. Failed lookups are remembered for a short while so a
+contract the explorer cannot resolve is not asked for again on every page.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_TOKEN_CACHE_FILE = f"{DEFAULT_CACHE_DIR}/token_metadata.json"
+DEFAULT_TOKEN_CACHE_SIZE = 256
+DEFAULT_TOKEN_CACHE_TTL = 24 * 60 * 60  # Token metadata rarely changes, refresh daily
+DEFAULT_TOKEN_FAILURE_TTL = 60  # Seconds before a contract that failed to resolve is tried again
+
+
+class TokenMetadataCache:
+    """LRU + TTL cache for token contract metadata with an optional on-disk store."""
+
+    def __init__(self, max_entries=DEFAULT_TOKEN_CACHE_SIZE, ttl=DEFAULT_TOKEN_CACHE_TTL, cache_file=None,
+                 failure_ttl=DEFAULT_TOKEN_FAILURE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of contracts kept in memory
+            ttl (int): Seconds before an entry is considered stale and fetched again
+            cache_file (str): Optional JSON file used to persist entries between runs
+            failure_ttl (int): Seconds a failed lookup is remembered before it is retried
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.failure_ttl = failure_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._failures = {}  # Cache key -> time of the last failed lookup
+        self._key_locks = {}  # Cache key -> lock held by the thread fetching it
+        self._lock = threading.RLock()
+        self._load()
+
+    @staticmethod
+    def _key(base_url, contract):
+        return f"{base_url}|{contract.lower()}"
+
+    def _load(self):
+        """Load persisted entries from the cache file, if any."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                stored = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error loading token metadata cache: {e}")
+            return
+
+        now = time.time()
+        # Keep the most recently fetched entries when the file holds more than fits
+        fresh = [(key, entry) for key, entry in stored.items() if now - entry.get('fetched_at', 0) < self.ttl]
+        fresh.sort(key=lambda item: item[1]['fetched_at'])
+        for key, entry in fresh[-self.max_entries:]:
+            self._entries[key] = entry
+
+    def _save(self):
+        """Write the in-memory entries to the cache file. Caller must hold the lock."""
+        if not self.cache_file:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except (IOError, OSError) as e:
+            logger.warning(f"Error saving token metadata cache: {e}")
+
+    def get(self, client, contract):
+        """
+        Get metadata for a token contract, fetching it from the explorer on a miss.
+
+        Args:
+            client (ExplorerClient): Client used to query the explorer
+            contract (str): Token contract address
+
+        Returns:
+            dict: Token metadata with 'type', 'name', 'symbol' and 'decimals' keys,
+                  or None if the explorer could not resolve the contract
+        """
+        key = self._key(client.base_url, contract)
+
+        cached, key_lock = self._lookup(key)
+        if key_lock is None:
+            return cached
+
+        # Only workers asking for the same contract wait for each other; the
+        # request runs outside the cache lock so other contracts stay readable
+        with key_lock:
+            cached, _ = self._lookup(key, count=False)
+            if cached is not None or self._failed_recently(key):
+                return cached
+
+            with self._lock:
+                self.misses += 1
+            metadata = fetch_token_metadata(client, contract)
+
+            with self._lock:
+                if metadata is None:
+                    self._failures[key] = time.time()
+                    return None
+                self._failures.pop(key, None)
+                self._entries[key] = metadata
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._save()
+                return dict(metadata)
+
+    def _lookup(self, key, count=True):
+        """
+        Look a key up in memory.
+
+        Returns:
+            tuple: (metadata, None) when the key is cached or failed recently,
+                   otherwise (None, lock to hold while fetching it)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry['fetched_at'] < self.ttl:
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return dict(entry), None
+            if self._failed_recently(key):
+                return None, None
+            return None, self._key_locks.setdefault(key, threading.Lock())
+
+    def _failed_recently(self, key):
+        """Whether the last lookup of a key failed less than failure_ttl seconds ago."""
+        with self._lock:
+            failed_at = self._failures.get(key)
+            return failed_at is not None and time.time() - failed_at < self.failure_ttl
+
+    def clear(self):
+        """Remove all cached entries from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self._save()
+
+
+def fetch_token_metadata(client, contract):
+    """
+    Fetch token metadata from the explorer's getToken endpoint.
+
+    Args:
+        client (ExplorerClient): Client used to query the explorer
+        contract (str): Token contract address
+
+    Returns:
+        dict: Token metadata, or None if the lookup failed
+    """
+    params = {
+        'module': 'token',
+        'action': 'getToken',
+        'contractaddress': contract
+    }
+    try:
+        # The metadata cache keeps the result, so the response cache is not needed
+        token_info = client.get(params, use_cache=False)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Error fetching token metadata for {contract}: {e}")
+        return None
+
+    if not isinstance(token_info, dict):
+        logger.warning(f"Unexpected token metadata response for {contract}")
+        return None
+
+    if token_info.get('status') != '1' or not isinstance(token_info.get('result'), dict):
+        logger.warning(f"Token metadata lookup failed for {contract}: {token_info.get('message')}")
+        return None
+
+    result = token_info['result']
+    try:
+        decimals = int(result.get('decimals')) if result.get('decimals') not in (None, '') else None
+    except (ValueError, TypeError):
+        decimals = None
+
+    return {
+        'contract': contract,
+        'type': result.get('type'),
+        'name': result.get('name'),
+        'symbol': result.get('symbol'),
+        'decimals': decimals,
+        'fetched_at': time.time()
+    }
+
+
+# Shared cache used by the exporter and the yield analyzer
+token_metadata_cache = TokenMetadataCache(cache_file=DEFAULT_TOKEN_CACHE_FILE)
+
+
+def get_token_metadata(client, contract):
+    """
+    Get metadata for a token contract from the shared cache.
+
+    Args:
+        client (ExplorerClient): Client used to query the explorer on a miss
+        contract (str): Token contract address
+
+    Returns:
+        dict: Token metadata, or None if it could not be resolved
+    """
+    return token_metadata_cache.get(client, contract)
@@ -0,0 +1,195 @@
+"""
+Columnar Transaction Formatting
+
+Turns a page of explorer transactions into export columns in one batch
+instead of formatting every transaction on its own. Timestamps of a whole page
+are converted to local time with NumPy, and token values are scaled by their
+decimals with exact fixed-point arithmetic on the digit strings, so values
+beyond float precision (18-decimal tokens) keep every digit. The source
+transactions (API dicts or compact records, see transaction_records.py) are
+never modified.
+"""
+
+import time
+from datetime import datetime
+from operator import itemgetter
+
+import numpy as np
+
+from transaction_records import TransactionRecord
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# UTC offsets (and daylight saving switches) change on quarter-hour boundaries
+# only, so one offset lookup per quarter hour covers every timestamp in it
+OFFSET_BUCKET_SECONDS = 900
+MAX_TIMESTAMP = 253402214400  # 9999-12-31, the last day datetime can format
+
+
+def format_timestamp(value):
+    """
+    Format a Unix timestamp as local time.
+
+    Args:
+        value (str or int): Unix timestamp in seconds
+
+    Returns:
+        str: 'YYYY-MM-DD HH:MM:SS', or the value unchanged if it is empty or not a timestamp
+    """
+    if not value:
+        return value
+    try:
+        return datetime.fromtimestamp(int(value)).strftime(TIMESTAMP_FORMAT)
+    except (ValueError, TypeError, OverflowError, OSError):
+        return value
+
+
+def format_timestamps(values):
+    """
+    Format a column of Unix timestamps as local time.
+
+    Args:
+        values (list): Unix timestamps in seconds
+
+    Returns:
+        list: Same result as format_timestamp() for every value
+    """
+    if not values:
+        return []
+    try:
+        seconds = np.array(values, dtype=np.int64)
+    except (ValueError, TypeError, OverflowError):
+        # Empty or malformed values somewhere in the column
+        return [format_timestamp(value) for value in values]
+    if seconds.min() < 0 or seconds.max() >= MAX_TIMESTAMP or not all(values):
+        return [format_timestamp(value) for value in values]
+
+    buckets, inverse = np.unique(seconds // OFFSET_BUCKET_SECONDS, return_inverse=True)
+    offsets = np.array([time.localtime(int(bucket) * OFFSET_BUCKET_SECONDS).tm_gmtoff for bucket in buckets],
+                       dtype=np.int64)
+    text = np.datetime_as_string((seconds + offsets[inverse]).astype('datetime64[s]'), unit='s')
+    # 'YYYY-MM-DDTHH:MM:SS' -> 'YYYY-MM-DD HH:MM:SS' by overwriting the separator in place
+    text.view(np.uint32).reshape(len(text), -1)[:, 10] = ord(' ')
+    return text.tolist()
+
+
+def scale_token_value(value, decimals):
+    """
+    Scale a raw token amount by its decimals without rounding.
+
+    Args:
+        value (str or int): Raw integer amount, e.g. '1500000000000000000'
+        decimals (str or int): Token decimals, e.g. '18'
+
+    Returns:
+        str: Exact decimal amount without trailing zeros, e.g. '1.5', or the
+             value unchanged if either argument is not an integer
+    """
+    if type(value) is str and type(decimals) is str and value.isascii() and value.isdigit() and decimals.isdigit():
+        # Common case: plain digit strings from the explorer, no integer conversion needed
+        digits = value.lstrip('0') or '0'
+        sign = ''
+        places = int(decimals)
+    else:
+        try:
+            amount, places = int(value), int(decimals)
+        except (ValueError, TypeError):
+            return value
+        if places < 0:
+            return str(amount * 10 ** -places)
+        sign = '-' if amount < 0 else ''
+        digits = str(abs(amount))
+
+    if places == 0:
+        return sign + digits
+    digits = digits.rjust(places + 1, '0')
+    whole, fraction = digits[:-places], digits[-places:].rstrip('0')
+    return f"{sign}{whole}.{fraction}" if fraction else sign + whole
+
+
+def scale_token_values(values, decimals):
+    """
+    Scale a column of raw token amounts by their decimals without rounding.
+
+    Args:
+        values (list): Raw integer amounts
+        decimals (list): Token decimals of every amount
+
+    Returns:
+        list: Same result as scale_token_value() for every value
+    """
+    places = decimals[0] if decimals else None
+    if not (type(places) is str and places.isdigit() and decimals.count(places) == len(decimals) and all(values)):
+        return [scale_token_value(value, places) for value, places in zip(values, decimals)]
+
+    # One token per page is the common case: cut every digit string at the same position
+    places = int(places)
+    digits = np.array(values)
+    if digits.dtype.kind != 'U' or places == 0:
+        return [scale_token_value(value, places) for value in values]
+    width = max(digits.dtype.itemsize // 4, places + 1)
+    digits = np.char.rjust(digits, width, '0')
+    codes = digits.view(np.uint32).reshape(len(digits), width)
+    if not ((codes >= ord('0')) & (codes <= ord('9'))).all():
+        return [scale_token_value(value, places) for value in values]
+
+    whole = np.ascontiguousarray(codes[:, :width - places]).view(f'U{width - places}').ravel()
+    fraction = np.ascontiguousarray(codes[:, width - places:]).view(f'U{places}').ravel()
+    whole = np.char.lstrip(whole, '0')
+    whole[whole == ''] = '0'
+    fraction = np.char.rstrip(fraction, '0')
+    return np.where(fraction == '', whole, np.char.add(np.char.add(whole, '.'), fraction)).tolist()
+
+
+def _column(transactions, field, default=''):
+    """Values of one field of every transaction, default where a transaction lacks it."""
+    if transactions and isinstance(transactions[0], TransactionRecord):
+        return type(transactions[0]).column(transactions, field, default)
+    try:
+        return list(map(itemgetter(field), transactions))
+    except KeyError:
+        return [tx.get(field, default) for tx in transactions]
+
+
+def transaction_columns(transactions, fields):
+    """
+    Extract and format the export columns of a page of transactions.
+
+    Args:
+        transactions (list): Transaction records from the API; left unmodified
+        fields (list): Transaction fields to extract, in column order
+
+    Returns:
+        list: One list of values per field
+    """
+    columns = []
+    for field in fields:
+        column = _column(transactions, field)
+        if field == 'timeStamp':
+            column = format_timestamps(column)
+        elif field == 'value':
+            decimals = _column(transactions, 'tokenDecimal', None)
+            if None in decimals:
+                # Only transfers that carry their token's decimals are scaled
+                column = [
+                    scale_token_value(value, places) if places is not None else value
+                    for value, places in zip(column, decimals)
+                ]
+            else:
+                column = scale_token_values(column, decimals)
+        columns.append(column)
+    return columns
+
+
+def transaction_rows(transactions, fields):
+    """
+    Format a page of transactions as export rows.
+
+    Args:
+        transactions (list): Transaction records from the API; left unmodified
+        fields (list): Transaction fields to extract, in column order
+
+    Returns:
+        list: One tuple of values per transaction
+    """
+    return list(zip(*transaction_columns(transactions, fields))) if transactions else []
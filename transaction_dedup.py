@@ -0,0 +1,211 @@
+"""
+Cross-Address Transaction Deduplication
+
+A transfer between two addresses of the same batch export is returned for both
+of them. Batch exports tag every row with a key built from the transaction
+hash, log index and token ID, and drop a row when an earlier address already
+wrote the same key while the per-address results are merged in input order.
+The first address keeps the transfer exactly as a single-address export would
+list it; rows repeated within one address's own listing are left alone.
+
+Keys are kept as 16-byte digests in an exact in-memory table. Once a batch holds
+more than memory_keys distinct transfers the table spills to a temporary SQLite
+database on disk, with a Bloom filter in front of it: most keys are new, and the
+filter answers those without a disk lookup. Only keys the filter reports as
+possibly seen are looked up, so the result stays exact.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Internal transactions have no log index; their trace position and parties tell
+# the calls of one transaction apart
+INTERNAL_KEY_FIELDS = ('hash', 'traceId', 'index', 'from', 'to', 'value')
+DEFAULT_MEMORY_KEYS = 500000  # About 45 MB of digests before spilling to disk
+BLOOM_CAPACITY_FACTOR = 8  # The Bloom filter is sized for this many times memory_keys
+BLOOM_ERROR_RATE = 0.01
+SQLITE_MAX_PARAMETERS = 500
+
+
+def transaction_key(tx):
+    """
+    Build the dedup key of a transaction.
+
+    Args:
+        tx (dict): Transaction record from the API
+
+    Returns:
+        str: 'hash:logIndex:tokenID' for token transfers, the hash, trace position and
+             parties for other records, or '' for a record without a hash (never deduplicated)
+    """
+    if not tx.get('hash'):
+        return ''
+    if tx.get('logIndex') not in (None, ''):
+        return f"{tx['hash']}:{tx['logIndex']}:{tx.get('tokenID', '')}"
+    return ':'.join(str(tx.get(field, '')) for field in INTERNAL_KEY_FIELDS)
+
+
+def transaction_keys(transactions):
+    """Dedup keys of a page of transactions (see transaction_key())."""
+    return [transaction_key(tx) for tx in transactions]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte digests, checked and filled a batch at a time."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        """
+        Size the filter.
+
+        Args:
+            capacity (int): Number of keys the filter should hold at the given error rate
+            error_rate (float): False positive rate at capacity
+        """
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, digests):
+        # Double hashing: the two 64-bit halves of every digest give all bit positions
+        halves = np.frombuffer(b''.join(digests), dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        return (halves[:, :1] + steps * (halves[:, 1:] | np.uint64(1))) % np.uint64(self.size)
+
+    def add(self, digests):
+        """Add a batch of digests."""
+        if digests:
+            positions = self._positions(digests).ravel()
+            np.bitwise_or.at(self._bits, positions // 8, (1 << (positions % 8)).astype(np.uint8))
+
+    def contains(self, digests):
+        """
+        Check a batch of digests.
+
+        Returns:
+            numpy.ndarray: False for digests that were certainly never added, True for possibly added ones
+        """
+        if not digests:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(digests)
+        return ((self._bits[positions // 8] >> (positions % 8).astype(np.uint8)) & 1).all(axis=1)
+
+
+class TransactionDeduplicator:
+    """Remembers which part (address) first wrote every key of an export and drops other parts' copies."""
+
+    def __init__(self, memory_keys=DEFAULT_MEMORY_KEYS, spill_dir=None):
+        """
+        Initialize an empty key table.
+
+        Args:
+            memory_keys (int): Distinct keys kept in memory before spilling to disk
+            spill_dir (str): Directory of the temporary key database (default: system temp dir)
+        """
+        self.memory_keys = memory_keys
+        self.spill_dir = spill_dir
+        self.keys = 0
+        self.duplicates = 0
+        self._memory = {}
+        self._bloom = None
+        self._conn = None
+        self._path = None
+
+    def filter_rows(self, rows, part):
+        """
+        Drop rows that an earlier part already wrote and strip the key column.
+
+        Args:
+            rows (list): Rows whose last value is the dedup key (see transaction_keys())
+            part (int): Index of the address the rows belong to
+
+        Returns:
+            list: Rows to write, without their key column, in their original order
+        """
+        if not rows:
+            return []
+        keep = self._record([row[-1] for row in rows], part)
+        return [row[:-1] for row, kept in zip(rows, keep) if kept]
+
+    def _record(self, keys, part):
+        """Record a batch of keys of one part; returns whether each row should be kept."""
+        digests = [hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest() if key else None for key in keys]
+        if self._conn is None:
+            keep = []
+            for digest in digests:
+                if digest is None:
+                    keep.append(True)
+                else:
+                    owner = self._memory.setdefault(digest, part)
+                    keep.append(owner == part)
+            self.keys = len(self._memory)
+            if len(self._memory) > self.memory_keys:
+                self._spill()
+        else:
+            keep = self._record_on_disk(digests, part)
+
+        self.duplicates += len(keep) - sum(keep)
+        return keep
+
+    def _spill(self):
+        """Move the in-memory keys to a temporary SQLite table behind a Bloom filter."""
+        fd, self._path = tempfile.mkstemp(prefix='dedup-', suffix='.sqlite', dir=self.spill_dir)
+        os.close(fd)
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        # The table only lives as long as the export; crash safety is not needed
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE keys (digest BLOB PRIMARY KEY, part INTEGER NOT NULL) WITHOUT ROWID")
+        self._conn.executemany("INSERT INTO keys (digest, part) VALUES (?, ?)", self._memory.items())
+        self._conn.commit()
+
+        self._bloom = BloomFilter(self.memory_keys * BLOOM_CAPACITY_FACTOR)
+        self._bloom.add(list(self._memory))
+        logger.info(f"Deduplication keys exceeded {self.memory_keys}; moved {len(self._memory)} keys to {self._path}")
+        self._memory = {}
+
+    def _record_on_disk(self, digests, part):
+        """Record a batch of keys of one part in the spilled key table."""
+        present = [digest for digest in digests if digest is not None]
+        candidates = [digest for digest, maybe in zip(present, self._bloom.contains(present)) if maybe]
+
+        # Only keys the Bloom filter cannot rule out are looked up on disk
+        owners = {}
+        for start in range(0, len(candidates), SQLITE_MAX_PARAMETERS):
+            chunk = candidates[start:start + SQLITE_MAX_PARAMETERS]
+            owners.update(self._conn.execute(
+                f"SELECT digest, part FROM keys WHERE digest IN ({','.join('?' * len(chunk))})", chunk))
+
+        keep, added = [], []
+        for digest in digests:
+            if digest is None:
+                keep.append(True)
+                continue
+            if digest not in owners:
+                owners[digest] = part
+                added.append(digest)
+            keep.append(owners[digest] == part)
+
+        self._conn.executemany("INSERT INTO keys (digest, part) VALUES (?, ?)", ((digest, part) for digest in added))
+        self._conn.commit()
+        self._bloom.add(added)
+        self.keys += len(added)
+        return keep
+
+    def close(self):
+        """Release the key table and delete the temporary key database, if one was created."""
+        self._memory = {}
+        self._bloom = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+        self._path = None
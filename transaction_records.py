@@ -0,0 +1,140 @@
+"""
+Compact Transaction Records
+
+Explorer pages arrive as lists of dicts carrying twenty-odd fields per
+transaction, most of which an export never writes. Exports project every page
+down to the fields they need as soon as it is parsed: each transaction becomes
+a TransactionRecord, a tuple subclass without an instance dict, and the
+address and token strings that repeat on almost every row are interned so all
+records share one copy. Shard buffers and queued pages then hold a few times
+less memory than the raw dicts.
+
+Records keep the read-only dict interface the export engine uses (tx[field],
+tx.get(), 'field' in tx), so they can stand in for API dicts anywhere after
+the fetch. A field the API did not return stays absent rather than empty.
+"""
+
+import sys
+from functools import lru_cache
+from itertools import repeat
+from operator import itemgetter
+
+# Fields the export engine reads besides the exported columns: block cursors,
+# date filters, token value scaling and deduplication keys
+ENGINE_FIELDS = ('blockNumber', 'timeStamp', 'hash', 'logIndex', 'tokenID', 'tokenDecimal',
+                 'traceId', 'index', 'from', 'to', 'value')
+# Fields whose values repeat across rows; interned so every record shares one string
+INTERNED_FIELDS = frozenset(('from', 'to', 'contractAddress', 'tokenName', 'tokenSymbol', 'tokenDecimal'))
+
+_MISSING = object()  # Placeholder for a field the API did not return
+
+
+class TransactionRecord(tuple):
+    """Read-only transaction holding only the fields of its record type (see record_type())."""
+
+    __slots__ = ()
+    fields = ()
+    _positions = {}
+
+    def __getitem__(self, field):
+        value = tuple.__getitem__(self, self._positions[field])
+        if value is _MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        """Value of a field, or default if the record does not have it."""
+        position = self._positions.get(field)
+        if position is None:
+            return default
+        value = tuple.__getitem__(self, position)
+        return default if value is _MISSING else value
+
+    def __contains__(self, field):
+        return self.get(field, _MISSING) is not _MISSING
+
+    def keys(self):
+        """Fields the record has a value for."""
+        return [field for field, value in zip(self.fields, tuple.__iter__(self)) if value is not _MISSING]
+
+    def to_dict(self):
+        """The record as a plain dict of the fields it has."""
+        return {field: value for field, value in zip(self.fields, tuple.__iter__(self)) if value is not _MISSING}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    @classmethod
+    def column(cls, records, field, default=''):
+        """
+        Values of one field of a list of records of this type.
+
+        Args:
+            records (list): Records created by this type
+            field (str): Field to read
+            default: Value for records without the field
+
+        Returns:
+            list: One value per record
+        """
+        position = cls._positions.get(field)
+        if position is None:
+            return [default] * len(records)
+        values = list(map(tuple.__getitem__, records, repeat(position)))
+        if _MISSING in values:
+            return [default if value is _MISSING else value for value in values]
+        return values
+
+
+@lru_cache(maxsize=None)
+def record_type(fields):
+    """
+    Record type holding the given export fields plus the fields the engine reads.
+
+    Args:
+        fields (tuple): Exported transaction fields, in column order
+
+    Returns:
+        type: TransactionRecord subclass; equal field tuples return the same type
+    """
+    fields = tuple(dict.fromkeys(tuple(fields) + ENGINE_FIELDS))
+    return type('TransactionRecord', (TransactionRecord,), {
+        '__slots__': (),
+        'fields': fields,
+        '_positions': {field: position for position, field in enumerate(fields)},
+    })
+
+
+def _project_column(transactions, field):
+    """Values of one field of a page of API dicts, interned where they repeat."""
+    try:
+        values = list(map(itemgetter(field), transactions))
+    except KeyError:
+        values = [tx.get(field, _MISSING) for tx in transactions]
+    if field in INTERNED_FIELDS:
+        try:
+            values = list(map(sys.intern, values))
+        except TypeError:
+            # Missing or non-string values somewhere in the column
+            values = [sys.intern(value) if type(value) is str else value for value in values]
+    return values
+
+
+def project_transactions(transactions, fields):
+    """
+    Project a page of API transactions to compact records.
+
+    The page is read column by column, so building the records costs a few
+    C-level passes over the page instead of a Python loop per field.
+
+    Args:
+        transactions (list): Transaction dicts from the API; left unmodified
+        fields (tuple): Exported transaction fields (see record_type())
+
+    Returns:
+        list: One record per transaction, in page order
+    """
+    if not transactions:
+        return []
+    cls = record_type(tuple(fields))
+    return list(map(cls, zip(*[_project_column(transactions, field) for field in cls.fields])))
@@ -0,0 +1,249 @@
+"""
+Local Transaction Store
+
+SQLite database of every transaction the exporter and the yield analyzer have
+fetched, so exports can be queried and rebuilt later without calling the
+explorer again. Each row is one transaction of an address's listing (token
+transfers, internal transactions or NFT transfers), keyed by the dedup key of
+transaction_dedup.py so a page fetched twice is stored once. The full API
+record is kept as JSON, next to indexed columns for the address, contract,
+block number and timestamp that queries filter and sort on.
+
+A listing is recorded as complete once an export fetched it without date,
+block or page limits; offline exports rebuild files from complete listings
+and warn when a listing was only fetched in part.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from transaction_dedup import transaction_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = "store"
+DEFAULT_STORE_FILE = f"{DEFAULT_STORE_DIR}/transactions.sqlite"
+DEFAULT_READ_BATCH = 10000  # Transactions decoded per batch when reading a listing back
+
+
+def _int_or_none(value):
+    """Integer value of an API field, or None if it is empty or not a number."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _lower(value):
+    """Lower-cased address, or '' for a missing one."""
+    return value.lower() if isinstance(value, str) else ''
+
+
+class TransactionStore:
+    """Persistent, indexed store of fetched transactions."""
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        """
+        Open (or create) the store database.
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        store_dir = os.path.dirname(path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                address TEXT NOT NULL,
+                action TEXT NOT NULL,
+                tx_key TEXT NOT NULL,
+                block_number INTEGER,
+                time_stamp INTEGER,
+                log_index INTEGER,
+                contract_address TEXT NOT NULL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (address, action, tx_key)
+            )
+        """)
+        # Listings are read in block order; the other indexes serve queries across addresses
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_address "
+                           "ON transactions (address, action, block_number)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_contract "
+                           "ON transactions (contract_address, block_number)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_block ON transactions (block_number)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (time_stamp)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS listings (
+                address TEXT NOT NULL,
+                action TEXT NOT NULL,
+                contract TEXT NOT NULL,
+                complete INTEGER NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (address, action, contract)
+            )
+        """)
+        self._conn.commit()
+
+    def add_transactions(self, address, action, transactions):
+        """
+        Store a page of transactions of an address's listing.
+
+        Transactions already in the store are updated in place, so they keep
+        their position in the listing.
+
+        Args:
+            address (str): Address the listing was fetched for
+            action (str): Explorer API action of the listing ('tokentx', 'tokentxlistinternal', ...)
+            transactions (list): Transaction dicts from the API
+
+        Returns:
+            int: Number of transactions written
+        """
+        address = _lower(address)
+        rows = []
+        for tx in transactions:
+            body = json.dumps(tx, separators=(',', ':'))
+            rows.append((
+                address, action, transaction_key(tx) or body,
+                _int_or_none(tx.get('blockNumber')), _int_or_none(tx.get('timeStamp')),
+                _int_or_none(tx.get('logIndex')), _lower(tx.get('contractAddress')), body
+            ))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO transactions
+                    (address, action, tx_key, block_number, time_stamp, log_index, contract_address, body)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (address, action, tx_key) DO UPDATE SET
+                    block_number = excluded.block_number, time_stamp = excluded.time_stamp,
+                    log_index = excluded.log_index, contract_address = excluded.contract_address,
+                    body = excluded.body
+            """, rows)
+            self._conn.commit()
+        return len(rows)
+
+    def record_listing(self, address, action, contract=None, complete=False):
+        """
+        Note that a listing was fetched.
+
+        Args:
+            address (str): Address the listing was fetched for
+            action (str): Explorer API action of the listing
+            contract (str): Token contract the listing was limited to, None for all tokens
+            complete (bool): Whether the whole listing was fetched; a complete listing stays
+                             complete when it is later fetched in part
+        """
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO listings (address, action, contract, complete, synced_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (address, action, contract) DO UPDATE SET
+                    complete = MAX(complete, excluded.complete), synced_at = excluded.synced_at
+            """, (_lower(address), action, _lower(contract), int(bool(complete)), time.time()))
+            self._conn.commit()
+
+    def listing(self, address, actions, contract=None):
+        """
+        Look up how a listing was stored.
+
+        Args:
+            address (str): Address of the listing
+            actions (tuple): Explorer API actions that serve the listing
+            contract (str): Token contract the listing is limited to, None for all tokens
+
+        Returns:
+            dict: 'complete' and 'synced_at' of the most complete stored listing, or None if the
+                  listing was never fetched. A complete listing of all tokens covers every contract.
+        """
+        contracts = ('', _lower(contract)) if contract else ('',)
+        with self._lock:
+            row = self._conn.execute(f"""
+                SELECT complete, synced_at FROM listings
+                WHERE address = ? AND action IN ({','.join('?' * len(actions))})
+                  AND contract IN ({','.join('?' * len(contracts))})
+                ORDER BY complete DESC, synced_at DESC LIMIT 1
+            """, (_lower(address), *actions, *contracts)).fetchone()
+        if row is None:
+            return None
+        return {'complete': bool(row[0]), 'synced_at': row[1]}
+
+    def iter_transactions(self, address, actions, contract=None, start_ts=None, end_ts=None,
+                          descending=False, batch_size=DEFAULT_READ_BATCH):
+        """
+        Read a stored listing back in explorer order.
+
+        Args:
+            address (str): Address of the listing
+            actions (tuple): Explorer API actions that serve the listing
+            contract (str): Only return transfers of this token contract
+            start_ts (int): Only return transactions at or after this Unix timestamp
+            end_ts (int): Only return transactions at or before this Unix timestamp
+            descending (bool): Newest first instead of oldest first
+            batch_size (int): Transactions per yielded batch
+
+        Yields:
+            list: Batches of transaction dicts as the API returned them
+        """
+        conditions = [f"address = ? AND action IN ({','.join('?' * len(actions))})"]
+        params = [_lower(address), *actions]
+        if contract:
+            conditions.append("contract_address = ?")
+            params.append(_lower(contract))
+        if start_ts:
+            conditions.append("time_stamp >= ?")
+            params.append(start_ts)
+        if end_ts:
+            conditions.append("time_stamp <= ?")
+            params.append(end_ts)
+        # Rows keep the position they were first stored at, which breaks ties within a block and log index
+        order = ' DESC' if descending else ''
+        query = (f"SELECT body FROM transactions WHERE {' AND '.join(conditions)} "
+                 f"ORDER BY block_number{order}, log_index{order}, rowid{order}")
+
+        # A connection of its own reads a consistent WAL snapshot while pages are still being stored
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                bodies = [row[0] for row in cursor.fetchmany(batch_size)]
+                if not bodies:
+                    break
+                # One decode per batch instead of one per transaction
+                yield json.loads(f"[{','.join(bodies)}]")
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_transaction_store():
+    """
+    Get the process-wide transaction store, opening it on first use.
+
+    Returns:
+        TransactionStore: Shared store instance
+    """
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = TransactionStore()
+        return _shared_store
@@ -3,24 +3,49 @@
 Zero Network Token Transaction Exporter
 
 This script fetches token transactions from Zero Network Explorer API
-and exports them to a CSV file.
+and exports them to a CSV file. Pages are fetched by an asyncio engine; the
+synchronous methods are thin wrappers that run it on a fresh event loop.
 """
 
 import argparse
+import asyncio
 import csv
 import json
 import logging
 import os
+import shutil
 import sys
 import glob
+import inspect
 import threading
 import time
+import uuid
 import requests
 from datetime import datetime
 from pathlib import Path
 
 import requests
 
+from explorer_client import (
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, AsyncExplorerClient, ExplorerClient, parse_explorer_urls
+)
+from response_cache import get_response_cache
+from sync_state import SyncCursor, SyncState, sync_key
+from block_shards import BlockShardSet
+from block_index import fetch_latest_block, resolve_block
+from export_formats import (
+    COMPRESSION_EXTENSIONS, COMPRESSIONS, EXPORT_EXTENSIONS, EXPORT_FORMATS, ColumnarExportWriter, check_compression,
+    compression_for, export_extension, export_format_for, open_export, with_export_extension
+)
+from export_pipeline import ExportPipeline, RowBuffer
+from job_registry import CoalescedUpdates, JobRegistry
+from request_scheduler import configure_request_scheduler
+from token_metadata import get_token_metadata
+from transaction_columns import format_timestamp, scale_token_value, transaction_rows
+from transaction_dedup import TransactionDeduplicator, transaction_keys
+from transaction_records import project_transactions
+from transaction_store import get_transaction_store
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,43 +58,453 @@ logger = logging.getLogger(__name__)
 DEFAULT_EXPORT_DIR = "exports"
 DEFAULT_PRESETS_DIR = "presets"
 DEFAULT_PRESETS_FILE = "presets/export_presets.json"
+DEFAULT_CHECKPOINT_DIR = "checkpoints"
+PART_CHUNK_ROWS = 65536  # Rows of a part file read at a time when it is filtered while merging
+
+# Status of every export job, keyed by job ID and shared by all processes (see job_registry.py)
+export_jobs = JobRegistry('export')
+export_progress = CoalescedUpdates(export_jobs)  # Progress reported by jobs on an event loop
+
+
+async def gather_bounded(coroutines, limit):
+    """
+    Run coroutines concurrently, at most limit at a time, and collect their results in order.
+
+    If one of them raises, the others are cancelled and the error is re-raised.
+
+    Args:
+        coroutines (list): Coroutines to run
+        limit (int): Maximum number running at the same time
+
+    Returns:
+        list: Results in the order of the coroutines
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    tasks = [asyncio.ensure_future(run(coroutine)) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def ensure_output_dir(output_file):
+    """
+    Create the parent directory of an output file if it does not exist yet.
+
+    Args:
+        output_file (str): Path to the output file
+    """
+    output_dir = Path(output_file).parent
+    if output_dir != Path('.') and not output_dir.exists():
+        logger.info(f"Creating output directory: {output_dir}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+
+def date_range_timestamps(start_date=None, end_date=None):
+    """
+    Convert a date window to Unix timestamps.
+
+    Args:
+        start_date (str): Start date in format 'YYYY-MM-DD' (start of day)
+        end_date (str): End date in format 'YYYY-MM-DD' (end of day, 23:59:59)
+
+    Returns:
+        tuple: (start timestamp, end timestamp); either is None if missing or invalid
+    """
+    start_ts = None
+    end_ts = None
+
+    if start_date:
+        try:
+            start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
+        except ValueError:
+            pass
+
+    if end_date:
+        try:
+            end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
+            end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
+            end_ts = int(end_datetime.timestamp())
+        except ValueError:
+            pass
+
+    return start_ts, end_ts
+
+
+def check_incremental_output(output_format='csv', compression=None):
+    """
+    Check that an incremental sync can write the requested output.
+
+    Args:
+        output_format (str): 'csv', 'parquet' or 'feather'
+        compression (str): 'gzip', 'zstd' or None
+
+    Raises:
+        ValueError: If the output is not an uncompressed CSV dataset, which is all a sync can append to
+    """
+    if output_format != 'csv':
+        raise ValueError("Incremental sync appends to a CSV dataset; it cannot write parquet or feather files")
+    if compression:
+        raise ValueError("Incremental sync appends to an uncompressed CSV dataset; it cannot compress it")
+
+
+class StreamingCSVWriter:
+    """
+    Write export rows to a temporary file page by page and publish it atomically.
+
+    Every page is flushed as soon as it is written, so memory use stays constant
+    and the rows written so far survive a crash in the temporary file. The final
+    file only appears under its real name once commit() renames it into place.
+    With compression, rows pass through a streaming gzip or zstd compressor
+    that is only flushed when the file is closed.
+    """
+
+    def __init__(self, output_file, headers=None, in_place=False, compression=None, compression_level=None):
+        """
+        Initialize the writer.
+
+        Args:
+            output_file (str): Final path of the CSV file
+            headers (list): Optional header row written when the file is opened
+            in_place (bool): Write directly to output_file instead of a temporary file
+                             (used to append to an existing dataset)
+            compression (str): 'gzip' or 'zstd' to compress the file while writing it
+            compression_level (int): Compression level, or None for the codec's default
+        """
+        if compression and in_place:
+            raise ValueError("A compressed CSV file cannot be appended to in place")
+        self.output_file = output_file
+        self.in_place = in_place
+        self.temp_file = output_file if in_place else f"{output_file}.tmp"
+        self.headers = headers
+        self.compression = compression
+        self.compression_level = check_compression('csv', compression, compression_level)
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def open(self, resume_offset=None, resume_rows=0):
+        """
+        Open the temporary file for writing and emit the header row.
+
+        Args:
+            resume_offset (int): Byte offset to continue an existing temporary file from.
+                                 Anything written after it (e.g. a half-written page) is discarded.
+            resume_rows (int): Number of rows already present before resume_offset
+        """
+        ensure_output_dir(self.output_file)
+        if resume_offset is not None and self.compression:
+            raise ValueError("A compressed CSV file cannot be resumed at a byte offset")
+        if resume_offset is not None and os.path.exists(self.temp_file):
+            os.truncate(self.temp_file, resume_offset)
+            self._file = open(self.temp_file, mode='a', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self.rows_written = resume_rows
+            return self
+
+        self._file = open_export(self.temp_file, 'w', self.compression, self.compression_level)
+        self._writer = csv.writer(self._file)
+        if self.headers:
+            self._writer.writerow(self.headers)
+        return self
+
+    @property
+    def bytes_written(self):
+        """Size of the temporary file including everything flushed so far."""
+        if self._file:
+            return os.fstat(self._file.fileno()).st_size
+        return os.path.getsize(self.temp_file) if os.path.exists(self.temp_file) else 0
+
+    def write_rows(self, rows):
+        """
+        Write a page of CSV rows and flush it to disk.
+
+        Args:
+            rows (list): Rows to write
+        """
+        self._writer.writerows(rows)
+        self._flush()
+        self.rows_written += len(rows)
+
+    def append_part(self, part, row_filter=None):
+        """
+        Append the rows of another (headerless) writer's temporary file and delete it.
+
+        Args:
+            part (StreamingCSVWriter): Closed writer whose rows should be appended
+            row_filter (callable): Optional function selecting (and rewriting) which rows of
+                                   a chunk to append, e.g. TransactionDeduplicator.filter_rows
+        """
+        self._flush()
+        if os.path.exists(part.temp_file):
+            with open(part.temp_file, mode='r', newline='', encoding='utf-8') as part_file:
+                if row_filter is None:
+                    shutil.copyfileobj(part_file, self._file)
+                    self.rows_written += part.rows_written
+                else:
+                    reader = csv.reader(part_file)
+                    while True:
+                        rows = [row for _, row in zip(range(PART_CHUNK_ROWS), reader)]
+                        if not rows:
+                            break
+                        rows = row_filter(rows)
+                        self._writer.writerows(rows)
+                        self.rows_written += len(rows)
+            os.remove(part.temp_file)
+        self._flush()
+
+    def _flush(self):
+        # Flushing a compressor ends its block early and costs ratio; a compressed
+        # file is unreadable until close() writes its trailer anyway
+        if not self.compression:
+            self._file.flush()
+
+    def close(self):
+        """Close the temporary file without publishing it."""
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def commit(self):
+        """Close the temporary file and atomically rename it to the final path."""
+        self.close()
+        if not self.in_place:
+            os.replace(self.temp_file, self.output_file)
+        logger.info(f"Successfully exported {self.rows_written} transactions to {self.output_file}")
+
+    def discard(self):
+        """Close and delete the temporary file."""
+        self.close()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
+
+
+class ExportCheckpoint:
+    """
+    Per-job checkpoint recording how far each address of a streaming export got.
+
+    The checkpoint stores the export options plus, for every address, the last
+    completed page (and block cursor for block-cursor pagination), the number
+    of rows and the size of its part file. An
+    interrupted job can then continue where it stopped instead of refetching
+    pages it already has.
+    """
+
+    def __init__(self, job_id, data, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        """
+        Initialize a checkpoint.
+
+        Args:
+            job_id (str): Export job identifier
+            data (dict): Checkpoint contents ('options' and 'addresses')
+            checkpoint_dir (str): Directory holding checkpoint files
+        """
+        self.job_id = job_id
+        self.data = data
+        self.path = os.path.join(checkpoint_dir, f"{job_id}.json")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, job_id, options, api_url=None, cache=False, store=False, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        """
+        Create and save a fresh checkpoint for a new job.
+
+        Args:
+            job_id (str): Export job identifier
+            options (dict): Keyword arguments of process_all_pages needed to resume the job
+            api_url (str): Explorer API base URL(s) the job was started with, comma-separated
+            cache (bool): Whether the job used the response cache
+            store (bool): Whether the job saved fetched transactions in the transaction store
+            checkpoint_dir (str): Directory holding checkpoint files
+
+        Returns:
+            ExportCheckpoint: The new checkpoint
+        """
+        checkpoint = cls(job_id, {
+            'job_id': job_id,
+            'created': datetime.now().isoformat(),
+            'updated': None,
+            'api_url': api_url,
+            'cache': cache,
+            'store': store,
+            'options': options,
+            'addresses': {}
+        }, checkpoint_dir)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, job_id, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        """
+        Load the checkpoint of a job.
 
-# Global variables for tracking export progress
-export_status = {
-    'job_id': None,
-    'status': 'idle',  # 'idle', 'running', 'completed', 'error'
-    'progress': 0,  # 0-100 percentage
-    'total_addresses': 0,
-    'processed_addresses': 0,
-    'current_address': None,
-    'total_transactions': 0,
-    'current_page': 0,
-    'max_pages': 0,
-    'error': None,
-    'output_file': None,
-    'start_time': None,
-    'end_time': None
-}
-
-# Lock for thread-safe access to the status variable
-status_lock = threading.RLock()
+        Args:
+            job_id (str): Export job identifier
+            checkpoint_dir (str): Directory holding checkpoint files
+
+        Returns:
+            ExportCheckpoint: The checkpoint, or None if the job has none
+        """
+        path = os.path.join(checkpoint_dir, f"{job_id}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return cls(job_id, json.load(f), checkpoint_dir)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Error loading checkpoint for job {job_id}: {e}")
+            return None
+
+    @property
+    def options(self):
+        return self.data['options']
+
+    def address_state(self, index):
+        """
+        Get the saved state of an address.
+
+        Args:
+            index (int): Position of the address in the job's address list
+
+        Returns:
+            dict: Address state, or None if the address has not been started
+        """
+        with self._lock:
+            state = self.data['addresses'].get(str(index))
+            return dict(state) if state else None
+
+    def record_page(self, index, address, page, rows, bytes_written, cursor=None):
+        """
+        Record a page whose rows have been flushed to the address's part file.
+
+        Args:
+            index (int): Position of the address in the job's address list
+            address (str): The address
+            page (int): Page number that was completed
+            rows (int): Total rows in the part file
+            bytes_written (int): Size of the part file after the page
+            cursor (dict): Block cursor after the page, for block-cursor pagination
+        """
+        with self._lock:
+            state = self.data['addresses'].setdefault(str(index), {'address': address, 'status': 'running'})
+            state.update({'last_page': page, 'rows': rows, 'bytes': bytes_written})
+            if cursor is not None:
+                state['cursor'] = cursor
+            self._save()
+
+    def mark_address(self, index, address, status, rows=0, bytes_written=0):
+        """
+        Record that an address finished or failed.
+
+        Args:
+            index (int): Position of the address in the job's address list
+            address (str): The address
+            status (str): 'completed' or 'error'
+            rows (int): Total rows in the part file
+            bytes_written (int): Size of the part file
+        """
+        with self._lock:
+            state = self.data['addresses'].setdefault(str(index), {'address': address, 'last_page': None})
+            state.update({'status': status, 'rows': rows, 'bytes': bytes_written})
+            self._save()
+
+    def save(self):
+        """Write the checkpoint to disk."""
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        """Atomically write the checkpoint file. Caller must hold the lock."""
+        self.data['updated'] = datetime.now().isoformat()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        """Remove the checkpoint file once the job has completed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class ZeroNetworkExporter:
     """Class to handle fetching and exporting Zero Network token transactions."""
 
-    def __init__(self, base_url='https://zero-network.calderaexplorer.xyz/api'):
+    def __init__(self, base_url='https://zero-network.calderaexplorer.xyz/api', cache=None,
+                 rate_limit=None, max_retries=None, connect_timeout=None, read_timeout=None, hedge=False,
+                 store=None):
         """
         Initialize the exporter with API base URL.
 
         Args:
-            base_url (str): Base URL for the Zero Network API (or compatible explorer API)
+            base_url (str or list): Base URL for the Zero Network API (or compatible explorer API).
+                                    Several mirror URLs (a list or a comma-separated string)
+                                    are load balanced with failover.
+            cache (ResponseCache): Optional persistent cache for explorer responses
+            rate_limit (float): Maximum requests per second to each explorer mirror (shared default if None)
+            max_retries (int): Retries for throttled or failed requests (shared default if None)
+            connect_timeout (float): Seconds to establish a connection (default if None)
+            read_timeout (float): Seconds to wait for response data (default if None)
+            hedge (bool): Duplicate requests that run past the p95 latency and take the first response
+            store (TransactionStore): Optional local store every fetched transaction is written to
+        """
+        base_urls = parse_explorer_urls(base_url)
+        for url in base_urls:
+            configure_request_scheduler(url, rate_limit=rate_limit, max_retries=max_retries)
+        self.client = ExplorerClient(
+            base_urls, cache=cache, hedge=hedge,
+            timeout=(connect_timeout or DEFAULT_CONNECT_TIMEOUT, read_timeout or DEFAULT_READ_TIMEOUT)
+        )
+        self.aclient = AsyncExplorerClient(self.client)
+        self.base_url = self.client.base_url
+        self.base_urls = self.client.base_urls
+        self._deadline = None
+        self._control = None
+        self.session = self.client.session
+        self.store = store
+
+    def resolve_action(self, internal=False, token_contract=None):
+        """
+        Select the explorer API action for a transaction export.
+
+        Args:
+            internal (bool): Whether to fetch internal transactions
+            token_contract (str): Token contract address to filter transactions
+
+        Returns:
+            str: API action ('tokennfttx', 'tokentxlistinternal' or 'tokentx')
         """
-        self.base_url = base_url
-        self.session = requests.Session()
+        # Check if token is NFT (ERC-721) if token_contract is provided. The lookup is
+        # served from the shared token metadata cache after the first page.
+        is_nft = False
+        if token_contract:
+            token_info = get_token_metadata(self.client, token_contract)
+            if token_info and token_info.get('type') == 'ERC-721':
+                is_nft = True
+                logger.debug(f"Token {token_contract} detected as ERC-721 NFT")
+        
+        # Select the appropriate action based on token type
+        if is_nft:
+            logger.debug(f"Using NFT transactions endpoint for ERC-721 token")
+            return 'tokennfttx'  # For NFT transactions
+        elif internal:
+            return 'tokentxlistinternal'
+        else:
+            return 'tokentx'  # Default for ERC-20 tokens
 
     def fetch_transactions(self, address, page=1, offset=100, sort='asc', internal=False, 
-                          start_date=None, end_date=None, token_contract=None):
+                          start_date=None, end_date=None, token_contract=None,
+                          start_block=None, end_block=None):
         """
         Fetch token transactions for the given address.
 
@@ -82,37 +517,50 @@ class ZeroNetworkExporter:
             start_date (str): Start date in format 'YYYY-MM-DD' to filter transactions
             end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
             token_contract (str): Token contract address to filter transactions
+            start_block (int): First block to include (overrides the date fallback)
+            end_block (int): Last block to include (overrides the date fallback)
 
         Returns:
             dict: API response data
         """
-        # Check if token is NFT (ERC-721) if token_contract is provided
-        is_nft = False
-        if token_contract:
-            try:
-                token_info_params = {
-                    'module': 'token',
-                    'action': 'getToken',
-                    'contractaddress': token_contract
-                }
-                token_info_response = requests.get(f"{self.base_url}", params=token_info_params)
-                token_info = token_info_response.json()
-                
-                if token_info.get('status') == '1' and token_info.get('result', {}).get('type') == 'ERC-721':
-                    is_nft = True
-                    logger.info(f"Token {token_contract} detected as ERC-721 NFT")
-            except Exception as e:
-                logger.warning(f"Error checking token type: {e}")
-        
-        # Select the appropriate action based on token type
-        if is_nft:
-            action = 'tokennfttx'  # For NFT transactions
-            logger.info(f"Using NFT transactions endpoint for ERC-721 token")
-        elif internal:
-            action = 'tokentxlistinternal'
-        else:
-            action = 'tokentx'  # Default for ERC-20 tokens
+        action = self.resolve_action(internal, token_contract)
+        params = self._transaction_params(action, address, page, offset, sort, start_date, end_date,
+                                          token_contract, start_block, end_block)
+        try:
+            return self.client.get(params)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            raise
+
+    async def fetch_transactions_async(self, address, page=1, offset=100, sort='asc', internal=False,
+                                       start_date=None, end_date=None, token_contract=None,
+                                       start_block=None, end_block=None, action=None):
+        """
+        Fetch token transactions for the given address without blocking the event loop.
+
+        Takes the same arguments as fetch_transactions(), plus the API action
+        already resolved for the job (see resolve_action()); it is looked up
+        when omitted.
+
+        Returns:
+            dict: API response data
+        """
+        if action is None and token_contract:
+            # The token type lookup may hit the explorer once per contract
+            action = await asyncio.to_thread(self.resolve_action, internal, token_contract)
+        elif action is None:
+            action = self.resolve_action(internal, token_contract)
+        params = self._transaction_params(action, address, page, offset, sort, start_date, end_date,
+                                          token_contract, start_block, end_block)
+        try:
+            return await self.aclient.get(params)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API request failed: {e}")
+            raise
 
+    def _transaction_params(self, action, address, page, offset, sort, start_date, end_date, token_contract,
+                            start_block, end_block):
+        """Build the explorer query of a transaction page (see fetch_transactions for the arguments)."""
         params = {
             'module': 'account',
             'action': action,
@@ -148,115 +596,1172 @@ class ZeroNetworkExporter:
                 logger.debug(f"Using end timestamp: {end_timestamp} ({end_date})")
             except ValueError:
                 logger.warning(f"Invalid end date format: {end_date}, expected YYYY-MM-DD")
+        
+        # Explicit block bounds take precedence over the placeholder date bounds
+        if start_block is not None:
+            params['startblock'] = start_block
+        if end_block is not None:
+            params['endblock'] = end_block
+
+        logger.info(f"Fetching transactions for address: {address} (page {page}, {offset} per page)")
+        return params
+
+    def get_export_fields(self, additional_fields=None):
+        """
+        Get the transaction fields and CSV headers for an export.
+
+        Args:
+            additional_fields (list): Optional additional fields to include in CSV
+
+        Returns:
+            tuple: (list of transaction field names, list of human-readable headers)
+        """
+        # Default fields to extract
+        fields = [
+            'timeStamp', 'hash', 'from', 'to', 'value', 'tokenName', 
+            'tokenSymbol', 'tokenDecimal', 'contractAddress', 'tokenID'
+        ]
+        
+        # Add additional fields if specified
+        if additional_fields:
+            fields.extend([field for field in additional_fields if field not in fields])
+
+        # Human-readable field names for CSV header
+        field_display_names = {
+            'timeStamp': 'Timestamp',
+            'hash': 'Transaction Hash',
+            'from': 'From Address',
+            'to': 'To Address',
+            'value': 'Value',
+            'tokenName': 'Token Name',
+            'tokenSymbol': 'Token Symbol',
+            'tokenDecimal': 'Token Decimal',
+            'contractAddress': 'Contract Address',
+            'tokenID': 'Token ID',
+            'gasUsed': 'Gas Used',
+            'gasPrice': 'Gas Price',
+            'cumulativeGasUsed': 'Cumulative Gas Used',
+            'confirmations': 'Confirmations',
+            'blockNumber': 'Block Number',
+            'blockHash': 'Block Hash',
+            'transactionIndex': 'Transaction Index',
+            'nonce': 'Nonce'
+        }
+
+        # Get human-readable headers for selected fields
+        headers = [field_display_names.get(field, field) for field in fields]
+        return fields, headers
+
+    def format_transaction_row(self, tx, fields):
+        """
+        Convert a transaction into a CSV row.
+
+        Args:
+            tx (dict): Transaction record from the API; left unmodified
+            fields (list): Transaction fields to extract, in column order
+
+        Returns:
+            list: Row values for the CSV writer
+        """
+        row = []
+        for field in fields:
+            value = tx.get(field, '')
+            if field == 'timeStamp':
+                # Unix timestamp to human-readable local time
+                value = format_timestamp(value)
+            elif field == 'value' and 'tokenDecimal' in tx:
+                # Raw token amount to an exact decimal amount
+                value = scale_token_value(value, tx['tokenDecimal'])
+            row.append(value)
+        return row
+
+    def format_transaction_rows(self, transactions, fields):
+        """
+        Convert a page of transactions into CSV rows in one columnar batch.
+
+        Produces the same values as format_transaction_row() for every
+        transaction, several times faster (see transaction_columns.py).
+
+        Args:
+            transactions (list): Transaction records from the API; left unmodified
+            fields (list): Transaction fields to extract, in column order
+
+        Returns:
+            list: One row per transaction for the CSV writer
+        """
+        return transaction_rows(transactions, fields)
+
+    def export_to_csv(self, data, output_file, additional_fields=None):
+        """
+        Export transaction data to CSV.
+
+        Args:
+            data (dict): Transaction data to export
+            output_file (str): Path to output CSV file
+            additional_fields (list): Optional additional fields to include in CSV
+
+        Returns:
+            int: Number of transactions exported
+        """
+        if 'result' not in data:
+            logger.error("Error: 'result' key not found in the response")
+            logger.debug(f"Response data: {json.dumps(data, indent=2)}")
+            raise KeyError("'result' key not found in the API response")
+
+        fields, headers = self.get_export_fields(additional_fields)
+        
+        transactions = data['result']
+        if not transactions:
+            logger.warning("No transactions found in the API response")
+            return 0
+
+        # Ensure output directory exists
+        ensure_output_dir(output_file)
+
+        with open(output_file, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(headers)
+            writer.writerows(self.format_transaction_rows(transactions, fields))
+        
+        logger.info(f"Successfully exported {len(transactions)} transactions to {output_file}")
+        return len(transactions)
+
+    def _check_deadline(self):
+        """
+        Stop the current job once its deadline has passed.
+
+        Raises:
+            TimeoutError: If the job deadline has passed
+        """
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise TimeoutError("Export job exceeded its deadline")
+
+    def get_latest_block(self):
+        """
+        Get the current head block number of the chain.
+
+        Returns:
+            int: Latest block number
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            ValueError: If the response does not contain a block number
+        """
+        return fetch_latest_block(self.client)
+
+    def resolve_date_blocks(self, start_date=None, end_date=None):
+        """
+        Turn a date window into exact block bounds using the shared block index.
+
+        Args:
+            start_date (str): Start date in format 'YYYY-MM-DD'
+            end_date (str): End date in format 'YYYY-MM-DD'
+
+        Returns:
+            tuple: (first block, last block) of the window; either is None if it is
+                   open or could not be resolved, in which case rows are only
+                   filtered by timestamp
+        """
+        start_ts, end_ts = date_range_timestamps(start_date, end_date)
+        start_block = None
+        end_block = None
+
+        try:
+            if start_ts is not None:
+                start_block = resolve_block(self.client, start_ts, closest='after')
+            if end_ts is not None:
+                end_block = resolve_block(self.client, end_ts, closest='before')
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not resolve the date range to blocks ({e}); filtering by timestamp only")
+            return None, None
+
+        logger.info(f"Date range resolved to blocks {start_block if start_block is not None else 'first'}"
+                    f" - {end_block if end_block is not None else 'latest'}")
+        return start_block, end_block
+
+    def _snapshot_end_block(self):
+        """
+        Pin the last block a block-cursor export will read.
+
+        Returns:
+            int: Head block at job start, or a far-future block if the head cannot be read
+        """
+        try:
+            end_block = self.get_latest_block()
+            logger.info(f"Pinned block-cursor snapshot at block {end_block}")
+            return end_block
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not read the latest block ({e}); block-cursor export is not pinned")
+            return 999999999
+
+    async def _fetch_address_transactions(self, addr, page_handler, start_page=1, max_pages=None,
+                                          records_per_page=100, sort='asc', internal=False, start_date=None,
+                                          end_date=None, token_contract=None, job_id=None, start_block=None,
+                                          end_block=None, pagination='page', block_cursor=None, shards=1,
+                                          block_range=None, record_fields=None, action=None):
+        """
+        Fetch all pages of transactions for a single address.
+
+        Each page is handed to page_handler as soon as it has been fetched and
+        date-filtered, so callers decide whether rows are collected or streamed.
+        The handler may be a coroutine function; it is awaited before the next
+        page is requested. A failing page stops the address and is reported
+        through the returned status.
+
+        With pagination='block' every request asks for the first page of the
+        remaining block range instead of increasing the page number, so exports
+        are not limited by the explorer's page x offset window and deep pages
+        cost the same as the first one. The range moves past the last block seen
+        (startblock for ascending, endblock for descending order); transfers
+        from that boundary block that were already returned are dropped by
+        block_cursor. A block holding more than a full page of transfers is
+        paged through on its own before moving on.
+
+        Args:
+            addr (str): Blockchain address to fetch transactions for
+            page_handler (callable): Called (or awaited) with (transactions, page number) for every page
+            start_page (int): Page to start from
+            max_pages (int): Maximum number of pages to process (None for all)
+            records_per_page (int): Number of records per page
+            sort (str): Sort order ('asc' or 'desc')
+            internal (bool): Whether to fetch internal transactions
+            start_date (str): Start date in format 'YYYY-MM-DD' to filter transactions
+            end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
+            token_contract (str): Token contract address to filter transactions
+            job_id (str): Optional job ID for tracking progress
+            start_block (int): First block to include
+            end_block (int): Last block to include (the pinned snapshot for block pagination)
+            pagination (str): 'page' for page/offset pagination or 'block' for block-cursor pagination
+            block_cursor (SyncCursor): Position to continue block-cursor pagination from;
+                                       a new cursor is used when omitted
+            shards (int): Split the block range into this many shards fetched in parallel
+                          (see _fetch_address_sharded)
+            block_range (BlockShard): Shard whose current bounds limit block-cursor requests
+            record_fields (tuple): Project every page to compact records holding these fields
+                                   as soon as it is parsed (see transaction_records.py);
+                                   pages stay API dicts when omitted
+            action (str): API action resolved once for the job (see resolve_action);
+                          looked up when omitted
+
+        Returns:
+            tuple: (number of transactions found, 'completed' or 'error')
+        """
+        if action is None:
+            # The token type lookup may hit the explorer, so keep it off the event loop
+            action = await asyncio.to_thread(self.resolve_action, internal, token_contract)
+
+        if shards > 1:
+            return await self._fetch_address_sharded(
+                addr, page_handler, shards, records_per_page=records_per_page, sort=sort, internal=internal,
+                start_date=start_date, end_date=end_date, token_contract=token_contract, job_id=job_id,
+                start_block=start_block, end_block=end_block, block_cursor=block_cursor,
+                record_fields=record_fields, action=action
+            )
+
+        logger.info(f"Processing address: {addr}")
+
+        addr_transactions = 0
+        current_page = start_page
+        address_status = 'completed'
+
+        by_block = pagination == 'block'
+        if by_block and block_cursor is None:
+            block_cursor = SyncCursor(descending=sort == 'desc')
+        dense_block = None  # Block with more than a page of transfers, paged on its own
+        dense_page = 1
+        next_block = block_cursor.last_block if by_block else None
+
+        # Skip the pages before the date window when it could not be turned into block bounds
+        start_ts, end_ts = date_range_timestamps(start_date, end_date)
+        prefetched = {}
+        window_edge = end_ts if sort == 'desc' else start_ts
+        window_unbounded = end_block is None if sort == 'desc' else start_block is None
+        if not by_block and start_page == 1 and window_edge and window_unbounded and block_range is None:
+            try:
+                current_page, prefetched = await self._find_first_window_page(
+                    addr, window_edge, records_per_page=records_per_page, sort=sort, internal=internal,
+                    start_date=start_date, end_date=end_date, token_contract=token_contract,
+                    start_block=start_block, end_block=end_block, action=action
+                )
+                start_page = current_page
+            except Exception as e:
+                logger.warning(f"Could not locate the date window for address {addr}, starting from page 1: {e}")
+                current_page, prefetched = 1, {}
+
+        while True:
+            try:
+                self._check_deadline()
+                if self._control and self._control.paused:
+                    # A paused job holds here, between pages, until it is resumed
+                    if job_id:
+                        update_export_progress(job_id, status='paused')
+                    await self._control.wait_if_paused()
+                    if job_id:
+                        update_export_progress(job_id, status='running')
+
+                # Update progress status with current page
+                if job_id:
+                    update_address_progress(job_id, addr, page=current_page)
+
+                request_page = current_page
+                request_start, request_end = block_range.bounds() if block_range else (start_block, end_block)
+                if by_block:
+                    if dense_block is not None:
+                        request_page = dense_page
+                        request_start = request_end = dense_block
+                    else:
+                        request_page = 1
+                        if next_block is not None and sort == 'desc':
+                            request_end = next_block
+                        elif next_block is not None:
+                            request_start = next_block
+                        if request_start is not None and request_end is not None and request_start > request_end:
+                            logger.info(f"Reached the end of the block range for address {addr}")
+                            break
+
+                if request_page in prefetched and not by_block:
+                    # Already downloaded while locating the date window
+                    data = prefetched.pop(request_page)
+                else:
+                    data = await self.fetch_transactions_async(
+                        address=addr,
+                        page=request_page,
+                        offset=records_per_page,
+                        sort=sort,
+                        internal=internal,
+                        start_date=start_date,
+                        end_date=end_date,
+                        token_contract=token_contract,
+                        start_block=request_start,
+                        end_block=request_end,
+                        action=action
+                    )
+
+                # Check if we have results
+                if 'result' not in data or not data['result']:
+                    if dense_block is not None:
+                        # The dense block is exhausted; continue with the blocks after it
+                        next_block = dense_block - 1 if sort == 'desc' else dense_block + 1
+                        dense_block = None
+                        continue
+                    logger.info(f"No more transactions found for address {addr} at page {current_page}")
+                    break
+
+                page_results = data['result']
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.add_transactions, addr, action, page_results)
+                if record_fields:
+                    # Drop the fields the export never reads before the page is buffered anywhere
+                    page_results = project_transactions(page_results, record_fields)
+                filtered_results = block_cursor.filter_page(page_results) if by_block else page_results
+
+                # Filter results by date if needed
+                if start_ts or end_ts:
+                    logger.debug(f"Post-filtering transactions by timestamp")
+                    unfiltered_count = len(filtered_results)
+                    filtered_results = [
+                        tx for tx in filtered_results
+                        if (not start_ts or int(tx.get('timeStamp', 0)) >= start_ts)
+                        and (not end_ts or int(tx.get('timeStamp', 0)) <= end_ts)
+                    ]
+
+                    logger.debug(f"Filtered {unfiltered_count - len(filtered_results)} transactions outside date range")
+
+                # Hand the filtered page to the caller
+                handled = page_handler(filtered_results, current_page)
+                if inspect.isawaitable(handled):
+                    await handled
+                current_page_count = len(filtered_results)
+                addr_transactions += current_page_count
+
+                # Update progress with transaction count
+                if job_id:
+                    update_address_progress(job_id, addr, transactions=current_page_count)
+                    if self.client.cache:
+                        update_export_progress(job_id, cache_stats=self.client.get_stats())
+
+                logger.info(f"Retrieved {current_page_count} transactions for address {addr} from page {current_page}")
+
+                # Check if we've reached the max pages or if there are no more results
+                if max_pages and current_page >= start_page + max_pages - 1:
+                    logger.info(f"Reached maximum pages limit ({max_pages}) for address {addr}")
+                    break
+
+                # Results are sorted, so once a page ends past the date window no later page can overlap it
+                last_ts = self._transaction_timestamp(page_results[-1])
+                if last_ts is not None and ((sort == 'desc' and start_ts and last_ts < start_ts)
+                                            or (sort != 'desc' and end_ts and last_ts > end_ts)):
+                    logger.info(f"Page {current_page} ends beyond the date window for address {addr}")
+                    break
+
+                if by_block:
+                    full_page = len(page_results) == records_per_page
+                    if dense_block is not None:
+                        if full_page:
+                            dense_page += 1
+                        else:
+                            next_block = dense_block - 1 if sort == 'desc' else dense_block + 1
+                            dense_block = None
+                    elif not full_page:
+                        logger.info(f"Reached last page of results for address {addr}")
+                        break
+                    elif page_results[0].get('blockNumber') == page_results[-1].get('blockNumber'):
+                        # A whole page from one block: moving the block range would not advance
+                        dense_block = block_cursor.last_block
+                        dense_page = 2
+                        logger.debug(f"Block {dense_block} holds more than {records_per_page} transfers, paging it separately")
+                    else:
+                        next_block = block_cursor.last_block
+                # If we got fewer records than requested, we've reached the end
+                elif len(page_results) < records_per_page:
+                    logger.info(f"Reached last page of results for address {addr}")
+                    break
+
+                current_page += 1
+
+            except Exception as e:
+                logger.error(f"Error processing page {current_page} for address {addr}: {e}")
+                address_status = 'error'
+                if job_id:
+                    update_export_progress(job_id, error=str(e))
+                break
+
+        if job_id:
+            update_address_progress(job_id, addr, status=address_status)
+
+        logger.info(f"Completed processing address {addr}: {addr_transactions} transactions found")
+        return addr_transactions, address_status
+
+    @staticmethod
+    def _transaction_timestamp(tx):
+        """Unix timestamp of a raw transaction, or None if it has none."""
+        try:
+            return int(tx.get('timeStamp'))
+        except (ValueError, TypeError):
+            return None
+
+    async def _find_first_window_page(self, addr, window_edge, records_per_page=100, sort='asc', **query):
+        """
+        Locate the first page that reaches the date window by probing pages.
+
+        Pages are probed at 1, 2, 4, 8, ... until one reaches the window edge
+        (its last transaction is at or after the window start for ascending
+        order, at or before the window end for descending order) or runs past
+        the last page. The exact page is then found by binary search between
+        the last two probes. The cost grows with the logarithm of the address's
+        history instead of linearly.
+
+        Args:
+            addr (str): Blockchain address
+            window_edge (int): Window start (ascending) or end (descending) as a Unix timestamp
+            records_per_page (int): Number of records per page
+            sort (str): Sort order ('asc' or 'desc')
+            **query: Filter options passed to fetch_transactions_async
+
+        Returns:
+            tuple: (first page to export, dict of page number -> already fetched response)
+        """
+        probed = {}
+
+        async def reaches_window(page):
+            data = await self.fetch_transactions_async(address=addr, page=page, offset=records_per_page,
+                                                       sort=sort, **query)
+            probed[page] = data
+            rows = data.get('result') if isinstance(data, dict) else None
+            if not rows or not isinstance(rows, list):
+                return True  # Past the last page: nothing further back can overlap
+            last_ts = self._transaction_timestamp(rows[-1])
+            if last_ts is None:
+                return True
+            return last_ts <= window_edge if sort == 'desc' else last_ts >= window_edge
+
+        # Gallop until a probe reaches the window, then bisect between the last two probes
+        low, high = 0, 1
+        while not await reaches_window(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if await reaches_window(middle):
+                high = middle
+            else:
+                low = middle
+
+        if high > 1:
+            logger.info(f"Date window for address {addr} starts at page {high} ({len(probed)} probes)")
+        return high, {high: probed[high]} if high in probed else {}
+
+    async def _first_block(self, addr, sort='asc', internal=False, start_date=None, end_date=None,
+                           token_contract=None, start_block=None, end_block=None, action=None):
+        """
+        Find the block of the first transaction of an address in the requested order.
+
+        Args:
+            addr (str): Blockchain address
+            sort (str): 'asc' for the oldest transaction, 'desc' for the newest
+            internal (bool): Whether to fetch internal transactions
+            start_date (str): Start date in format 'YYYY-MM-DD'
+            end_date (str): End date in format 'YYYY-MM-DD'
+            token_contract (str): Token contract address to filter transactions
+            start_block (int): First block to consider
+            end_block (int): Last block to consider
+            action (str): API action resolved for the job; looked up when omitted
+
+        Returns:
+            int: Block number, or None if the address has no transactions in range
+        """
+        data = await self.fetch_transactions_async(
+            address=addr, page=1, offset=1, sort=sort, internal=internal, start_date=start_date,
+            end_date=end_date, token_contract=token_contract, start_block=start_block, end_block=end_block,
+            action=action
+        )
+        rows = data.get('result') if isinstance(data, dict) else None
+        if not rows or not isinstance(rows, list):
+            return None
+        return int(rows[0].get('blockNumber', 0))
+
+    async def _fetch_address_sharded(self, addr, page_handler, shards, records_per_page=100, sort='asc',
+                                     internal=False, start_date=None, end_date=None, token_contract=None,
+                                     job_id=None, start_block=None, end_block=None, block_cursor=None,
+                                     record_fields=None, action=None):
+        """
+        Fetch a single address by splitting its block range into concurrent shards.
+
+        The range between the address's first transaction and the pinned end
+        block is divided into one shard per worker. Each shard is a task running its own
+        block-cursor pagination, and shards that turn out to be dense are split
+        again whenever a worker becomes idle (see block_shards.py). Shards are
+        handed to page_handler one at a time in sort order, so the output
+        matches a serial export, and block_cursor is advanced past every shard
+        that was handed over so checkpoints can resume from it.
+
+        Args:
+            addr (str): Blockchain address to fetch transactions for
+            page_handler (callable): Called (or awaited) with (transactions, shard number) for every finished shard
+            shards (int): Number of shards fetched at the same time
+            records_per_page (int): Number of records per page
+            sort (str): Sort order ('asc' or 'desc')
+            internal (bool): Whether to fetch internal transactions
+            start_date (str): Start date in format 'YYYY-MM-DD' to filter transactions
+            end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
+            token_contract (str): Token contract address to filter transactions
+            job_id (str): Optional job ID for tracking progress
+            start_block (int): First block to include
+            end_block (int): Last block to include (the pinned snapshot)
+            block_cursor (SyncCursor): Position to continue from; a new cursor is used when omitted
+            record_fields (tuple): Fields of the compact records shards are buffered as
+            action (str): API action resolved for the job; looked up when omitted
+
+        Returns:
+            tuple: (number of transactions found, 'completed' or 'error')
+        """
+        logger.info(f"Processing address {addr} in {shards} block range shards")
+
+        descending = sort == 'desc'
+        block_cursor = block_cursor or SyncCursor(descending=descending)
+        query = {
+            'sort': sort, 'internal': internal, 'start_date': start_date, 'end_date': end_date,
+            'token_contract': token_contract, 'action': action
+        }
+        addr_transactions = 0
+        address_status = 'completed'
+
+        try:
+            # Bound the range by the address's own history instead of the whole chain
+            low, high = start_block, end_block
+            if block_cursor.last_block is not None:
+                if descending:
+                    high = block_cursor.last_block
+                else:
+                    low = block_cursor.last_block
+            if high is None:
+                high = await asyncio.to_thread(self._snapshot_end_block)
+            low = await self._first_block(addr, start_block=low, end_block=high, **dict(query, sort='asc'))
+            if low is None:
+                logger.info(f"No transactions found for address {addr}")
+                if job_id:
+                    update_address_progress(job_id, addr, status='completed')
+                return 0, 'completed'
+        except Exception as e:
+            logger.error(f"Error planning block range shards for address {addr}: {e}")
+            if job_id:
+                update_export_progress(job_id, error=str(e))
+                update_address_progress(job_id, addr, status='error')
+            return 0, 'error'
+
+        shard_set = BlockShardSet(low, high, shards, descending=descending)
+        tasks = set()
+        pages_fetched = 0
+
+        async def fetch_shard(shard):
+            shard_cursor = SyncCursor(descending=descending)
+            status = 'error'
+
+            def collect(transactions, page):
+                nonlocal pages_fetched
+                if shard_set.cancelled:
+                    raise RuntimeError("Sharded fetch cancelled")
+                shard.rows.extend(transactions)
+                shard.pages += 1
+                if job_id:
+                    pages_fetched += 1
+                    update_address_progress(job_id, addr, page=pages_fetched, transactions=len(transactions))
+                if transactions:
+                    new_shard = shard_set.rebalance(shard, shard_cursor.last_block)
+                    if new_shard:
+                        schedule(new_shard)
+
+            try:
+                _, status = await self._fetch_address_transactions(
+                    addr, collect, records_per_page=records_per_page, pagination='block',
+                    block_cursor=shard_cursor, block_range=shard, record_fields=record_fields, **query
+                )
+            finally:
+                shard_set.finish(shard, status)
+
+        def schedule(shard):
+            shard_set.mark_running(shard)
+            task = asyncio.ensure_future(fetch_shard(shard))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            for shard in list(shard_set.shards):
+                schedule(shard)
+
+            # Hand finished shards over in sort order while later ones are still running
+            number = 0
+            async for shard in shard_set.completed_in_order():
+                if shard.status != 'completed':
+                    address_status = 'error'
+                    break
+                number += 1
+                rows = block_cursor.filter_page(shard.rows)
+                shard.rows = []
+                handled = page_handler(rows, number)
+                if inspect.isawaitable(handled):
+                    await handled
+                addr_transactions += len(rows)
+                logger.debug(f"Merged shard {number} ({shard.start}-{shard.end}, {shard.pages} pages) "
+                             f"for address {addr}: {len(rows)} transactions")
+        except Exception as e:
+            logger.error(f"Error merging block range shards for address {addr}: {e}")
+            address_status = 'error'
+            if job_id:
+                update_export_progress(job_id, error=str(e))
+        finally:
+            if address_status != 'completed':
+                shard_set.cancel()
+            # Every shard has finished unless the merge stopped early or was cancelled
+            pending = list(tasks)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if job_id:
+            update_address_progress(job_id, addr, status=address_status)
+
+        logger.info(f"Completed processing address {addr}: {addr_transactions} transactions found "
+                    f"in {len(shard_set.shards)} shards")
+        return addr_transactions, address_status
+
+    async def _stream_address_part(self, index, addr, output_file, pipeline, checkpoint=None, page_filter=None,
+                                   **fetch_kwargs):
+        """
+        Stream a single address into its own headerless part file.
+
+        Streaming exports write each address to a separate part file that is
+        concatenated in address order once every address is done. When a
+        checkpoint is given, every flushed page is recorded in it and an address
+        that was interrupted earlier continues after its last completed page.
+        Pages go through the job's pipeline, so the next page is fetched while
+        the previous ones are still being formatted and written.
+
+        Args:
+            index (int): Position of the address in the job's address list
+            addr (str): Blockchain address to fetch transactions for
+            output_file (str): Final path of the export file
+            pipeline (ExportPipeline): Transform and write stages of the job
+            checkpoint (ExportCheckpoint): Optional checkpoint of the job
+            page_filter (callable): Optional function selecting which transactions of a page to write
+            **fetch_kwargs: Pagination and filter options for _fetch_address_transactions
+
+        Returns:
+            tuple: (closed StreamingCSVWriter holding the address's rows, address status)
+        """
+        part = StreamingCSVWriter(f"{output_file}.part{index}")
+        state = checkpoint.address_state(index) if checkpoint else None
+        job_id = fetch_kwargs.get('job_id')
+
+        block_cursor = None
+        if fetch_kwargs.get('pagination') == 'block':
+            block_cursor = fetch_kwargs.get('block_cursor') or SyncCursor(
+                state.get('cursor') if state else None, descending=fetch_kwargs.get('sort') == 'desc')
+            fetch_kwargs = dict(fetch_kwargs, block_cursor=block_cursor)
+
+        if state:
+            part.open(resume_offset=state.get('bytes', 0), resume_rows=state.get('rows', 0))
+            if job_id:
+                update_address_progress(job_id, addr, page=state.get('last_page'), transactions=state.get('rows', 0))
+
+            if state['status'] == 'completed':
+                logger.info(f"Address {addr} already completed in checkpoint ({part.rows_written} transactions)")
+                part.close()
+                if job_id:
+                    update_address_progress(job_id, addr, status='completed')
+                return part, 'completed'
+
+            if state.get('last_page'):
+                # Continue after the last page whose rows were flushed; block-cursor
+                # pagination picks up from the saved cursor instead of the page number
+                pages_done = state['last_page'] - fetch_kwargs['start_page'] + 1
+                fetch_kwargs = dict(fetch_kwargs, start_page=state['last_page'] + 1)
+                if fetch_kwargs.get('max_pages'):
+                    fetch_kwargs['max_pages'] = max(fetch_kwargs['max_pages'] - pages_done, 0)
+                logger.info(f"Resuming address {addr} from page {fetch_kwargs['start_page']}")
+        else:
+            part.open()
+
+        last_write = None
+
+        async def write_page(transactions, page):
+            nonlocal last_write
+            if page_filter:
+                transactions = page_filter(transactions)
+            # The cursor moves on while the page waits in the pipeline; checkpoint where it is now
+            cursor = block_cursor.to_dict() if block_cursor else None
+            on_written = None
+            if checkpoint:
+                def on_written():
+                    checkpoint.record_page(index, addr, page, part.rows_written, part.bytes_written, cursor=cursor)
+            last_write = await pipeline.submit(part, transactions, on_written)
+
+        try:
+            if fetch_kwargs.get('max_pages') == 0:
+                address_status = 'completed'
+            else:
+                _, address_status = await self._fetch_address_transactions(addr, write_page, **fetch_kwargs)
+            if last_write is not None:
+                # Pages are written in order, so the last one being done means all of them are
+                await asyncio.wait({last_write})
+                if last_write.exception() is not None:
+                    address_status = 'error'
+            if checkpoint:
+                checkpoint.mark_address(index, addr, address_status, part.rows_written, part.bytes_written)
+        finally:
+            try:
+                if last_write is not None:
+                    # Never close the part while the write stage may still be appending to it
+                    await asyncio.wait({last_write})
+            finally:
+                part.close()
+        return part, address_status
+
+    async def _sync_incremental(self, address_list, output_file, additional_fields, workers, fetch_kwargs, pipeline,
+                                deduplicator=None):
+        """
+        Append the transactions that are new since the last sync of a dataset.
+
+        Every (address, contract, action) key resumes from the highest block it
+        has already exported. Transfers from that boundary block that are
+        already in the dataset are skipped by hash + log index. The dataset is
+        first truncated to its size after the last successful sync, so a run
+        that crashed half-way never leaves duplicate rows behind.
+
+        Args:
+            address_list (list): Addresses to sync
+            output_file (str): Dataset CSV file
+            additional_fields (list): Optional additional fields to include in CSV
+            workers (int): Number of addresses to fetch in parallel
+            fetch_kwargs (dict): Pagination and filter options for _fetch_address_transactions
+            pipeline (ExportPipeline): Transform and write stages of the job
+            deduplicator (TransactionDeduplicator): Drops transfers another address of this run
+                                                    already appended; parts then carry a key column
+
+        Returns:
+            int: Number of new transactions appended
+        """
+        _, headers = self.get_export_fields(additional_fields)
+        state = SyncState()
+        dataset = state.dataset(output_file) if os.path.exists(output_file) else None
+
+        if dataset:
+            with open(output_file, mode='r', newline='', encoding='utf-8') as f:
+                existing_headers = next(csv.reader(f), None)
+            if existing_headers != headers:
+                raise ValueError(f"Columns of {output_file} do not match this export; "
+                                 f"use a new output file for incremental sync")
+
+        action = fetch_kwargs['action']
+        keys = [sync_key(addr, fetch_kwargs['token_contract'], action) for addr in address_list]
+        cursors = [state.cursor(output_file, key) if dataset else SyncCursor() for key in keys]
+
+        async def sync_address(index, addr):
+            cursor = cursors[index]
+            if cursor.start_block is not None:
+                logger.info(f"Syncing address {addr} from block {cursor.start_block}")
+            if fetch_kwargs.get('pagination') == 'block':
+                # The sync cursor doubles as the pagination cursor
+                return await self._stream_address_part(index, addr, output_file, pipeline,
+                                                       **dict(fetch_kwargs, block_cursor=cursor))
+            start_block = fetch_kwargs['start_block']
+            if cursor.start_block is not None:
+                start_block = cursor.start_block if start_block is None else max(start_block, cursor.start_block)
+            return await self._stream_address_part(
+                index, addr, output_file, pipeline, page_filter=cursor.filter_page,
+                **dict(fetch_kwargs, start_block=start_block)
+            )
+
+        parts = await gather_bounded(
+            [sync_address(index, addr) for index, addr in enumerate(address_list)], workers
+        )
+        await pipeline.join()
+
+        if dataset:
+            writer = StreamingCSVWriter(output_file, headers, in_place=True)
+            await asyncio.to_thread(writer.open, resume_offset=dataset['bytes'], resume_rows=dataset['rows'])
+        else:
+            writer = await asyncio.to_thread(StreamingCSVWriter(output_file, headers).open)
+        previous_rows = writer.rows_written
+
+        # Only fully synced keys advance; rows of failed addresses are dropped and fetched again next run
+        synced = {}
+        await asyncio.to_thread(self._record_listings, address_list,
+                                [address_status for _, address_status in parts], fetch_kwargs)
+        for index, (addr, key, cursor, (part, address_status)) in enumerate(zip(address_list, keys, cursors, parts)):
+            if address_status == 'completed':
+                # Parts are merged in worker threads so status requests keep being served meanwhile
+                await asyncio.to_thread(writer.append_part, part, self._part_filter(deduplicator, index))
+                synced[key] = cursor
+            else:
+                logger.warning(f"Sync of address {addr} failed; its new transactions will be fetched again next run")
+                part.discard()
+        await asyncio.to_thread(writer.commit)
+
+        new_rows = writer.rows_written - previous_rows
+        await asyncio.to_thread(state.update, output_file, os.path.getsize(output_file), writer.rows_written, synced)
+
+        duplicates = sum(cursor.duplicates for cursor in cursors)
+        logger.info(f"Appended {new_rows} new transactions to {output_file} "
+                    f"({writer.rows_written} total, {duplicates} duplicate rows skipped)")
+        return new_rows
+
+    def _record_listings(self, address_list, statuses, fetch_kwargs, complete=False):
+        """
+        Note the listings a job wrote to the transaction store.
+
+        Args:
+            address_list (list): Addresses of the job
+            statuses (list): Fetch status of every address ('completed' or 'error')
+            fetch_kwargs (dict): Pagination and filter options the addresses were fetched with
+            complete (bool): Whether the job fetched the whole listing of every address
+        """
+        if self.store is None:
+            return
+        action = fetch_kwargs['action']
+        for addr, address_status in zip(address_list, statuses):
+            if address_status == 'completed':
+                self.store.record_listing(addr, action, fetch_kwargs['token_contract'], complete=complete)
+
+    @staticmethod
+    def _report_duplicates(deduplicator, job_id=None):
+        """Log and publish the number of rows the job's deduplicator dropped."""
+        if deduplicator is None:
+            return
+        if deduplicator.duplicates:
+            logger.info(f"Removed {deduplicator.duplicates} duplicate transactions shared between addresses")
+        if job_id:
+            update_export_progress(job_id, duplicates_removed=deduplicator.duplicates)
+
+    @staticmethod
+    def _part_filter(deduplicator, index):
+        """Row filter that drops the rows of address index that an earlier address already wrote."""
+        if deduplicator is None:
+            return None
+        return lambda rows: deduplicator.filter_rows(rows, index)
+
+    @staticmethod
+    def _open_output(output_file, fields, headers, output_format, compression=None, compression_level=None):
+        """
+        Open the writer that publishes the final export file.
+
+        Args:
+            output_file (str): Final path of the export file
+            fields (list): Transaction fields of the columns
+            headers (list): Column names
+            output_format (str): 'csv', 'parquet' or 'feather'
+            compression (str): 'gzip', 'zstd' or None
+            compression_level (int): Compression level, or None for the codec's default
+
+        Returns:
+            StreamingCSVWriter or ColumnarExportWriter: Opened writer
+        """
+        if output_format == 'csv':
+            return StreamingCSVWriter(output_file, headers, compression=compression,
+                                      compression_level=compression_level).open()
+        return ColumnarExportWriter(output_file, fields, headers, output_format, compression=compression,
+                                    compression_level=compression_level).open()
+
+    def resume_export(self, job_id, deadline=None):
+        """
+        Resume an interrupted streaming export from its checkpoint.
+
+        Synchronous wrapper around resume_export_async().
+
+        Args:
+            job_id (str): Identifier of the interrupted job
+            deadline (float): Optional time limit in seconds for the resumed run
+
+        Returns:
+            int: Total number of transactions exported
+        """
+        return asyncio.run(self.resume_export_async(job_id, deadline=deadline))
+
+    async def resume_export_async(self, job_id, deadline=None, control=None):
+        """
+        Resume an interrupted streaming export from its checkpoint on the running event loop.
+
+        Args:
+            job_id (str): Identifier of the interrupted job
+            deadline (float): Optional time limit in seconds for the resumed run
+            control (JobControl): Pause switch of the job when it runs under the job scheduler
+
+        Returns:
+            int: Total number of transactions exported
+        """
+        checkpoint = ExportCheckpoint.load(job_id)
+        if checkpoint is None:
+            raise FileNotFoundError(f"No checkpoint found for job {job_id}")
+
+        logger.info(f"Resuming export job {job_id} into {checkpoint.options['output_file']}")
+        if checkpoint.data.get('store') and self.store is None:
+            logger.warning(f"Job {job_id} was started with the transaction store, but this exporter has none; "
+                           f"pages fetched from now on are not stored")
+        # Part files of checkpoints written before deduplication existed carry no key column
+        options = dict({'dedup': False}, **checkpoint.options)
+        return await self.process_all_pages_async(job_id=job_id, resume=True, deadline=deadline, control=control,
+                                                  **options)
+
+    def process_all_pages(self, *args, **kwargs):
+        """
+        Process all pages of transactions and export to a single CSV file.
+
+        Synchronous wrapper that runs process_all_pages_async() (which documents
+        the arguments) on a new event loop. Call the async method directly from
+        code that already runs an event loop.
+
+        Returns:
+            int: Total number of transactions exported
+        """
+        return asyncio.run(self.process_all_pages_async(*args, **kwargs))
+
+    def export_from_store(self, address, output_file, sort='asc', internal=False, additional_fields=None,
+                          start_date=None, end_date=None, token_contract=None, output_format='csv',
+                          compression=None, compression_level=None, dedup=True):
+        """
+        Build an export from the local transaction store without calling the explorer.
+
+        Every address must have been fetched into the store before (see
+        transaction_store.py); listings that were only fetched in part are
+        exported as far as they are stored, with a warning. The file has the
+        same rows and layout as an online export of the same options.
+
+        Args:
+            address (str or list): Blockchain address(es) to export
+            output_file (str): Path to output file
+            sort (str): Sort order ('asc' or 'desc')
+            internal (bool): Whether to export internal transactions
+            additional_fields (list): Optional additional fields to include in the export
+            start_date (str): Start date in format 'YYYY-MM-DD' to filter transactions
+            end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
+            token_contract (str): Token contract address to filter transactions
+            output_format (str): 'csv', 'parquet' or 'feather'
+            compression (str): 'gzip', 'zstd' or None
+            compression_level (int): Compression level, or None for the codec's default
+            dedup (bool): With several addresses, write a transfer between two of them only once
+
+        Returns:
+            int: Total number of transactions exported
+
+        Raises:
+            ValueError: If the exporter has no store or an address was never stored
+        """
+        if self.store is None:
+            raise ValueError("Offline export needs a transaction store")
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'; choose one of {', '.join(EXPORT_FORMATS)}")
+        compression_level = check_compression(output_format, compression, compression_level)
+
+        address_list = address if isinstance(address, list) else [address]
+        # Token filters may have been fetched from the NFT endpoint; no metadata lookup is made offline
+        if internal:
+            actions = ('tokentxlistinternal',)
+        elif token_contract:
+            actions = ('tokentx', 'tokennfttx')
+        else:
+            actions = ('tokentx',)
+
+        for addr in address_list:
+            listing = self.store.listing(addr, actions, token_contract)
+            if listing is None:
+                raise ValueError(f"Address {addr} is not in the transaction store; export it online with --store first")
+            if not listing['complete']:
+                logger.warning(f"Address {addr} was only fetched in part; the export holds the stored transactions")
+
+        start_ts, end_ts = date_range_timestamps(start_date, end_date)
+        fields, headers = self.get_export_fields(additional_fields)
+        deduplicator = None
+        if dedup and len(address_list) > 1:
+            deduplicator = TransactionDeduplicator(spill_dir=os.path.dirname(output_file) or None)
+
+        writer = self._open_output(output_file, fields, headers, output_format, compression, compression_level)
+        try:
+            for index, addr in enumerate(address_list):
+                for transactions in self.store.iter_transactions(addr, actions, contract=token_contract,
+                                                                 start_ts=start_ts, end_ts=end_ts,
+                                                                 descending=sort == 'desc'):
+                    rows = self.format_transaction_rows(transactions, fields)
+                    if deduplicator is not None:
+                        rows = deduplicator.filter_rows(
+                            [row + (key,) for row, key in zip(rows, transaction_keys(transactions))], index)
+                    writer.write_rows(rows)
+            self._report_duplicates(deduplicator)
+        except Exception:
+            writer.discard()
+            raise
+        finally:
+            if deduplicator:
+                deduplicator.close()
+
+        if not writer.rows_written:
+            writer.discard()
+            logger.warning(f"No stored transactions match the export of {len(address_list)} address(es)")
+            return 0
+        writer.commit()
+        return writer.rows_written
+
+    async def iter_pages_async(self, address, start_page=1, max_pages=None, records_per_page=100, sort='asc',
+                               internal=False, start_date=None, end_date=None, token_contract=None,
+                               pagination='page', snapshot_block=None, shards=1):
+        """
+        Iterate over the transaction pages of one address as they are fetched.
+
+        The next page is only requested once the consumer has taken the
+        current one, so a slow consumer applies backpressure. Closing the
+        iterator stops the fetch; wrap it in contextlib.aclosing() to close it
+        as soon as the consumer breaks out of the loop.
+
+        Args:
+            address (str): Blockchain address to fetch transactions for
+            start_page (int): Page to start from
+            max_pages (int): Maximum number of pages to fetch (None for all)
+            records_per_page (int): Number of records per page
+            sort (str): Sort order ('asc' or 'desc')
+            internal (bool): Whether to fetch internal transactions
+            start_date (str): Start date in format 'YYYY-MM-DD' to filter transactions
+            end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
+            token_contract (str): Token contract address to filter transactions
+            pagination (str): 'page' or 'block' (see process_all_pages_async)
+            snapshot_block (int): Last block read by block-cursor pagination
+            shards (int): Split the block range into this many concurrent shards; each
+                          yielded item is then a whole shard
 
-        logger.info(f"Fetching transactions for address: {address} (page {page}, {offset} per page)")
-        
-        try:
-            response = self.session.get(self.base_url, params=params)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed: {e}")
-            raise
+        Yields:
+            tuple: (page number, list of date-filtered raw transactions)
 
-    def export_to_csv(self, data, output_file, additional_fields=None):
+        Raises:
+            RuntimeError: If a page could not be fetched
         """
-        Export transaction data to CSV.
+        fetch_kwargs, _ = await self._fetch_options(
+            start_page=start_page, max_pages=max_pages, records_per_page=records_per_page, sort=sort,
+            internal=internal, start_date=start_date, end_date=end_date, token_contract=token_contract,
+            job_id=None, pagination=pagination, snapshot_block=snapshot_block, shards=shards
+        )
+        pages = asyncio.Queue(maxsize=1)
+        finished = object()
 
-        Args:
-            data (dict): Transaction data to export
-            output_file (str): Path to output CSV file
-            additional_fields (list): Optional additional fields to include in CSV
+        async def produce():
+            try:
+                _, status = await self._fetch_address_transactions(
+                    address, lambda rows, page: pages.put((page, rows)), **fetch_kwargs
+                )
+            finally:
+                await pages.put(finished)
+            return status
 
-        Returns:
-            int: Number of transactions exported
+        async with self.aclient:
+            producer = asyncio.ensure_future(produce())
+            try:
+                while (item := await pages.get()) is not finished:
+                    yield item
+                if await producer != 'completed':
+                    raise RuntimeError(f"Fetching transactions for address {address} failed")
+            finally:
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def _fetch_options(self, start_page, max_pages, records_per_page, sort, internal, start_date,
+                             end_date, token_contract, job_id, pagination, snapshot_block, shards):
         """
-        if 'result' not in data:
-            logger.error("Error: 'result' key not found in the response")
-            logger.debug(f"Response data: {json.dumps(data, indent=2)}")
-            raise KeyError("'result' key not found in the API response")
+        Resolve the pagination and block range options shared by every address of a job.
 
-        # Default fields to extract
-        fields = [
-            'timeStamp', 'hash', 'from', 'to', 'value', 'tokenName', 
-            'tokenSymbol', 'tokenDecimal', 'contractAddress', 'tokenID'
-        ]
-        
-        # Add additional fields if specified
-        if additional_fields:
-            fields.extend([field for field in additional_fields if field not in fields])
+        Returns:
+            tuple: (keyword arguments for _fetch_address_transactions, pinned snapshot block or None)
+        """
+        # Sharding splits block ranges, so it always paginates by block cursor
+        shards = max(1, shards or 1)
+        if shards > 1:
+            if pagination != 'block':
+                logger.info("Sharded fetch uses block-cursor pagination")
+                pagination = 'block'
+            if max_pages:
+                logger.warning(f"Ignoring max_pages={max_pages} for a sharded fetch")
+                max_pages = None
 
-        # Human-readable field names for CSV header
-        field_display_names = {
-            'timeStamp': 'Timestamp',
-            'hash': 'Transaction Hash',
-            'from': 'From Address',
-            'to': 'To Address',
-            'value': 'Value',
-            'tokenName': 'Token Name',
-            'tokenSymbol': 'Token Symbol',
-            'tokenDecimal': 'Token Decimal',
-            'contractAddress': 'Contract Address',
-            'tokenID': 'Token ID',
-            'gasUsed': 'Gas Used',
-            'gasPrice': 'Gas Price',
-            'cumulativeGasUsed': 'Cumulative Gas Used',
-            'confirmations': 'Confirmations',
-            'blockNumber': 'Block Number',
-            'blockHash': 'Block Hash',
-            'transactionIndex': 'Transaction Index',
-            'nonce': 'Nonce'
-        }
+        # Pin the block range once so every address reads the same snapshot
+        if pagination == 'block' and snapshot_block is None:
+            snapshot_block = await asyncio.to_thread(self._snapshot_end_block)
 
-        # Get human-readable headers for selected fields
-        headers = [field_display_names.get(field, field) for field in fields]
-        
-        transactions = data['result']
-        if not transactions:
-            logger.warning("No transactions found in the API response")
-            return 0
+        # Only request the blocks inside the date window instead of filtering the whole history
+        first_block, last_block = await asyncio.to_thread(self.resolve_date_blocks, start_date, end_date)
+        if snapshot_block is not None:
+            last_block = snapshot_block if last_block is None else min(last_block, snapshot_block)
 
-        # Ensure output directory exists
-        output_path = Path(output_file)
-        output_dir = output_path.parent
-        if output_dir != Path('.') and not output_dir.exists():
-            logger.info(f"Creating output directory: {output_dir}")
-            output_dir.mkdir(parents=True, exist_ok=True)
+        # Every address uses the same action, so the token type is looked up once per job
+        action = await asyncio.to_thread(self.resolve_action, internal, token_contract)
 
-        with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(headers)
-            
-            for tx in transactions:
-                # Process timestamp to human-readable format if available
-                if 'timeStamp' in tx and tx['timeStamp']:
-                    try:
-                        timestamp = int(tx['timeStamp'])
-                        tx['timeStamp'] = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                    except (ValueError, TypeError):
-                        pass  # Keep original if conversion fails
-                
-                # Process token value with decimal places if available
-                if 'value' in tx and 'tokenDecimal' in tx:
-                    try:
-                        value = int(tx['value'])
-                        decimals = int(tx['tokenDecimal'])
-                        tx['value'] = value / (10 ** decimals)
-                    except (ValueError, TypeError):
-                        pass  # Keep original if conversion fails
-                
-                # Extract values for each field
-                row = [tx.get(field, '') for field in fields]
-                writer.writerow(row)
-        
-        logger.info(f"Successfully exported {len(transactions)} transactions to {output_file}")
-        return len(transactions)
+        fetch_kwargs = {
+            'start_page': start_page,
+            'max_pages': max_pages,
+            'records_per_page': records_per_page,
+            'sort': sort,
+            'internal': internal,
+            'start_date': start_date,
+            'end_date': end_date,
+            'token_contract': token_contract,
+            'job_id': job_id,
+            'pagination': pagination,
+            'start_block': first_block,
+            'end_block': last_block,
+            'shards': shards,
+            'action': action
+        }
+        return fetch_kwargs, snapshot_block
 
-    def process_all_pages(self, address, output_file, start_page=1, max_pages=None, 
-                         records_per_page=100, sort='asc', internal=False, additional_fields=None,
-                         start_date=None, end_date=None, token_contract=None, job_id=None):
+    async def process_all_pages_async(self, address, output_file, start_page=1, max_pages=None,
+                                      records_per_page=100, sort='asc', internal=False, additional_fields=None,
+                                      start_date=None, end_date=None, token_contract=None, job_id=None,
+                                      concurrency=1, stream=False, resume=False, incremental=False,
+                                      pagination='page', snapshot_block=None, shards=1, deadline=None,
+                                      output_format='csv', compression=None, compression_level=None, dedup=True,
+                                      control=None):
         """
-        Process all pages of transactions and export to a single CSV file.
+        Process all pages of transactions and export to a single file.
+
+        Every address, page and shard runs as a task on the current event loop,
+        so many jobs can share one loop without a thread each. Fetched pages are
+        formatted and written by the stages of an ExportPipeline, overlapping
+        network, CPU and disk work.
 
         Args:
             address (str or list): Blockchain address(es) to fetch transactions for.
@@ -272,12 +1777,45 @@ class ZeroNetworkExporter:
             end_date (str): End date in format 'YYYY-MM-DD' to filter transactions
             token_contract (str): Token contract address to filter transactions
             job_id (str): Optional job ID for tracking progress
+            concurrency (int): Number of addresses to fetch concurrently (1 for serial)
+            stream (bool): Write each page to disk as it arrives instead of buffering the
+                           whole export in memory; the file is renamed into place at the end.
+                           Streaming jobs with a job_id are checkpointed after every page.
+            resume (bool): Continue the checkpointed job job_id instead of starting over
+            incremental (bool): Treat output_file as a dataset and only append transactions
+                                newer than its last sync (see sync_state.py)
+            pagination (str): 'page' to paginate with page/offset, or 'block' to advance a block
+                              cursor so exports are not capped by the explorer's page window
+            snapshot_block (int): Last block read by block-cursor pagination; defaults to the
+                                  chain head at job start so the export is a consistent snapshot
+            shards (int): Split each address's block range into this many shards fetched in
+                          parallel (implies block-cursor pagination; max_pages is ignored)
+            deadline (float): Seconds the whole job may run; once exceeded no further pages are
+                              requested and the job fails (streaming jobs stay resumable)
+            output_format (str): 'csv', or 'parquet' / 'feather' for typed columnar files
+                                 (see export_formats.py). Streaming jobs stage their rows in
+                                 CSV part files and convert them while merging.
+            compression (str): 'gzip' or 'zstd' to compress the export while it is written;
+                               CSV files get a .gz / .zst stream, Parquet and Feather
+                               files compress their columns with the codec
+            compression_level (int): Compression level, or None for the codec's default
+            dedup (bool): With several addresses, write a transfer between two of them only
+                          once, for the first address (see transaction_dedup.py)
+            control (JobControl): Pause switch of the job when it runs under the job scheduler
+                                  (see job_scheduler.py); checked before every page request
 
         Returns:
             int: Total number of transactions exported
         """
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'; choose one of {', '.join(EXPORT_FORMATS)}")
+        if incremental:
+            check_incremental_output(output_format, compression)
+        compression_level = check_compression(output_format, compression, compression_level)
+
         total_transactions = 0
-        all_data = {'result': []}
+        self._deadline = time.monotonic() + deadline if deadline else None
+        self._control = control
 
         # Log date range if provided
         if start_date or end_date:
@@ -289,226 +1827,482 @@ class ZeroNetworkExporter:
         # Handle multiple addresses
         address_list = address if isinstance(address, list) else [address]
         
+        # Incremental sync relies on oldest-first pages to advance the block cursor
+        if incremental and sort != 'asc':
+            logger.warning("Incremental sync always fetches in ascending order; ignoring sort='desc'")
+            sort = 'asc'
+        
         # Initialize progress tracking if job_id is provided
         if job_id:
-            start_export_job(job_id, address_list, max_pages)
-            update_export_progress(output_file=output_file)
+            await asyncio.to_thread(start_export_job, job_id, address_list, max_pages)
+            update_export_progress(job_id, output_file=output_file)
+            self.client.reset_stats()
         
-        try:
-            for addr_index, addr in enumerate(address_list):
-                logger.info(f"Processing address: {addr}")
+        writer = None
+        checkpoint = None
+        fields, headers = self.get_export_fields(additional_fields)
+        deduplicator = None
+        if dedup and len(address_list) > 1:
+            deduplicator = TransactionDeduplicator(spill_dir=os.path.dirname(output_file) or None)
+
+        def transform(transactions):
+            rows = self.format_transaction_rows(transactions, fields)
+            if deduplicator is None:
+                return rows
+            # Part files carry each row's dedup key; it is stripped again while merging
+            return [row + (key,) for row, key in zip(rows, transaction_keys(transactions))]
+
+        pipeline = ExportPipeline(
+            transform,
+            on_progress=(lambda stats: update_export_progress(job_id, pipeline_stats=stats)) if job_id else None
+        )
+        async with self.aclient, pipeline:
+            try:
+                fetch_kwargs, snapshot_block = await self._fetch_options(
+                    start_page=start_page, max_pages=max_pages, records_per_page=records_per_page, sort=sort,
+                    internal=internal, start_date=start_date, end_date=end_date, token_contract=token_contract,
+                    job_id=job_id, pagination=pagination, snapshot_block=snapshot_block, shards=shards
+                )
+                # Sharding may have switched the pagination mode and dropped the page limit
+                pagination = fetch_kwargs['pagination']
+                max_pages = fetch_kwargs['max_pages']
+                shards = fetch_kwargs['shards']
+                # Pages are kept as compact records of the exported fields only
+                fetch_kwargs['record_fields'] = tuple(fields)
+            
+                workers = max(1, min(concurrency or 1, len(address_list)))
+                if workers > 1:
+                    logger.info(f"Processing {len(address_list)} addresses with {workers} concurrent workers")
+            
+                if incremental:
+                    # Only fetch what is new since the last sync and append it to the dataset
+                    total_transactions = await self._sync_incremental(address_list, output_file, additional_fields,
+                                                                      workers, fetch_kwargs, pipeline, deduplicator)
+                    self._report_duplicates(deduplicator, job_id)
+                    if job_id:
+                        update_export_progress(job_id, status='completed', written_transactions=total_transactions)
+                    return total_transactions
+            
+                if stream:
+                    # Write every page to a per-address part file as soon as it arrives
+                    # instead of holding the whole export in memory
+                    # Jobs with an ID keep a checkpoint so they can be resumed after a failure
+                    if job_id:
+                        checkpoint = ExportCheckpoint.load(job_id) if resume else None
+                        if checkpoint is None:
+                            checkpoint = ExportCheckpoint.create(job_id, {
+                                'address': address_list,
+                                'output_file': output_file,
+                                'start_page': start_page,
+                                'max_pages': max_pages,
+                                'records_per_page': records_per_page,
+                                'sort': sort,
+                                'internal': internal,
+                                'additional_fields': additional_fields,
+                                'start_date': start_date,
+                                'end_date': end_date,
+                                'token_contract': token_contract,
+                                'concurrency': concurrency,
+                                'stream': True,
+                                'pagination': pagination,
+                                'snapshot_block': snapshot_block,
+                                'shards': shards,
+                                'output_format': output_format,
+                                'compression': compression,
+                                'compression_level': compression_level,
+                                'dedup': dedup
+                            }, api_url=','.join(self.base_urls), cache=self.client.cache is not None,
+                                store=self.store is not None)
                 
-                # Update progress status with current address
-                if job_id:
-                    update_export_progress(current_address=addr)
+                    parts = await gather_bounded([
+                        self._stream_address_part(index, addr, output_file, pipeline, checkpoint, **fetch_kwargs)
+                        for index, addr in enumerate(address_list)
+                    ], workers)
+                    await pipeline.join()
                 
-                current_page = start_page
-                addr_transactions = 0
+                    self._check_deadline()
+                    failed = [addr for addr, (_, address_status) in zip(address_list, parts) if address_status != 'completed']
+                    if checkpoint and failed:
+                        # Keep the part files so the job can pick up where it stopped
+                        raise RuntimeError(
+                            f"Export interrupted for {len(failed)} of {len(address_list)} addresses; "
+                            f"resume job {job_id} to continue"
+                        )
                 
-                while True:
-                    try:
-                        # Update progress status with current page
-                        if job_id:
-                            update_export_progress(current_page=current_page)
-                        
-                        data = self.fetch_transactions(
-                            address=addr,
-                            page=current_page,
-                            offset=records_per_page,
-                            sort=sort,
-                            internal=internal,
-                            start_date=start_date,
-                            end_date=end_date,
-                            token_contract=token_contract
+                    # Concatenate the parts in input order to keep the serial CSV layout
+                    writer = self._open_output(output_file, fields, headers, output_format, compression,
+                                               compression_level)
+                    for index, (part, _) in enumerate(parts):
+                        # Merging a part copies (and may convert or filter) a whole file; keep it off the loop
+                        await asyncio.to_thread(writer.append_part, part, self._part_filter(deduplicator, index))
+                    total_transactions = writer.rows_written
+                    statuses = [address_status for _, address_status in parts]
+                else:
+                    # Fetch several addresses at once over the pooled session. Rows are
+                    # collected per address and merged in input order so the CSV layout
+                    # matches the serial mode exactly.
+                    buffers = [RowBuffer() for _ in address_list]
+                    results = await gather_bounded([
+                        self._fetch_address_transactions(
+                            addr, lambda rows, page, buffer=buffer: pipeline.submit(buffer, rows), **fetch_kwargs
                         )
-                        
-                        # Check if we have results
-                        if 'result' not in data or not data['result']:
-                            logger.info(f"No more transactions found for address {addr} at page {current_page}")
-                            break
-                        
-                        # Filter results by date if needed
-                        filtered_results = data['result']
-                        if start_date or end_date:
-                            start_ts = None
-                            end_ts = None
-                            
-                            if start_date:
-                                try:
-                                    start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
-                                except ValueError:
-                                    pass
-                            
-                            if end_date:
-                                try:
-                                    end_datetime = datetime.strptime(end_date, '%Y-%m-%d')
-                                    end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
-                                    end_ts = int(end_datetime.timestamp())
-                                except ValueError:
-                                    pass
-                            
-                            if start_ts or end_ts:
-                                logger.debug(f"Post-filtering transactions by timestamp")
-                                filtered_results = []
-                                for tx in data['result']:
-                                    tx_ts = int(tx.get('timeStamp', 0))
-                                    if (not start_ts or tx_ts >= start_ts) and (not end_ts or tx_ts <= end_ts):
-                                        filtered_results.append(tx)
-                                
-                                logger.debug(f"Filtered {len(data['result']) - len(filtered_results)} transactions outside date range")
-                        
-                        # Add filtered results to our collection
-                        all_data['result'].extend(filtered_results)
-                        current_page_count = len(filtered_results)
-                        addr_transactions += current_page_count
-                        total_transactions += current_page_count
-                        
-                        # Update progress with transaction count
-                        if job_id:
-                            update_export_progress(transactions=current_page_count)
-                        
-                        logger.info(f"Retrieved {current_page_count} transactions for address {addr} from page {current_page}")
-                        
-                        # Check if we've reached the max pages or if there are no more results
-                        if max_pages and current_page >= start_page + max_pages - 1:
-                            logger.info(f"Reached maximum pages limit ({max_pages}) for address {addr}")
-                            break
-                        
-                        # If we got fewer records than requested, we've reached the end
-                        if current_page_count < records_per_page:
-                            logger.info(f"Reached last page of results for address {addr}")
-                            break
-                        
-                        current_page += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing page {current_page} for address {addr}: {e}")
-                        if job_id:
-                            update_export_progress(error=str(e))
-                        break
+                        for addr, buffer in zip(address_list, buffers)
+                    ], workers)
+                    await pipeline.join()
+                    statuses = [address_status for _, address_status in results]
                 
-                logger.info(f"Completed processing address {addr}: {addr_transactions} transactions found")
+                    self._check_deadline()
+                    total_transactions = sum(buffer.rows_written for buffer in buffers)
+                    if total_transactions:
+                        writer = self._open_output(output_file, fields, headers, output_format,
+                                                   compression, compression_level)
+                        for index, buffer in enumerate(buffers):
+                            rows = deduplicator.filter_rows(buffer.rows, index) if deduplicator else buffer.rows
+                            await asyncio.to_thread(writer.write_rows, rows)
+                        total_transactions = writer.rows_written
             
-            # Export all collected data
-            if all_data['result']:
-                self.export_to_csv(all_data, output_file, additional_fields)
-                logger.info(f"Exported a total of {total_transactions} transactions from {len(address_list)} addresses")
+                self._report_duplicates(deduplicator, job_id)
+                # Only a listing fetched without date or page limits can rebuild this export offline
+                await asyncio.to_thread(
+                    self._record_listings, address_list, statuses, fetch_kwargs,
+                    complete=not (start_date or end_date or max_pages or resume) and start_page == 1
+                )
+            
+                # Export all collected data
+                if total_transactions:
+                    # Rename the written temporary file into place
+                    await asyncio.to_thread(writer.commit)
+                    logger.info(f"Exported a total of {total_transactions} transactions from {len(address_list)} addresses")
                 
-                # Update progress to completed
-                if job_id:
-                    update_export_progress(status='completed')
-            else:
-                if len(address_list) == 1:
-                    msg = f"No transactions found for address {address_list[0]}"
-                    logger.warning(msg)
+                    # Update progress to completed with the rows that made it past deduplication
                     if job_id:
-                        update_export_progress(status='error', error=msg)
+                        update_export_progress(job_id, status='completed', written_transactions=total_transactions)
                 else:
-                    msg = f"No transactions found for any of the {len(address_list)} addresses"
-                    logger.warning(msg)
-                    if job_id:
-                        update_export_progress(status='error', error=msg)
+                    if writer:
+                        writer.discard()
+                    if len(address_list) == 1:
+                        msg = f"No transactions found for address {address_list[0]}"
+                        logger.warning(msg)
+                        if job_id:
+                            update_export_progress(job_id, status='error', error=msg)
+                    else:
+                        msg = f"No transactions found for any of the {len(address_list)} addresses"
+                        logger.warning(msg)
+                        if job_id:
+                            update_export_progress(job_id, status='error', error=msg)
+            
+                # The job finished, so there is nothing left to resume
+                if checkpoint:
+                    checkpoint.delete()
                 
-            return total_transactions
+                return total_transactions
             
-        except Exception as e:
-            logger.error(f"Error during export process: {e}")
-            if job_id:
-                update_export_progress(status='error', error=str(e))
-            raise
+            except asyncio.CancelledError:
+                logger.info(f"Export cancelled{f' (job {job_id})' if job_id else ''}")
+                if writer:
+                    writer.discard()
+                if checkpoint:
+                    logger.info(f"Progress saved in {checkpoint.path}; resume with --resume {job_id}")
+                if job_id:
+                    update_export_progress(job_id, status='cancelled', resumable=checkpoint is not None)
+                raise
+            except Exception as e:
+                logger.error(f"Error during export process: {e}")
+                if writer:
+                    writer.close()
+                if checkpoint:
+                    # The part files and checkpoint stay on disk for resume_export()
+                    logger.info(f"Progress saved in {checkpoint.path}; resume with --resume {job_id}")
+                if job_id:
+                    update_export_progress(job_id, status='error', error=str(e), resumable=checkpoint is not None)
+                raise
+            finally:
+                if deduplicator:
+                    deduplicator.close()
+                if job_id:
+                    # The job's final state must be stored before whoever awaits the job reads it
+                    await export_progress.flush(job_id)
 
 
-def start_export_job(job_id, addresses, max_pages=None):
+def start_export_job(job_id, addresses, max_pages=None, status='running'):
     """
-    Initialize or reset the export status for a new job.
+    Register a new export job, replacing an earlier job with the same ID.
     
     Args:
         job_id (str): Unique identifier for the export job
         addresses (list): List of addresses to process
         max_pages (int): Maximum pages to process per address
+        status (str): Initial status, 'queued' for a job still waiting for a worker slot
         
     Returns:
         dict: Current export status
     """
-    with status_lock:
-        global export_status
-        export_status = {
-            'job_id': job_id,
-            'status': 'running',
-            'progress': 0,
-            'total_addresses': len(addresses) if isinstance(addresses, list) else 1,
-            'processed_addresses': 0,
-            'current_address': addresses[0] if isinstance(addresses, list) and addresses else addresses,
-            'total_transactions': 0,
-            'current_page': 1,
-            'max_pages': max_pages,
-            'error': None,
-            'output_file': None,
-            'start_time': datetime.now().isoformat(),
-            'end_time': None
-        }
-        return export_status.copy()
+    return export_jobs.create(job_id, {
+        'status': status,
+        'progress': 0,
+        'total_addresses': len(addresses) if isinstance(addresses, list) else 1,
+        'processed_addresses': 0,
+        'current_address': addresses[0] if isinstance(addresses, list) and addresses else addresses,
+        'total_transactions': 0,
+        'current_page': 1,
+        'max_pages': max_pages,
+        'error': None,
+        'output_file': None,
+        'start_time': datetime.now().isoformat(),
+        'end_time': None,
+        'address_progress': {},
+        'resumable': False,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'endpoints': [],
+        'pipeline': {},
+        'duplicates_removed': 0
+    })
 
-def update_export_progress(current_address=None, current_page=None, transactions=None, status=None, error=None, output_file=None):
+def update_export_progress(job_id, current_address=None, current_page=None, transactions=None, status=None,
+                           error=None, output_file=None, resumable=None, cache_stats=None, pipeline_stats=None,
+                           duplicates_removed=None, written_transactions=None):
     """
-    Update the export progress status.
+    Update the progress status of an export job.
     
     Args:
+        job_id (str): Identifier of the export job
         current_address (str): Current address being processed
         current_page (int): Current page being processed
         transactions (int): Number of transactions processed
-        status (str): Current status ('running', 'completed', 'error')
+        status (str): Current status ('queued', 'running', 'paused', 'completed', 'error', 'cancelled')
         error (str): Error message if status is 'error'
         output_file (str): Path to the output file
+        resumable (bool): Whether a failed job can be resumed from its checkpoint
+        cache_stats (dict): Response cache counters and mirror health of the job's explorer client
+        pipeline_stats (dict): Queue depth and throughput of every stage of the job's export pipeline
+        duplicates_removed (int): Rows dropped because another address of the batch already exported them
+        written_transactions (int): Rows actually written to the output; replaces the running count of
+                                    fetched transactions, which still includes dropped duplicates
         
     Returns:
-        dict: Updated export status
+        dict: Updated export status, or None if the job is not registered or the update was queued
+              (see _update_job)
     """
-    with status_lock:
-        global export_status
-        
-        if current_address and current_address != export_status['current_address']:
-            export_status['current_address'] = current_address
-            export_status['processed_addresses'] += 1
-            export_status['current_page'] = 1
+    def apply(job):
+        if current_address and current_address != job['current_address']:
+            job['current_address'] = current_address
+            job['processed_addresses'] += 1
+            job['current_page'] = 1
         
         if current_page:
-            export_status['current_page'] = current_page
+            job['current_page'] = current_page
         
         if transactions:
-            export_status['total_transactions'] += transactions
+            job['total_transactions'] += transactions
+
+        if written_transactions is not None:
+            job['total_transactions'] = written_transactions
         
         if status:
-            export_status['status'] = status
-            if status in ['completed', 'error']:
-                export_status['end_time'] = datetime.now().isoformat()
+            job['status'] = status
+            if status in ['completed', 'error', 'cancelled']:
+                job['end_time'] = datetime.now().isoformat()
         
         if error:
-            export_status['error'] = error
+            job['error'] = error
             
         if output_file:
-            export_status['output_file'] = output_file
+            job['output_file'] = output_file
+            
+        if resumable is not None:
+            job['resumable'] = resumable
+            
+        if cache_stats:
+            job['cache_hits'] = cache_stats['cache_hits']
+            job['cache_misses'] = cache_stats['cache_misses']
+            job['endpoints'] = cache_stats.get('endpoints', [])
+
+        if pipeline_stats:
+            job['pipeline'] = pipeline_stats
+
+        if duplicates_removed is not None:
+            job['duplicates_removed'] = duplicates_removed
+        
+        _recalculate_progress(job)
+
+    urgent = bool(status or error or output_file or resumable is not None or written_transactions is not None)
+    return _update_job(job_id, apply, urgent)
+
+def update_address_progress(job_id, address, page=None, transactions=None, status=None):
+    """
+    Update the progress of a single address within an export job.
+
+    Each address keeps its own page and transaction counters so progress stays
+    accurate when several addresses are fetched concurrently.
+
+    Args:
+        job_id (str): Identifier of the export job
+        address (str): Address being processed
+        page (int): Page currently being fetched for the address
+        transactions (int): Number of transactions found on the latest page
+        status (str): Address status ('running', 'completed', 'error')
+
+    Returns:
+        dict: Updated export status, or None if the job is not registered or the update was queued
+              (see _update_job)
+    """
+    def apply(job):
+        address_progress = job.setdefault('address_progress', {})
+        entry = address_progress.setdefault(address, {
+            'status': 'running',
+            'current_page': 0,
+            'transactions': 0
+        })
+
+        if page:
+            entry['current_page'] = page
+            job['current_address'] = address
+            job['current_page'] = page
+
+        if transactions:
+            entry['transactions'] += transactions
+            job['total_transactions'] += transactions
+
+        if status:
+            entry['status'] = status
+
+        job['processed_addresses'] = sum(
+            1 for item in address_progress.values() if item['status'] != 'running'
+        )
+
+        _recalculate_progress(job)
+
+    return _update_job(job_id, apply, urgent=status is not None)
+
+def _update_job(job_id, apply, urgent):
+    """
+    Apply a progress update to a job's status.
+
+    Jobs report progress on every page, so on an event loop the update is
+    queued and written together with the job's other updates at most once per
+    export_progress.interval, off the loop; state changes are written right away.
+    Elsewhere the registry is updated before returning.
+
+    Returns:
+        dict: Updated export status, or None if it was queued or the job is not registered
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return export_jobs.update(job_id, apply)
+    export_progress.submit(job_id, apply, urgent=urgent)
+    return None
+
+def _recalculate_progress(job):
+    """Recalculate the progress percentage of a job's status dict."""
+    pages_per_address = job['max_pages'] if job['max_pages'] else 10
+    total_work = max(job['total_addresses'], 1) * pages_per_address
+    address_progress = job.get('address_progress')
+
+    if address_progress:
+        # Finished addresses count as fully done, running ones by their current page
+        current_work = sum(
+            pages_per_address if item['status'] != 'running' else min(item['current_page'], pages_per_address)
+            for item in address_progress.values()
+        )
+    else:
+        current_work = (job['processed_addresses'] * pages_per_address) + job['current_page']
+    job['progress'] = min(int((current_work / total_work) * 100), 99)
+
+    # If status is completed, set progress to 100%
+    if job['status'] == 'completed':
+        job['progress'] = 100
+
+def get_export_status(job_id):
+    """
+    Get the status of an export job.
+    
+    Args:
+        job_id (str): Identifier of the export job
         
-        # Calculate progress percentage
-        total_work = export_status['total_addresses'] * (export_status['max_pages'] if export_status['max_pages'] else 10)
-        current_work = (export_status['processed_addresses'] * (export_status['max_pages'] if export_status['max_pages'] else 10)) + export_status['current_page']
-        export_status['progress'] = min(int((current_work / total_work) * 100), 99)
+    Returns:
+        dict: Current export status, or None if the job is unknown or has expired
+    """
+    return export_jobs.get(job_id)
+
+def wait_for_export_status(job_id, since, timeout):
+    """
+    Wait until an export job's status changes.
+    
+    Args:
+        job_id (str): Identifier of the export job
+        since (int): 'version' of the status the caller already has
+        timeout (float): Seconds to wait at most
         
-        # If status is completed, set progress to 100%
-        if export_status['status'] == 'completed':
-            export_status['progress'] = 100
-            
-        return export_status.copy()
+    Returns:
+        int: Current status version (equal to since if nothing changed in time), or None if the job is unknown
+    """
+    return export_jobs.wait_for_change(job_id, since, timeout)
 
-def get_export_status():
+def list_export_jobs(states=None):
     """
-    Get the current export status.
+    List the export jobs of all processes, most recently started first.
     
+    Args:
+        states (tuple): Only list jobs in these states, e.g. ('running',) (default: all)
+        
     Returns:
-        dict: Current export status
+        list: Status of every listed job
+    """
+    return export_jobs.jobs(states)
+
+def request_export_job_action(job_id, action):
+    """
+    Ask whichever process runs an export job to pause, resume or cancel it.
+    
+    Args:
+        job_id (str): Identifier of the export job
+        action (str): 'pause', 'resume' or 'cancel'
+        
+    Returns:
+        bool: False if the job is unknown or already finished
+    """
+    return export_jobs.request(job_id, action)
+
+def take_export_job_requests(job_ids):
+    """
+    Collect the pause, resume and cancel requests left for some export jobs.
+    
+    Args:
+        job_ids (list): Jobs run by the calling process
+        
+    Returns:
+        dict: Requested action by job ID
+    """
+    return export_jobs.take_requests(job_ids)
+
+def list_checkpoints():
+    """
+    List interrupted export jobs that can be resumed.
+    
+    Returns:
+        list: Checkpoint summaries, most recently updated first
     """
-    with status_lock:
-        return export_status.copy()
+    checkpoints = []
+    for path in glob.glob(f"{DEFAULT_CHECKPOINT_DIR}/*.json"):
+        job_id = os.path.splitext(os.path.basename(path))[0]
+        checkpoint = ExportCheckpoint.load(job_id)
+        if checkpoint is None:
+            continue
+        addresses = checkpoint.data.get('addresses', {})
+        options = checkpoint.options
+        address_list = options['address'] if isinstance(options['address'], list) else [options['address']]
+        checkpoints.append({
+            'job_id': job_id,
+            'output_file': options.get('output_file'),
+            'total_addresses': len(address_list),
+            'completed_addresses': sum(1 for state in addresses.values() if state.get('status') == 'completed'),
+            'rows': sum(state.get('rows', 0) for state in addresses.values()),
+            'updated': checkpoint.data.get('updated')
+        })
+    checkpoints.sort(key=lambda item: item['updated'] or '', reverse=True)
+    return checkpoints
 
 def get_recent_exports(max_files=5):
     """
@@ -520,15 +2314,16 @@ def get_recent_exports(max_files=5):
     Returns:
         list: List of recent export files, sorted by modification time (newest first)
     """
-    # Search for CSV files in the export directory and root
+    # Search for export files of every format in the export directory and root
     export_files = []
     
-    # Check the export directory first
-    if os.path.exists(DEFAULT_EXPORT_DIR):
-        export_files.extend(glob.glob(f"{DEFAULT_EXPORT_DIR}/*.csv"))
-    
-    # Also check the root directory
-    export_files.extend(glob.glob("*.csv"))
+    for extension in EXPORT_EXTENSIONS:
+        # Check the export directory first
+        if os.path.exists(DEFAULT_EXPORT_DIR):
+            export_files.extend(glob.glob(f"{DEFAULT_EXPORT_DIR}/*{extension}"))
+        
+        # Also check the root directory
+        export_files.extend(glob.glob(f"*{extension}"))
     
     # Sort by modification time (newest first)
     export_files.sort(key=os.path.getmtime, reverse=True)
@@ -552,13 +2347,15 @@ def show_recent_exports():
         logger.info(f"{idx}. {file_path} ({file_size:.1f} KB, modified: {mod_time})")
 
 
-def generate_output_filename(address, internal=False):
+def generate_output_filename(address, internal=False, output_format='csv', compression=None):
     """
     Generate a timestamped output filename.
     
     Args:
         address (str): The blockchain address
         internal (bool): Whether this is for internal transactions
+        output_format (str): Export format, which determines the file extension
+        compression (str): 'gzip' or 'zstd' to add the compression extension of CSV files
         
     Returns:
         str: The generated output filename
@@ -571,11 +2368,30 @@ def generate_output_filename(address, internal=False):
     
     # Create the filename
     tx_type = "internal" if internal else "token"
-    filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{short_addr}_{timestamp}.csv"
+    filename = f"{DEFAULT_EXPORT_DIR}/tx_{tx_type}_{short_addr}_{timestamp}{export_extension(output_format, compression)}"
     
     return filename
 
 
+def generate_sync_filename(label, internal=False):
+    """
+    Generate the stable filename of an incrementally synced dataset.
+    
+    Unlike generate_output_filename() the name carries no timestamp, so every
+    incremental run appends to the same file.
+    
+    Args:
+        label (str): Address or preset name identifying the dataset
+        internal (bool): Whether this is for internal transactions
+        
+    Returns:
+        str: The dataset filename
+    """
+    safe_label = "".join(c if c.isalnum() or c in '-_' else '_' for c in label)
+    tx_type = "internal" if internal else "token"
+    return f"{DEFAULT_EXPORT_DIR}/sync_{tx_type}_{safe_label}.csv"
+
+
 def load_presets():
     """
     Load export presets from the presets file.
@@ -706,7 +2522,7 @@ def main():
     """Main entry point for the script."""
     # Create the base parser
     parser = argparse.ArgumentParser(
-        description='Fetch and export Zero Network token transactions to CSV',
+        description='Fetch and export Zero Network token transactions to CSV, Parquet or Feather',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
     
@@ -733,6 +2549,24 @@ def main():
         args.start_date = None
         args.end_date = None
         args.no_date_filter = False
+        args.concurrency = 1
+        args.stream = False
+        args.cache = False
+        args.store = False
+        args.offline = False
+        args.incremental = False
+        args.pagination = 'page'
+        args.shards = 1
+        args.rate_limit = None
+        args.max_retries = None
+        args.connect_timeout = None
+        args.read_timeout = None
+        args.deadline = None
+        args.hedge = False
+        args.keep_duplicates = False
+        args.format = None
+        args.compress = None
+        args.compression_level = None
         
         # Process remaining arguments from command line
         i = 2
@@ -747,6 +2581,27 @@ def main():
             elif arg == '--no-date-filter':
                 args.no_date_filter = True
                 i += 1
+            elif arg == '--stream':
+                args.stream = True
+                i += 1
+            elif arg == '--cache':
+                args.cache = True
+                i += 1
+            elif arg == '--store':
+                args.store = True
+                i += 1
+            elif arg == '--offline':
+                args.offline = True
+                i += 1
+            elif arg == '--incremental':
+                args.incremental = True
+                i += 1
+            elif arg == '--hedge':
+                args.hedge = True
+                i += 1
+            elif arg == '--keep-duplicates':
+                args.keep_duplicates = True
+                i += 1
             elif i + 1 < len(sys.argv):
                 val = sys.argv[i + 1]
                 if arg == '-o' or arg == '--output':
@@ -773,6 +2628,39 @@ def main():
                 elif arg == '--end-date':
                     args.end_date = val
                     i += 2
+                elif arg == '-c' or arg == '--concurrency':
+                    args.concurrency = int(val)
+                    i += 2
+                elif arg == '--pagination':
+                    args.pagination = val
+                    i += 2
+                elif arg == '--shards':
+                    args.shards = int(val)
+                    i += 2
+                elif arg == '--rate-limit':
+                    args.rate_limit = float(val)
+                    i += 2
+                elif arg == '--max-retries':
+                    args.max_retries = int(val)
+                    i += 2
+                elif arg == '--connect-timeout':
+                    args.connect_timeout = float(val)
+                    i += 2
+                elif arg == '--read-timeout':
+                    args.read_timeout = float(val)
+                    i += 2
+                elif arg == '--deadline':
+                    args.deadline = float(val)
+                    i += 2
+                elif arg == '--format':
+                    args.format = val
+                    i += 2
+                elif arg == '--compress':
+                    args.compress = val
+                    i += 2
+                elif arg == '--compression-level':
+                    args.compression_level = int(val)
+                    i += 2
                 else:
                     i += 1
             else:
@@ -791,8 +2679,17 @@ def main():
         address_group.add_argument('--address', '-a', help='Blockchain address to fetch transactions for')
         address_group.add_argument('--address-file', '-af', help='File containing one blockchain address per line')
         address_group.add_argument('--addresses', '-as', nargs='+', help='Multiple blockchain addresses to fetch transactions for')
+        address_group.add_argument('--resume', metavar='JOB_ID', help='Resume an interrupted streaming export job')
         export_parser.add_argument('-o', '--output', 
-                            help='Output CSV file path (default: auto-generated timestamped file)')
+                            help='Output file path (default: auto-generated timestamped file)')
+        export_parser.add_argument('--format', choices=EXPORT_FORMATS,
+                            help='Output file format; parquet and feather write typed columns '
+                                 '(default: from the output file extension, else csv)')
+        export_parser.add_argument('--compress', choices=COMPRESSIONS,
+                            help='Compress the export while writing it; CSV files get a .gz / .zst extension '
+                                 '(default: from the output file extension, else uncompressed)')
+        export_parser.add_argument('--compression-level', type=int, default=None,
+                            help='Compression level (gzip 1-9, default 6; zstd 1-22, default 3)')
         export_parser.add_argument('-p', '--page', type=int, default=1,
                             help='Page number to start from')
         export_parser.add_argument('-m', '--max-pages', type=int, default=None,
@@ -804,7 +2701,8 @@ def main():
         export_parser.add_argument('-i', '--internal', action='store_true',
                             help='Fetch internal token transactions')
         export_parser.add_argument('-u', '--api-url', default='https://zero-network.calderaexplorer.xyz/api',
-                            help='Blockchain explorer API base URL')
+                            help='Blockchain explorer API base URL; separate several mirrors with commas '
+                                 'to balance requests across them')
         export_parser.add_argument('-f', '--fields', nargs='+',
                             help='Additional fields to include in the CSV output')
         export_parser.add_argument('--start-date', 
@@ -815,6 +2713,37 @@ def main():
                             help='Disable date filtering completely')
         export_parser.add_argument('--token-contract',
                             help='Token contract address to filter transactions')
+        export_parser.add_argument('-c', '--concurrency', type=int, default=1,
+                            help='Number of addresses to fetch in parallel')
+        export_parser.add_argument('--stream', action='store_true',
+                            help='Write each page to disk as it arrives instead of buffering the export in memory')
+        export_parser.add_argument('--cache', action='store_true',
+                            help='Reuse explorer responses from the persistent on-disk response cache')
+        export_parser.add_argument('--store', action='store_true',
+                            help='Save every fetched transaction in the local transaction store')
+        export_parser.add_argument('--offline', action='store_true',
+                            help='Build the export from the local transaction store without calling the explorer')
+        export_parser.add_argument('--incremental', action='store_true',
+                            help='Only fetch transactions newer than the last sync and append them to the output file')
+        export_parser.add_argument('--pagination', choices=['page', 'block'], default='page',
+                            help='Paginate by page number, or by block cursor to get past the explorer page limit')
+        export_parser.add_argument('--shards', type=int, default=1,
+                            help='Split each address into this many block ranges fetched in parallel')
+        export_parser.add_argument('--rate-limit', type=float,
+                            help='Maximum explorer requests per second (default: 10)')
+        export_parser.add_argument('--max-retries', type=int,
+                            help='Retries for throttled or failed explorer requests (default: 5)')
+        export_parser.add_argument('--connect-timeout', type=float,
+                            help='Seconds to wait for a connection to the explorer (default: 5)')
+        export_parser.add_argument('--read-timeout', type=float,
+                            help='Seconds to wait for an explorer response (default: 30)')
+        export_parser.add_argument('--deadline', type=float,
+                            help='Give up on the whole export after this many seconds')
+        export_parser.add_argument('--hedge', action='store_true',
+                            help='Send a duplicate of requests slower than the p95 latency and use the first response')
+        export_parser.add_argument('--keep-duplicates', action='store_true',
+                            help='Write transfers between two of the exported addresses once per address '
+                                 'instead of only for the first one')
         export_parser.add_argument('-v', '--verbose', action='store_true',
                             help='Enable verbose logging for export command')
         
@@ -857,6 +2786,28 @@ def main():
                            help='Token contract address to filter transactions')
         save_parser.add_argument('-f', '--fields', nargs='+',
                            help='Additional fields to include in the CSV output')
+        save_parser.add_argument('-c', '--concurrency', type=int, default=1,
+                           help='Number of addresses to fetch in parallel')
+        save_parser.add_argument('--stream', action='store_true',
+                           help='Write each page to disk as it arrives instead of buffering the export in memory')
+        save_parser.add_argument('--cache', action='store_true',
+                           help='Reuse explorer responses from the persistent on-disk response cache')
+        save_parser.add_argument('--store', action='store_true',
+                           help='Save every fetched transaction in the local transaction store')
+        save_parser.add_argument('--incremental', action='store_true',
+                           help='Only fetch transactions newer than the last run and append them to one dataset file')
+        save_parser.add_argument('--pagination', choices=['page', 'block'], default='page',
+                           help='Paginate by page number, or by block cursor to get past the explorer page limit')
+        save_parser.add_argument('--shards', type=int, default=1,
+                           help='Split each address into this many block ranges fetched in parallel')
+        save_parser.add_argument('--keep-duplicates', action='store_true',
+                           help='Write transfers between two of the preset addresses once per address')
+        save_parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv',
+                           help='Output file format; parquet and feather write typed columns')
+        save_parser.add_argument('--compress', choices=COMPRESSIONS,
+                           help='Compress the export while writing it (gzip or zstd)')
+        save_parser.add_argument('--compression-level', type=int, default=None,
+                           help='Compression level (gzip 1-9, default 6; zstd 1-22, default 3)')
         save_parser.add_argument('-v', '--verbose', action='store_true',
                            help='Enable verbose logging for preset save command')
         
@@ -870,7 +2821,7 @@ def main():
         use_parser = preset_subparsers.add_parser('use', help='Use a preset for export')
         use_parser.add_argument('name', help='Name of the preset to use')
         use_parser.add_argument('-o', '--output', 
-                          help='Output CSV file path (default: auto-generated timestamped file)')
+                          help='Output file path (default: auto-generated timestamped file)')
         use_parser.add_argument('-v', '--verbose', action='store_true',
                           help='Enable verbose logging for preset use command')
         
@@ -908,8 +2859,26 @@ def main():
                 'sort': args.sort,
                 'internal': args.internal,
                 'fields': args.fields,
-                'token_contract': args.token_contract if hasattr(args, 'token_contract') else None
+                'token_contract': args.token_contract if hasattr(args, 'token_contract') else None,
+                'concurrency': args.concurrency,
+                'stream': args.stream,
+                'cache': args.cache,
+                'store': args.store,
+                'incremental': args.incremental,
+                'pagination': args.pagination,
+                'shards': args.shards,
+                'format': args.format,
+                'compression': args.compress,
+                'compression_level': args.compression_level,
+                'dedup': not args.keep_duplicates
             }
+            if args.incremental:
+                # Reject what would fail on every run of the preset
+                try:
+                    check_incremental_output(args.format or 'csv', args.compress)
+                except ValueError as e:
+                    logger.error(f"Cannot save preset '{args.name}': {e}")
+                    return 1
             
             # Handle date filtering options
             if args.no_date_filter:
@@ -961,12 +2930,20 @@ def main():
             
             # Generate output filename if not provided
             output_file = args.output
-            if not output_file:
-                output_file = generate_output_filename(preset['address'], preset.get('internal', False))
+            if not output_file and preset.get('incremental', False):
+                output_file = generate_sync_filename(f"preset_{args.name}", preset.get('internal', False))
+                logger.info(f"Incremental dataset: {output_file}")
+            elif not output_file:
+                output_file = generate_output_filename(preset['address'], preset.get('internal', False),
+                                                       preset.get('format', 'csv'), preset.get('compression'))
                 logger.info(f"Auto-generated output filename: {output_file}")
                 
             # Create exporter and process transactions
-            exporter = ZeroNetworkExporter(base_url=preset.get('api_url', 'https://zero-network.calderaexplorer.xyz/api'))
+            exporter = ZeroNetworkExporter(
+                base_url=preset.get('api_url', 'https://zero-network.calderaexplorer.xyz/api'),
+                cache=get_response_cache() if preset.get('cache', False) else None,
+                store=get_transaction_store() if preset.get('store', False) else None
+            )
             
             # Handle date parameters
             start_date = preset.get('start_date')
@@ -983,6 +2960,11 @@ def main():
                 end_date = "2025-04-05"
                 logger.info(f"Using default date range: {start_date} to {end_date}")
                 
+            # Streaming exports get a job ID so they are checkpointed and can be resumed
+            job_id = uuid.uuid4().hex if preset.get('stream', False) and not preset.get('incremental', False) else None
+            if job_id:
+                logger.info(f"Export job ID: {job_id} (resume with: export --resume {job_id})")
+                
             try:
                 total_txs = exporter.process_all_pages(
                     address=preset['address'],
@@ -995,7 +2977,17 @@ def main():
                     additional_fields=preset.get('fields'),
                     start_date=start_date,
                     end_date=end_date,
-                    token_contract=preset.get('token_contract')
+                    token_contract=preset.get('token_contract'),
+                    concurrency=preset.get('concurrency', 1),
+                    stream=preset.get('stream', False),
+                    incremental=preset.get('incremental', False),
+                    pagination=preset.get('pagination', 'page'),
+                    shards=preset.get('shards', 1),
+                    output_format=preset.get('format', 'csv'),
+                    compression=preset.get('compression'),
+                    compression_level=preset.get('compression_level'),
+                    dedup=preset.get('dedup', True),
+                    job_id=job_id
                 )
                 
                 if total_txs > 0:
@@ -1020,6 +3012,37 @@ def main():
     
     # Legacy mode handling already done at the start of the function
         
+    # Resume an interrupted export from its checkpoint
+    if args.command == 'export' and getattr(args, 'resume', None):
+        checkpoint = ExportCheckpoint.load(args.resume)
+        if checkpoint is None:
+            logger.error(f"No checkpoint found for job {args.resume}")
+            return 1
+        
+        try:
+            exporter = ZeroNetworkExporter(
+                base_url=checkpoint.data.get('api_url', args.api_url),
+                # The job keeps the cache and store it was started with
+                cache=get_response_cache() if args.cache or checkpoint.data.get('cache') else None,
+                rate_limit=args.rate_limit,
+                max_retries=args.max_retries,
+                connect_timeout=args.connect_timeout,
+                read_timeout=args.read_timeout,
+                hedge=args.hedge,
+                store=get_transaction_store() if args.store or checkpoint.data.get('store') else None
+            )
+            total_txs = exporter.resume_export(args.resume, deadline=args.deadline)
+            if total_txs > 0:
+                logger.info(f"Successfully exported {total_txs} transactions to {checkpoint.options['output_file']}")
+                show_recent_exports()
+            return 0
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            if args.verbose:
+                import traceback
+                logger.debug(traceback.format_exc())
+            return 1
+    
     # Default to 'export' if no command specified
     if not args.command or args.command == 'export':
         try:
@@ -1061,14 +3084,39 @@ def main():
                 logger.error("No valid addresses provided")
                 return 1
             
+            # An explicit --format wins, otherwise the output file's extension decides
+            output_format = args.format or (export_format_for(args.output) if args.output else None) or 'csv'
+            compression = args.compress or (compression_for(args.output) if args.output else None)
+            
             # Generate output filename if not provided
             output_file = args.output
-            if not output_file:
-                output_file = generate_output_filename(address_label, args.internal)
+            if not output_file and args.incremental:
+                output_file = generate_sync_filename(address_label, args.internal)
+                logger.info(f"Incremental dataset: {output_file}")
+            elif not output_file:
+                output_file = generate_output_filename(address_label, args.internal, output_format, compression)
                 logger.info(f"Auto-generated output filename: {output_file}")
+            elif export_format_for(output_file) != output_format and (output_format != 'csv'
+                                                                      or export_format_for(output_file)):
+                # Parquet written to out.csv (or CSV to out.parquet) would be misread by the viewer and row counter
+                output_file = with_export_extension(output_file, output_format, compression)
+                logger.info(f"Writing {output_format} export to {output_file}")
+            elif output_format == 'csv' and compression and compression_for(output_file) != compression:
+                # The viewer and row counter recognise compressed CSV files by their extension
+                output_file += COMPRESSION_EXTENSIONS[compression]
+                logger.info(f"Writing {compression} compressed export to {output_file}")
             
             # Create exporter and process transactions
-            exporter = ZeroNetworkExporter(base_url=args.api_url)
+            exporter = ZeroNetworkExporter(
+                base_url=args.api_url,
+                cache=get_response_cache() if args.cache else None,
+                rate_limit=args.rate_limit,
+                max_retries=args.max_retries,
+                connect_timeout=args.connect_timeout,
+                read_timeout=args.read_timeout,
+                hedge=args.hedge,
+                store=get_transaction_store() if args.store or args.offline else None
+            )
             # Handle date parameters
             if args.start_date == "":
                 args.start_date = None
@@ -1092,25 +3140,63 @@ def main():
                 args.end_date = "2025-04-05"
                 logger.info(f"Using default date range: {args.start_date} to {args.end_date}")
                 
-            # Process all addresses
-            total_txs = exporter.process_all_pages(
-                address=addresses,  # Now passing a list of addresses
-                output_file=output_file,
-                start_page=args.page,
-                max_pages=args.max_pages,
-                records_per_page=args.records,
-                sort=args.sort,
-                internal=args.internal,
-                additional_fields=args.fields,
-                start_date=args.start_date,
-                end_date=args.end_date,
-                token_contract=args.token_contract if hasattr(args, 'token_contract') else None
-            )
+            # Streaming exports get a job ID so they are checkpointed and can be resumed
+            job_id = uuid.uuid4().hex if args.stream and not args.incremental and not args.offline else None
+            if job_id:
+                logger.info(f"Export job ID: {job_id} (resume with: export --resume {job_id})")
+                
+            if args.offline:
+                # Rebuild the export from transactions stored by earlier runs; nothing is fetched
+                if args.incremental:
+                    logger.error("Offline exports write a new file; they cannot be combined with --incremental")
+                    return 1
+                total_txs = exporter.export_from_store(
+                    addresses,
+                    output_file,
+                    sort=args.sort,
+                    internal=args.internal,
+                    additional_fields=args.fields,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                    token_contract=args.token_contract if hasattr(args, 'token_contract') else None,
+                    output_format=output_format,
+                    compression=compression,
+                    compression_level=args.compression_level,
+                    dedup=not args.keep_duplicates
+                )
+            else:
+                # Process all addresses
+                total_txs = exporter.process_all_pages(
+                    address=addresses,  # Now passing a list of addresses
+                    output_file=output_file,
+                    start_page=args.page,
+                    max_pages=args.max_pages,
+                    records_per_page=args.records,
+                    sort=args.sort,
+                    internal=args.internal,
+                    additional_fields=args.fields,
+                    start_date=args.start_date,
+                    end_date=args.end_date,
+                    token_contract=args.token_contract if hasattr(args, 'token_contract') else None,
+                    concurrency=args.concurrency,
+                    stream=args.stream,
+                    incremental=args.incremental,
+                    pagination=args.pagination,
+                    shards=args.shards,
+                    deadline=args.deadline,
+                    output_format=output_format,
+                    compression=compression,
+                    compression_level=args.compression_level,
+                    dedup=not args.keep_duplicates,
+                    job_id=job_id
+                )
             
             if total_txs > 0:
                 logger.info(f"Successfully exported {total_txs} transactions to {output_file}")
                 # Show recent exports after a successful export
                 show_recent_exports()
+            elif args.incremental:
+                logger.info(f"No new transactions; {output_file} is up to date")
             else:
                 if len(addresses) == 1:
                     logger.warning(f"No transactions found for address {addresses[0]}")